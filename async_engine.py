@@ -0,0 +1,297 @@
+"""
+asyncio 发送引擎模块
+
+适用于大量低速率数据流（例如每个传感器使用独立端口）的场景。所有数据流
+运行在同一个事件循环中，每一路是一个协程，发送时刻由事件循环的定时器堆统一
+调度，线程数和上下文切换开销不再随数据流数量增长：
+    - 发送使用非阻塞的数据报端点（loop.create_datagram_endpoint），每个目标的
+      发送/错误次数与 FanoutTransport 的含义相同
+    - 读取/编码数据块在共享的线程池中进行
+    - 等待使用 asyncio.sleep，不自旋，精度约为1毫秒
+
+配置、事件格式与 SenderSession 相同，可以直接替换：
+    AsyncSession(streams, on_event, encoder_workers).run()
+"""
+
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import LATENESS_WINDOW
+from scheduler import LatenessStats, create_scheduler
+from sender_engine import DetailLog, SenderEngine
+from session import DEFAULT_ENCODER_WORKERS
+from transport import Destination, UdpTransport
+
+# 每次检查停止/暂停标志的最长等待时间（秒）
+POLL_SECONDS = 0.1
+
+# 暂停期间重复发送最后一个数据包的最短间隔（秒）
+MIN_HOLD_SECONDS = 0.01
+
+# 尽快发送模式下每发送多少个数据包让出一次事件循环
+ASAP_YIELD_PACKETS = 256
+
+
+class _StreamProtocol(asyncio.DatagramProtocol):
+    """
+    数据报端点的回调：按目标统计发送/错误次数，处理写缓冲区流控
+
+    写缓冲区上限为0，每次发送前等待缓冲区清空（writable），因此缓冲区中最多只有
+    最近发出的一个数据报：sendto 中立即失败的错误属于正在发送的目标，之后在
+    事件循环中发送失败的错误属于缓冲的那个数据报的目标。缓冲的数据报在发出后
+    （resume_writing）才计入目标的发送次数。
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.writable = asyncio.Event()
+        self.writable.set()
+        self.transport = None
+        self.sending = None   # 正在 sendto 的目标
+        self.buffered = None  # 写缓冲区中的数据报的目标
+        self.failed = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=0)
+
+    def send(self, packet, destination):
+        """发送到一个目标，返回是否没有立即失败（已发出或已进入写缓冲区）"""
+        self.sending, self.failed = destination, False
+        try:
+            self.transport.sendto(packet, destination.transport.address)
+        finally:
+            self.sending = None
+        if self.failed:
+            return False
+        if self.transport.get_write_buffer_size():
+            self.buffered = destination
+        else:
+            destination.sent += 1
+        return True
+
+    def error_received(self, exc):
+        self.engine.counters.errors += 1
+        if self.sending is not None:
+            destination, self.failed = self.sending, True
+        else:
+            destination, self.buffered = self.buffered, None
+        if destination is None:
+            # 与任何发送无关的错误（例如接收时报告的ICMP错误）只计入总错误数
+            self.engine.record_send_error(exc)
+            return
+        destination.errors += 1
+        self.engine.record_send_error(f"{destination.name}: {exc}")
+        # 事件循环中发送失败后 asyncio 不会恢复写入；缓冲区已空时在这里恢复
+        if not self.transport.get_write_buffer_size():
+            self.writable.set()
+
+    def pause_writing(self):
+        self.writable.clear()
+
+    def resume_writing(self):
+        if self.buffered is not None:
+            self.buffered.sent += 1
+            self.buffered = None
+        self.writable.set()
+
+
+class AsyncSession:
+    """
+    基于 asyncio 的多路发送会话
+
+    每一路数据流借用一个 SenderEngine 对象保存配置、计数、暂停/停止标志并输出日志，
+    但不使用它的发送线程。pause()/resume()/stop()/sample() 可以从任意线程调用。
+    """
+
+    def __init__(self, streams, on_event=None, encoder_workers=DEFAULT_ENCODER_WORKERS):
+        """streams: [(名称, SenderConfig), ...]"""
+        self.on_event = on_event or (lambda event: None)
+        self.encoder_workers = max(int(encoder_workers), 1)
+        self.engines = {name: SenderEngine(config, self._forward(name)) for name, config in streams}
+        self.thread = None
+        self.result = None
+
+    def _forward(self, name):
+        """为某一路数据流创建事件转发函数"""
+        def forward(event):
+            if event['type'] == 'complete':
+                self.on_event({'type': 'stream_complete', 'stream': name, 'data': event['data']})
+            else:
+                self.on_event(dict(event, stream=name, content=f"[{name}] {event['content']}"))
+        return forward
+
+    def start(self):
+        """在后台线程中运行事件循环"""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def pause(self):
+        for engine in self.engines.values():
+            engine.pause()
+
+    def resume(self):
+        for engine in self.engines.values():
+            engine.resume()
+
+    def stop(self):
+        for engine in self.engines.values():
+            engine.stop()
+
+    def sample(self):
+        """采样每一路的发送计数"""
+        return {name: engine.sample() for name, engine in self.engines.items()}
+
+    def run(self):
+        """在新的事件循环中运行所有数据流直到全部完成，返回汇总统计信息"""
+        start_time = time.time()
+        asyncio.run(self.run_async())
+
+        results = {name: engine.result for name, engine in self.engines.items()}
+        self.result = {
+            'total_sent': sum(result['total_sent'] for result in results.values()),
+            'skipped': sum(result['skipped'] for result in results.values()),
+            'total_records': sum(result['total_records'] for result in results.values()),
+            'elapsed': time.time() - start_time,
+            'streams': results,
+        }
+        failed = [name for name, result in results.items() if 'error' in result]
+        if failed:
+            self.result['error'] = f"数据流发送失败: {', '.join(failed)}"
+        self.on_event({'type': 'complete', 'data': self.result})
+        return self.result
+
+    async def run_async(self):
+        """在当前事件循环中同时运行所有数据流"""
+        with ThreadPoolExecutor(max_workers=self.encoder_workers, thread_name_prefix='encoder') as executor:
+            await asyncio.gather(*(self.run_stream(engine, executor) for engine in self.engines.values()))
+
+    async def _sleep_until(self, deadline_ns, engine):
+        """等待到截止时间；停止时提前返回"""
+        while not engine.stop_flag.is_set():
+            remaining = deadline_ns - time.perf_counter_ns()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining / 1e9, POLL_SECONDS))
+
+    async def _send(self, protocol, destinations, packet):
+        """发送到所有目标（等待写缓冲区清空），返回是否至少有一个目标没有失败"""
+        delivered = False
+        for destination in destinations:
+            if not protocol.writable.is_set():
+                await protocol.writable.wait()
+            delivered = protocol.send(packet, destination) or delivered
+        return delivered
+
+    async def _hold(self, engine, protocol, destinations, last_packet, stamper):
+        """暂停期间按保持间隔重复发送最后一个数据包，返回暂停时长（纳秒）"""
+        hold_seconds = max(engine.config.send_interval, MIN_HOLD_SECONDS)
+        before = time.perf_counter_ns()
+        while engine.pause_flag.is_set() and not engine.stop_flag.is_set():
+            if last_packet is not None:
+                if stamper is not None:
+                    last_packet = stamper.stamp(last_packet)
+                await self._send(protocol, destinations, last_packet)
+            await asyncio.sleep(hold_seconds)
+        return time.perf_counter_ns() - before
+
+    async def run_stream(self, engine, executor):
+        """发送一路数据流直到完成或停止"""
+        loop = asyncio.get_running_loop()
+        config = engine.config
+        counters = engine.counters
+        sock = endpoint = None
+        try:
+            if config.log_file:
+                engine.detail_log = DetailLog(config.log_file)
+            engine.start_monitor(loop)
+            # 目标地址只解析一次；所有目标共用一个非阻塞socket
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            destinations = [Destination(UdpTransport(ip, port, batch_size=1, sock=sock))
+                            for ip, port in config.all_destinations]
+            if any(destination.multicast for destination in destinations):
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, config.multicast_ttl)
+                if config.multicast_interface:
+                    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
+                                    socket.inet_aton(socket.gethostbyname(config.multicast_interface)))
+            sock.setblocking(False)
+            endpoint, protocol = await loop.create_datagram_endpoint(lambda: _StreamProtocol(engine), sock=sock)
+            counters.destinations = destinations
+            scheduler = create_scheduler(config.send_mode, config.send_interval, config.replay_speed)
+            asap = config.send_mode == 'asap'
+
+            engine.emit({'type': 'status', 'content': '正在读取文件...'})
+            chunks, estimated_records = await loop.run_in_executor(executor, engine.open_chunks, False)
+            stamper = engine.create_stamper()
+            counters.total = estimated_records
+            if estimated_records is not None:
+                engine.log(f"开始发送数据，预计 {estimated_records} 条记录...")
+            else:
+                engine.log("开始发送数据...")
+            engine.emit({'type': 'status', 'content': '正在发送...'})
+
+            invalid_totals = {}
+            last_packet = None
+            total_records = 0
+            start_time = time.time()
+            lateness = LatenessStats(LATENESS_WINDOW)
+
+            try:
+                while not engine.stop_flag.is_set():
+                    packets = await loop.run_in_executor(executor, next, chunks, None)
+                    if packets is None:
+                        break
+                    total_records += len(packets)
+                    scheduler.feed(packets.timestamps, packets.invalid_timestamps)
+                    engine.note_invalid(packets, invalid_totals)
+                    counters.add_encoded(packets)
+
+                    for i in range(len(packets)):
+                        if engine.pause_flag.is_set():
+                            scheduler.delay(await self._hold(engine, protocol, destinations, last_packet, stamper))
+                        if engine.stop_flag.is_set():
+                            break
+                        if asap:
+                            if i % ASAP_YIELD_PACKETS == 0:
+                                await asyncio.sleep(0)
+                        else:
+                            deadline = scheduler.next_deadline()
+                            await self._sleep_until(deadline, engine)
+                            late = max(time.perf_counter_ns() - deadline, 0)
+                            lateness.add(late)
+                            counters.lateness.append(late)
+                            scheduler.advance()
+                        last_packet = packets[i]
+                        if stamper is not None:
+                            last_packet = stamper.stamp(last_packet)
+                        # 内核发送缓冲区满时等待；所有目标都立即失败的数据包被跳过
+                        if await self._send(protocol, destinations, last_packet):
+                            counters.sent += 1
+                            counters.bytes_sent += packets.packet_size
+                        else:
+                            counters.skipped += 1
+                        counters.current_row += 1
+            finally:
+                chunks.close()
+
+            engine.result = engine.summarize(invalid_totals, destinations, total_records, start_time, lateness)
+        except Exception as e:
+            engine.log(f"发生错误: {e}")
+            engine.result = {'total_sent': 0, 'skipped': 0, 'total_records': 0, 'elapsed': 0, 'error': str(e)}
+        finally:
+            if endpoint is not None:
+                endpoint.close()
+            elif sock is not None:
+                sock.close()
+            if sock is not None:
+                engine.log("Socket连接已关闭")
+            engine.stop_monitor()
+            if engine.detail_log is not None:
+                engine.detail_log.close()
+                engine.detail_log = None
+
+        engine.emit({'type': 'complete', 'data': engine.result})
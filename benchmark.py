@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+回环性能基准测试
+
+在独立的接收进程中监听 127.0.0.1，按不同的列数、整数/浮点比例、发送间隔和
+发送路径，用 SenderEngine.run（与界面/命令行相同的读取、调度和发送循环）发送
+临时CSV文件中的数据，测量实际发送速率（包/秒、字节/秒）、到达间隔抖动和调度
+延迟的分位数、每包CPU时间和丢包数，结果写入JSON文件，便于修改发送热路径后对比：
+
+    python benchmark.py                          # 完整矩阵，结果写入 benchmark_results.json
+    python benchmark.py --quick                  # 小矩阵，约十几秒
+    python benchmark.py --baseline old.json      # 与旧结果对比，出现性能下降时返回1
+
+发送路径:
+    per_row      逐行 PacketCodec.pack 后立即发送（最初的发送方式）
+    pre_encoded  整块 encode_frame 预编码后逐包发送
+    batched      预编码后批量发送（Linux: sendmmsg），只用于尽快发送模式
+
+间隔为0的用例使用尽快发送模式。抖动由接收进程记录的到达时刻计算：相邻数据包
+到达间隔与目标间隔之差的绝对值；尽快发送没有目标间隔，以到达间隔的中位数为
+目标（批量发送时反映批与批之间的停顿）。调度延迟为引擎记录的实际发送时刻相对
+计划时刻的延迟，只有固定间隔的用例有计划时刻，尽快发送的用例记为 null。
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from packet_codec import PacketBuffer
+from sender_engine import SenderConfig, SenderEngine
+from sheet_reader import SheetReader
+from transport import sendmmsg_available
+
+DEFAULT_OUTPUT = 'benchmark_results.json'
+
+ENGINES = ('per_row', 'pre_encoded', 'batched')
+
+# 完整矩阵
+COLUMN_COUNTS = (8, 32, 128)
+INT_RATIOS = (0.0, 0.5, 1.0)
+INTERVALS = (0.0, 0.0002, 0.001)  # 0 = 尽快发送
+DEFAULT_PACKETS = 20000
+
+# --quick 矩阵
+QUICK_COLUMN_COUNTS = (8, 64)
+QUICK_INT_RATIOS = (0.5,)
+QUICK_INTERVALS = (0.0, 0.001)
+QUICK_PACKETS = 5000
+
+# 固定间隔的用例最长发送时间（秒），数据包数量按此截断
+MAX_CASE_SECONDS = 2.0
+
+# 接收端socket缓冲区大小（字节）
+RECEIVE_BUFFER_SIZE = 1 << 23
+
+# 接收端持续这么长时间没有收到数据包即认为一个用例的数据已全部到达（秒）
+DRAIN_SECONDS = 0.2
+
+# 与基准结果对比时允许的速率下降/抖动增加比例
+DEFAULT_TOLERANCE = 0.2
+
+# 抖动p99增加不超过这个绝对值（微秒）时不算性能下降，避免微秒级的噪声被放大
+JITTER_FLOOR_US = 50.0
+
+
+def _receiver_main(conn, buffer_size):
+    """接收进程：统计收到的数据报数量和字节数并记录到达时刻，空闲时响应计数查询"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, buffer_size)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(DRAIN_SECONDS)
+    conn.send(sock.getsockname()[1])
+
+    buffer = bytearray(65536)
+    count = total_bytes = 0
+    arrivals = []
+    while True:
+        try:
+            total_bytes += sock.recv_into(buffer)
+            arrivals.append(time.perf_counter_ns())
+            count += 1
+            continue
+        except socket.timeout:
+            pass
+        # 只在socket空闲时处理查询，返回的计数已包含之前发出的全部数据包
+        if conn.poll():
+            if conn.recv() == 'stop':
+                break
+            conn.send((count, total_bytes, np.array(arrivals, dtype=np.int64)))
+            arrivals = []
+    sock.close()
+    conn.close()
+
+
+class LoopbackReceiver:
+    """在独立进程中运行的回环接收端，不占用发送进程的CPU时间"""
+
+    def __init__(self, buffer_size=RECEIVE_BUFFER_SIZE):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_receiver_main, args=(child_conn, buffer_size), daemon=True)
+        self.process.start()
+        self.port = self.conn.recv()
+
+    def sample(self):
+        """
+        等待已发出的数据包全部到达，返回 (数据报数量, 字节数, 到达时刻)
+
+        到达时刻（perf_counter_ns）只包含上次查询之后收到的数据包。
+        """
+        self.conn.send('sample')
+        return self.conn.recv()
+
+    def close(self):
+        self.conn.send('stop')
+        self.process.join()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def make_frame(columns, int_ratio, count):
+    """构造 count 行测试数据：时间戳列 + 按比例分配的整数列和浮点列"""
+    int_count = int(round(columns * int_ratio))
+    micros = np.arange(count, dtype=np.int64) * 1000
+    seconds, micros = micros // 1000000, micros % 1000000
+    data = {'Timestamp': [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}:{us}"
+                          for s, us in zip(seconds.tolist(), micros.tolist())]}
+    rng = np.random.default_rng(0)
+    for i in range(columns):
+        if i < int_count:
+            data[f"Int_{i + 1}"] = rng.integers(-100000, 100000, count)
+        else:
+            data[f"Double_{i + 1}"] = rng.normal(0, 1000, count)
+    frame = pd.DataFrame(data)
+    int_columns = [col for col in frame.columns[1:] if col.startswith('Int_')]
+    return frame, int_columns
+
+
+def percentiles_us(values_ns):
+    """(p50, p99, 最大值)，单位微秒"""
+    if len(values_ns) == 0:
+        return 0.0, 0.0, 0.0
+    p50, p99 = np.percentile(values_ns, [50, 99])
+    return p50 / 1e3, p99 / 1e3, float(values_ns.max()) / 1e3
+
+
+def jitter_us(arrivals, interval):
+    """到达间隔与目标间隔（interval 秒；为0时取到达间隔的中位数）之差的 (p50, p99, 最大值)，单位微秒"""
+    gaps = np.diff(arrivals)
+    if len(gaps) == 0:
+        return 0.0, 0.0, 0.0
+    target = interval * 1e9 if interval > 0 else np.median(gaps)
+    return percentiles_us(np.abs(gaps - target))
+
+
+class PerRowEngine(SenderEngine):
+    """逐行 PacketCodec.pack 后立即发送的引擎（最初的发送方式），调度和发送循环与 SenderEngine 相同"""
+
+    def open_chunks(self, background=True):
+        reader = SheetReader(self.config.file_path, self.config.sheet_name, self.config.data_start_row)
+        self.codec = self.config.create_codec(reader.columns)
+        return self._pack_rows(reader), reader.total_rows
+
+    def _pack_rows(self, reader):
+        """在发送线程中逐行编码，每行产出一个只含一个数据包的 PacketBuffer"""
+        codec = self.codec
+        for chunk in reader:
+            for row in chunk.itertuples(index=False, name=None):
+                start = time.perf_counter()
+                packets = PacketBuffer(codec.pack(row), codec.packet_size)
+                packets.encode_seconds = time.perf_counter() - start
+                yield packets
+
+
+def create_engine(engine, config):
+    """按发送路径创建引擎：per_row 逐行编码，pre_encoded 逐包发送，batched 批量发送"""
+    if engine == 'per_row':
+        return PerRowEngine(config, batch_size=1)
+    if engine == 'pre_encoded':
+        return SenderEngine(config, batch_size=1)
+    return SenderEngine(config)
+
+
+def run_case(receiver, engine, columns, int_ratio, interval, packets):
+    """用 SenderEngine.run 发送一个用例的数据，返回结果字典"""
+    if interval > 0:
+        packets = min(packets, max(int(MAX_CASE_SECONDS / interval), 1))
+    frame, int_columns = make_frame(columns, int_ratio, packets)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = os.path.join(temp_dir, 'benchmark.csv')
+        frame.to_csv(csv_path, index=False)
+        config = SenderConfig(file_path=csv_path, data_start_row=1, target_port=receiver.port,
+                              send_interval=interval, send_mode='interval' if interval > 0 else 'asap',
+                              int_columns=tuple(int_columns))
+        sender = create_engine(engine, config)
+        received_before, bytes_before, _ = receiver.sample()
+        cpu_start = time.process_time()
+        result = sender.run()
+        cpu_seconds = time.process_time() - cpu_start
+        received_after, bytes_after, arrivals = receiver.sample()
+    if 'error' in result:
+        raise RuntimeError(f"发送失败: {result['error']}")
+
+    sent, elapsed = result['total_sent'], result['elapsed']
+    received = received_after - received_before
+    jitter = jitter_us(arrivals, interval)
+    # 引擎返回的调度延迟分位数单位为毫秒
+    lateness = ((result['lateness_p50'] * 1e3, result['lateness_p99'] * 1e3, result['lateness_max'] * 1e3)
+                if interval > 0 else (None, None, None))
+
+    return {
+        'engine': engine,
+        'columns': columns,
+        'int_ratio': int_ratio,
+        'interval': interval,
+        'packet_size': sender.codec.packet_size,
+        'packets': packets,
+        'sent': sent,
+        'received': received,
+        'lost': sent - received,
+        'elapsed': elapsed,
+        'packets_per_s': sent / elapsed if elapsed > 0 else 0.0,
+        'bytes_per_s': (bytes_after - bytes_before) / elapsed if elapsed > 0 else 0.0,
+        'cpu_us_per_packet': cpu_seconds / packets * 1e6,
+        'encode_seconds': sender.counters.encode_seconds,
+        'jitter_p50_us': jitter[0],
+        'jitter_p99_us': jitter[1],
+        'jitter_max_us': jitter[2],
+        'lateness_p50_us': lateness[0],
+        'lateness_p99_us': lateness[1],
+        'lateness_max_us': lateness[2],
+    }
+
+
+def build_matrix(engines=ENGINES, column_counts=COLUMN_COUNTS, int_ratios=INT_RATIOS, intervals=INTERVALS):
+    """生成用例列表；batched 只用于尽快发送模式"""
+    return [{'engine': engine, 'columns': columns, 'int_ratio': int_ratio, 'interval': interval}
+            for interval in intervals
+            for columns in column_counts
+            for int_ratio in int_ratios
+            for engine in engines
+            if engine != 'batched' or interval == 0]
+
+
+def case_key(result):
+    return (result['engine'], result['columns'], result['int_ratio'], result['interval'])
+
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE, jitter_floor_us=JITTER_FLOOR_US):
+    """
+    与基准结果对比，返回性能下降的用例 [(用例, 指标, 基准值, 当前值), ...]
+
+    所有用例对比速率（packets_per_s 下降超过 tolerance；固定间隔的用例速率受间隔
+    限制，下降说明跟不上间隔）；固定间隔的用例另外对比抖动p99（jitter_p99_us
+    增加超过 tolerance 且超过 jitter_floor_us 微秒）。
+    """
+    previous = {case_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(case_key(result))
+        if old is None:
+            continue
+        if result['packets_per_s'] < old['packets_per_s'] * (1 - tolerance):
+            regressions.append((case_key(result), 'packets_per_s', old['packets_per_s'], result['packets_per_s']))
+        if result['interval'] > 0 and old.get('jitter_p99_us') is not None:
+            new_jitter, old_jitter = result['jitter_p99_us'], old['jitter_p99_us']
+            if new_jitter > old_jitter * (1 + tolerance) and new_jitter - old_jitter > jitter_floor_us:
+                regressions.append((case_key(result), 'jitter_p99_us', old_jitter, new_jitter))
+    return regressions
+
+
+def environment():
+    """记录运行环境，结果只在相同环境之间可比"""
+    return {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': multiprocessing.cpu_count(),
+        'sendmmsg': sendmmsg_available(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="UDP Data Sender 回环性能基准测试")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f"结果文件(JSON)，默认 {DEFAULT_OUTPUT}")
+    parser.add_argument('--quick', action='store_true', help="只运行小矩阵")
+    parser.add_argument('--packets', type=int, help="每个用例的数据包数量")
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES), help="要测试的发送路径")
+    parser.add_argument('--columns', nargs='+', type=int, help="要测试的数据列数量")
+    parser.add_argument('--baseline', help="用于对比的旧结果文件")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"允许的速率下降/抖动增加比例，默认 {DEFAULT_TOLERANCE}")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.quick:
+        matrix = build_matrix(args.engines, args.columns or QUICK_COLUMN_COUNTS, QUICK_INT_RATIOS, QUICK_INTERVALS)
+        packets = args.packets or QUICK_PACKETS
+    else:
+        matrix = build_matrix(args.engines, args.columns or COLUMN_COUNTS)
+        packets = args.packets or DEFAULT_PACKETS
+
+    results = []
+    with LoopbackReceiver() as receiver:
+        for i, case in enumerate(matrix, 1):
+            result = run_case(receiver, packets=packets, **case)
+            results.append(result)
+            late = result['lateness_p99_us']
+            late = f"{late:8.2f} 微秒" if late is not None else "   - (尽快发送)"
+            print(f"[{i}/{len(matrix)}] {case['engine']:<11} 列 {case['columns']:>3} "
+                  f"整数比例 {case['int_ratio']:.1f} 间隔 {case['interval']:.4f}s: "
+                  f"{result['packets_per_s']:>10,.0f} 包/秒, {result['bytes_per_s'] / 1e6:7.1f} MB/秒, "
+                  f"CPU {result['cpu_us_per_packet']:6.2f} 微秒/包, 抖动p99 {result['jitter_p99_us']:8.1f} 微秒, "
+                  f"延迟p99 {late}, 丢包 {result['lost']}", flush=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare_results(results, baseline, args.tolerance)
+        for (engine, columns, int_ratio, interval), metric, old, new in regressions:
+            print(f"性能下降: {engine} 列 {columns} 整数比例 {int_ratio} 间隔 {interval}s {metric}: "
+                  f"{old:,.1f} -> {new:,.1f}")
+        if regressions:
+            return 1
+        print("与基准结果相比没有明显的性能下降")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,12 +1,31 @@
 """
 打包脚本 - 将GUI程序打包成可执行文件
 使用PyInstaller将Python程序打包成exe文件，无需安装Python环境即可运行
+
+    python build.py                       # 单个exe文件（每次启动都先解压到临时目录）
+    python build.py --onedir              # 目录形式（不需要解压，启动最快）
+    python build.py --onedir --measure    # 构建后测量窗口显示耗时
+    python build.py --measure-only        # 只测量已构建的程序
+    python build.py --measure-only --source   # 测量从源码运行的启动耗时
 """
 
+import argparse
+import json
 import os
+import statistics
 import sys
 import subprocess
-import shutil
+import tempfile
+import time
+
+# 可执行文件名称
+APP_NAME = "数据发送工具"
+
+# 程序用不到、但可能被依赖库的可选导入带进包里的模块
+EXCLUDED_MODULES = ["tqdm", "matplotlib", "scipy", "IPython", "notebook", "pytest", "tkinter.test"]
+
+# 启动耗时目标（秒）：从启动进程到窗口显示
+STARTUP_TARGET = 1.0
 
 def install_pyinstaller():
     """安装PyInstaller"""
@@ -19,23 +38,35 @@ def install_pyinstaller():
         print("PyInstaller安装失败！")
         return False
 
-def build_executable():
-    """构建可执行文件"""
+def executable_path(onedir=False):
+    """构建生成的可执行文件路径"""
+    name = APP_NAME + (".exe" if sys.platform == "win32" else "")
+    if onedir:
+        return os.path.join("dist", APP_NAME, name)
+    return os.path.join("dist", name)
+
+def build_executable(onedir=False):
+    """
+    构建可执行文件
+
+    onedir=False 时打包成单个exe，每次启动都要先把所有依赖解压到临时目录；
+    onedir=True 时生成一个目录，启动时直接加载，分发时需要复制整个目录。
+    """
     print("开始构建可执行文件...")
     
     # PyInstaller命令参数
     cmd = [
         "pyinstaller",
-        "--onefile",                    # 打包成单个exe文件
+        "--onedir" if onedir else "--onefile",  # 目录形式 / 单个exe文件
         "--windowed",                   # 不显示控制台窗口
-        "--name=数据发送工具",           # 可执行文件名称
+        f"--name={APP_NAME}",           # 可执行文件名称
         "--icon=icon.ico",              # 图标文件（如果存在）
         "--add-data=*.xlsx;.",          # 包含Excel文件
-        "--hidden-import=pandas",       # 确保pandas被包含
+        "--hidden-import=pandas",       # 确保pandas被包含（界面在选择文件后才导入）
         "--hidden-import=openpyxl",     # 确保openpyxl被包含
-        "--hidden-import=tqdm",         # 确保tqdm被包含
-        "udp_data_sender.py"            # 主程序文件
     ]
+    cmd += [f"--exclude-module={module}" for module in EXCLUDED_MODULES]
+    cmd.append("udp_data_sender.py")    # 主程序文件
     
     # 如果没有图标文件，移除图标参数
     if not os.path.exists("icon.ico"):
@@ -44,18 +75,65 @@ def build_executable():
     try:
         subprocess.check_call(cmd)
         print("可执行文件构建成功！")
-        print("生成的文件位置: dist/数据发送工具.exe")
+        print(f"生成的文件位置: {executable_path(onedir)}")
         return True
     except subprocess.CalledProcessError as e:
         print(f"构建失败: {e}")
         return False
 
+def measure_startup(command, runs=5, timeout=60.0):
+    """
+    测量启动耗时：启动 command（附加 --startup-report 参数）直到程序写出启动报告
+
+    返回字典：wall 为每次从启动进程到窗口显示的耗时（秒），window 为程序内部
+    从导入主模块到窗口显示的耗时，loaded_modules 为窗口显示时已加载的重量级依赖。
+    """
+    wall, window, loaded_modules = [], [], set()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for run in range(runs):
+            report_file = os.path.join(tmpdir, f"startup_{run}.json")
+            start = time.perf_counter()
+            process = subprocess.Popen(command + ["--startup-report", report_file])
+            # 报告在窗口显示后写出，轮询它出现的时刻（单文件exe退出时还要清理临时目录，不计入）
+            report = None
+            while report is None:
+                if time.perf_counter() - start > timeout:
+                    process.kill()
+                    raise RuntimeError(f"等待启动报告超时: {' '.join(command)}")
+                try:
+                    with open(report_file, 'r', encoding='utf-8') as f:
+                        report = json.load(f)
+                except (OSError, ValueError):
+                    if process.poll() not in (None, 0):
+                        raise RuntimeError(f"程序异常退出(退出码 {process.returncode}): {' '.join(command)}")
+                    time.sleep(0.005)
+            wall.append(time.perf_counter() - start)
+            window.append(report['window_seconds'])
+            loaded_modules.update(report['loaded_modules'])
+            process.wait(timeout)
+    return {'wall': wall, 'window': window, 'loaded_modules': sorted(loaded_modules)}
+
+def print_startup_report(result):
+    """输出启动耗时报告，达到 STARTUP_TARGET 时返回 True"""
+    median = statistics.median(result['wall'])
+    print(f"启动耗时({len(result['wall'])} 次): 中位数 {median:.3f} 秒, "
+          f"最短 {min(result['wall']):.3f} 秒, 最长 {max(result['wall']):.3f} 秒")
+    print(f"其中导入主模块到窗口显示: 中位数 {statistics.median(result['window']):.3f} 秒")
+    print("窗口显示时已加载: " + (", ".join(result['loaded_modules']) or "无重量级依赖"))
+    if median < STARTUP_TARGET:
+        print(f"达到启动目标（< {STARTUP_TARGET} 秒）")
+        return True
+    print(f"未达到启动目标（< {STARTUP_TARGET} 秒）")
+    return False
+
 def create_requirements():
     """创建requirements.txt文件"""
     requirements = [
         "pandas>=1.3.0",
+        "numpy>=1.20.0",
         "openpyxl>=3.0.0",
-        "tqdm>=4.60.0"
+        "# 可选: 读取Parquet/Feather文件并加速CSV读取",
+        "# pyarrow>=7.0.0"
     ]
     
     with open("requirements.txt", "w", encoding="utf-8") as f:
@@ -145,8 +223,36 @@ def create_readme():
     
     print("已创建使用说明.txt文件")
 
-def main():
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="数据发送工具 - 打包脚本")
+    parser.add_argument('--onedir', action='store_true',
+                        help="打包成目录而不是单个exe（启动时不需要解压，窗口显示更快）")
+    parser.add_argument('--measure', action='store_true', help="构建后测量启动耗时")
+    parser.add_argument('--measure-only', action='store_true', help="不构建，只测量已构建程序的启动耗时")
+    parser.add_argument('--source', action='store_true', help="与 --measure-only 一起使用：测量从源码运行的启动耗时")
+    parser.add_argument('--runs', type=int, default=5, help="测量启动的次数，默认5")
+    return parser.parse_args(argv)
+
+def run_measurement(args):
+    """按命令行参数测量启动耗时，返回退出码"""
+    if args.source:
+        command = [sys.executable, "udp_data_sender.py"]
+    else:
+        command = [executable_path(args.onedir)]
+        if not os.path.exists(command[0]):
+            print(f"错误: 找不到 {command[0]}，请先构建")
+            return 1
+    print(f"测量启动耗时: {' '.join(command)}")
+    try:
+        return 0 if print_startup_report(measure_startup(command, args.runs)) else 1
+    except RuntimeError as e:
+        print(f"测量失败: {e}")
+        return 1
+
+def main(argv=None):
     """主函数"""
+    args = parse_args(argv)
     print("=" * 50)
     print("数据发送工具 - 打包脚本")
     print("=" * 50)
@@ -154,7 +260,10 @@ def main():
     # 检查必要文件
     if not os.path.exists("udp_data_sender.py"):
         print("错误: 找不到udp_data_sender.py文件！")
-        return
+        return 1
+    
+    if args.measure_only:
+        return run_measurement(args)
     
     # 创建说明文档
     create_requirements()
@@ -162,23 +271,31 @@ def main():
     
     # 安装PyInstaller
     if not install_pyinstaller():
-        return
+        return 1
     
     # 构建可执行文件
-    if build_executable():
+    if build_executable(args.onedir):
         print("\n" + "=" * 50)
         print("打包完成！")
         print("=" * 50)
         print("生成的文件:")
-        print("- dist/数据发送工具.exe (主程序)")
+        print(f"- {executable_path(args.onedir)} (主程序)")
         print("- 使用说明.txt (使用说明)")
         print("- requirements.txt (依赖列表)")
         print("\n使用说明:")
-        print("1. 将dist/数据发送工具.exe复制到目标电脑")
+        if args.onedir:
+            print(f"1. 将整个 dist/{APP_NAME} 目录复制到目标电脑")
+        else:
+            print(f"1. 将{executable_path()}复制到目标电脑")
         print("2. 双击运行即可，无需安装Python环境")
         print("3. 参考使用说明.txt了解详细使用方法")
     else:
         print("打包失败，请检查错误信息")
+        return 1
+    
+    if args.measure:
+        return run_measurement(args)
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,14 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import socket
-import struct
 import time
-import threading
 import os
-import pandas as pd
-from tqdm import tqdm
 import queue
 import json
+from collections import deque
+
+# 日志框最多保留的行数，更早的日志从界面上移除
+MAX_LOG_LINES = 1000
 
 class MessageSenderGUI:
     def __init__(self, root):
@@ -31,10 +30,7 @@ class MessageSenderGUI:
         # 控制变量
         self.is_running = False
         self.is_paused = False
-        self.pause_flag = threading.Event()
-        self.pause_flag.clear()
-        self.stop_flag = threading.Event()
-        self.stop_flag.clear()
+        self.engine = None
         
         # 消息队列用于线程间通信
         self.message_queue = queue.Queue()
@@ -53,6 +49,10 @@ class MessageSenderGUI:
             'Gear_Status_Int'
         ]
         
+        # 待写入日志框的消息（每次刷新界面时批量写入）
+        self.pending_logs = deque(maxlen=MAX_LOG_LINES)
+        self.dropped_logs = 0
+        
         self.setup_ui()
         self.check_queue()
         
@@ -198,12 +198,28 @@ class MessageSenderGUI:
             return False
     
     def log_message(self, message):
-        """添加日志消息"""
+        """添加日志消息（先缓存，由 flush_logs 批量写入界面）"""
         timestamp = time.strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
-        self.log_text.insert(tk.END, log_entry)
+        if len(self.pending_logs) == self.pending_logs.maxlen:
+            self.dropped_logs += 1
+        self.pending_logs.append(f"[{timestamp}] {message}\n")
+    
+    def flush_logs(self):
+        """将缓存的日志一次性写入日志框，并只保留最近 MAX_LOG_LINES 行"""
+        if not self.pending_logs:
+            return
+        text = "".join(self.pending_logs)
+        if self.dropped_logs:
+            text = f"... 省略 {self.dropped_logs} 条日志 ...\n" + text
+        self.pending_logs.clear()
+        self.dropped_logs = 0
+        
+        self.log_text.insert(tk.END, text)
+        # 每条日志以换行结尾，最后一个换行之后的空行不计入行数
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - MAX_LOG_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
     
     def check_queue(self):
         """检查消息队列并更新UI"""
@@ -212,44 +228,27 @@ class MessageSenderGUI:
                 message = self.message_queue.get_nowait()
                 if message['type'] == 'log':
                     self.log_message(message['content'])
-                elif message['type'] == 'progress':
-                    self.progress_var.set(message['value'])
                 elif message['type'] == 'status':
                     self.status_label.config(text=message['content'])
-                elif message['type'] == 'stats':
-                    self.stats_label.config(text=message['content'])
                 elif message['type'] == 'complete':
                     self.on_sending_complete(message['data'])
         except queue.Empty:
             pass
+        self.flush_logs()
+        if self.is_running:
+            self.update_progress()
         self.root.after(100, self.check_queue)
     
-    def pack_row(self, row, columns):
-        """打包行数据为二进制格式"""
-        binary_data = self.prefix
-        try:
-            h, m, s, us = map(int, str(row[0]).split(':'))
-            total_seconds = h * 3600 + m * 60 + s
-            binary_data += struct.pack('>i', total_seconds)
-            binary_data += struct.pack('>i', us)
-        except Exception as e:
-            self.message_queue.put({'type': 'log', 'content': f"[行: {row.name}] 解析时间戳 {row[0]} 时出错: {e}"})
-            binary_data += struct.pack('>i', 0) * 2
-
-        for i, value in enumerate(row[1:]):
-            col = columns[i+1]
-            try:
-                if col in self.int_columns:
-                    binary_data += struct.pack('>i', int(float(value)))
-                else:
-                    binary_data += struct.pack('>d', float(value))
-            except Exception as e:
-                self.message_queue.put({'type': 'log', 'content': f"[行: {row.name}] 处理值 {value} (列: {col}) 时出错: {e}"})
-                binary_data += struct.pack('>i', 0) if col in self.int_columns else struct.pack('>d', 0.0)
-        return binary_data + self.suffix
+    def update_progress(self):
+        """采样发送计数器并更新进度显示"""
+        from metrics import format_stats
+        stats = self.engine.sample()
+        self.progress_var.set(stats['progress'])
+        self.stats_label.config(text=format_stats(stats))
     
     def start_sending(self):
         """开始发送数据"""
+        from sender_engine import SenderConfig, SenderEngine
         if not self.file_path.get():
             messagebox.showerror("错误", "请先选择Excel文件")
             return
@@ -259,23 +258,13 @@ class MessageSenderGUI:
             return
         
         try:
-            target_port = int(self.target_port.get())
-            send_interval = float(self.send_interval.get())
-            data_start_row = int(self.data_start_row.get())
-            if data_start_row < 1:
-                raise ValueError("数据起始行必须大于0")
+            config = SenderConfig.from_dict(self.get_config())
         except ValueError as e:
             messagebox.showerror("错误", f"参数错误: {e}")
             return
         
-        # 解析配置
-        if not self.parse_config():
-            return
-        
         self.is_running = True
         self.is_paused = False
-        self.pause_flag.clear()
-        self.stop_flag.clear()
         
         # 更新按钮状态
         self.start_button.config(state=tk.DISABLED)
@@ -283,17 +272,17 @@ class MessageSenderGUI:
         self.stop_button.config(state=tk.NORMAL)
         
         # 启动发送线程
-        self.send_thread = threading.Thread(target=self.send_data_thread, daemon=True)
-        self.send_thread.start()
+        self.engine = SenderEngine(config, self.message_queue.put)
+        self.engine.start()
         
         self.log_message("开始发送数据...")
         self.log_message(f"前缀: {self.prefix_hex.get()}")
         self.log_message(f"后缀: {self.suffix_hex.get()}")
-        self.log_message(f"整数列: {len(self.int_columns)} 个")
+        self.log_message(f"整数列: {len(config.int_columns)} 个")
     
-    def save_config(self):
-        """保存当前配置到文件"""
-        config = {
+    def get_config(self):
+        """收集界面上的配置（与配置文件格式相同）"""
+        return {
             'file_path': self.file_path.get(),
             'sheet_name': self.sheet_name.get(),
             'data_start_row': self.data_start_row.get(),
@@ -304,6 +293,10 @@ class MessageSenderGUI:
             'suffix_hex': self.suffix_hex.get(),
             'int_columns': self.int_columns_widget.get("1.0", tk.END).strip()
         }
+    
+    def save_config(self):
+        """保存当前配置到文件"""
+        config = self.get_config()
         
         filename = filedialog.asksaveasfilename(
             title="保存配置",
@@ -353,14 +346,14 @@ class MessageSenderGUI:
     
     def generate_parser(self):
         """生成数据包解析脚本"""
+        from sheet_reader import read_header
         if not self.file_path.get():
             messagebox.showerror("错误", "请先选择Excel文件以获取列信息")
             return
         
         try:
-            # 读取Excel文件获取列信息
-            df = pd.read_excel(self.file_path.get(), sheet_name=self.sheet_name.get())
-            columns = df.columns.tolist()
+            # 只读取表头获取列信息
+            columns = read_header(self.file_path.get(), self.sheet_name.get())
             
             # 解析当前配置
             if not self.parse_config():
@@ -396,7 +389,6 @@ class MessageSenderGUI:
         prefix_bytes = len(prefix_hex) // 2
         suffix_bytes = len(suffix_hex) // 2
         timestamp_bytes = 8  # 4字节秒数 + 4字节微秒
-        data_columns = len(columns) - 1  # 减去时间戳列
         
         # 计算每列的数据类型和字节数
         column_info = []
@@ -447,8 +439,8 @@ timestamp_end = PREFIX_BYTES + TIMESTAMP_BYTES;
 timestamp_bytes = packet_data(timestamp_start:timestamp_end);
 
 % 转换时间戳（大端序）
-seconds = typecast(timestamp_bytes(1:4), 'uint32');
-microseconds = typecast(timestamp_bytes(5:8), 'uint32');
+seconds = double(from_big_endian(timestamp_bytes(1:4), 'int32'));
+microseconds = double(from_big_endian(timestamp_bytes(5:8), 'int32'));
 
 % 转换为时分秒格式
 hours = floor(seconds / 3600);
@@ -470,7 +462,7 @@ byte_offset = 0;
 % 解析列{i}: {col} (int32)
 col_start = data_start + byte_offset;
 col_end = col_start + 3;
-data({i}) = typecast(packet_data(col_start:col_end), 'int32');
+data({i}) = from_big_endian(packet_data(col_start:col_end), 'int32');
 byte_offset = byte_offset + 4;
 """
             else:
@@ -478,7 +470,7 @@ byte_offset = byte_offset + 4;
 % 解析列{i}: {col} (double)
 col_start = data_start + byte_offset;
 col_end = col_start + 7;
-data({i}) = typecast(packet_data(col_start:col_end), 'double');
+data({i}) = from_big_endian(packet_data(col_start:col_end), 'double');
 byte_offset = byte_offset + 8;
 """
         
@@ -502,6 +494,15 @@ fprintf('\\n');
 
 end
 
+function value = from_big_endian(bytes, type)
+% 将大端字节序的字节转换为本机字节序的数值
+value = typecast(uint8(bytes(:))', type);
+[~, ~, endian] = computer;
+if endian == 'L'
+    value = swapbytes(value);
+end
+end
+
 % 使用示例:
 % [timestamp, data] = parse_udp_packet(received_packet);
 % 
@@ -516,25 +517,28 @@ end
     
     def pause_sending(self):
         """暂停/继续发送"""
+        if self.engine is None:
+            return
         if self.is_paused:
-            self.pause_flag.clear()
+            self.engine.resume()
             self.is_paused = False
             self.pause_button.config(text="暂停")
             self.log_message("已继续发送")
         else:
-            self.pause_flag.set()
+            self.engine.pause()
             self.is_paused = True
             self.pause_button.config(text="继续")
             self.log_message("已暂停发送")
     
     def stop_sending(self):
         """停止发送"""
-        self.stop_flag.set()
-        self.pause_flag.set()  # 确保暂停
+        if self.engine is not None:
+            self.engine.stop()
         self.log_message("正在停止发送...")
     
     def on_sending_complete(self, data):
         """发送完成后的处理"""
+        self.update_progress()
         self.is_running = False
         self.is_paused = False
         
@@ -551,80 +555,6 @@ end
         self.log_message(f"总耗时: {data['elapsed']:.2f} 秒")
         if data['total_sent'] > 0:
             self.log_message(f"平均发送间隔: {data['elapsed']/data['total_sent']:.4f} 秒/条")
-    
-    def send_data_thread(self):
-        """发送数据的工作线程"""
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        try:
-            # 读取Excel文件
-            self.message_queue.put({'type': 'status', 'content': '正在读取文件...'})
-            df = pd.read_excel(self.file_path.get(), sheet_name=self.sheet_name.get())
-            self.message_queue.put({'type': 'log', 'content': f"成功读取文件，共 {len(df)} 行数据"})
-            
-            columns = df.columns.tolist()
-            data_start_row = int(self.data_start_row.get())
-            data_rows = df.iloc[data_start_row-1:]  # 转换为0基索引
-            total_records = len(data_rows)
-            self.message_queue.put({'type': 'log', 'content': f"开始发送数据，总共 {total_records} 条记录..."})
-            
-            sent_idx_set = set()
-            last_binary_data = None
-            last_idx = None
-            total_sent = skipped = 0
-            start_time = time.time()
-            
-            data_iter = data_rows.iterrows()
-            
-            while len(sent_idx_set) < total_records and not self.stop_flag.is_set():
-                if not self.pause_flag.is_set():
-                    try:
-                        idx, row = next(data_iter)
-                    except StopIteration:
-                        break
-                    binary_data = self.pack_row(row, columns)
-                    last_binary_data = binary_data
-                    last_idx = idx
-                    sent_idx_set.add(idx)
-                else:
-                    if last_binary_data is not None and last_idx is not None:
-                        binary_data = last_binary_data
-                        idx = last_idx
-                    else:
-                        time.sleep(float(self.send_interval.get()))
-                        continue
-
-                try:
-                    sock.sendto(binary_data, (self.target_ip.get(), int(self.target_port.get())))
-                    if not self.pause_flag.is_set():
-                        total_sent += 1
-                        progress = (len(sent_idx_set) / total_records) * 100
-                        self.message_queue.put({'type': 'progress', 'value': progress})
-                        self.message_queue.put({'type': 'stats', 'content': f"已发送: {total_sent}/{total_records}"})
-                except Exception as e:
-                    skipped += 1
-                    self.message_queue.put({'type': 'log', 'content': f"发送错误: {e}"})
-                
-                time.sleep(float(self.send_interval.get()))
-
-            elapsed = time.time() - start_time
-            
-            # 发送完成消息
-            self.message_queue.put({
-                'type': 'complete',
-                'data': {
-                    'total_sent': total_sent,
-                    'skipped': skipped,
-                    'total_records': total_records,
-                    'elapsed': elapsed
-                }
-            })
-            
-        except Exception as e:
-            self.message_queue.put({'type': 'log', 'content': f"发生错误: {e}"})
-            self.message_queue.put({'type': 'complete', 'data': {'total_sent': 0, 'skipped': 0, 'total_records': 0, 'elapsed': 0}})
-        finally:
-            sock.close()
-            self.message_queue.put({'type': 'log', 'content': "Socket连接已关闭"})
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,323 @@
+"""
+MATLAB脚本生成模块
+
+根据数据包格式（PacketCodec）生成MATLAB批量解析函数：输入 N×数据包大小 的
+uint8 矩阵，每一列数据用一次 reshape/typecast/swapbytes 整体转换，结果写入
+预先分配的矩阵，不逐包循环，也不打印。字段偏移（含对齐填充）和字节序取自
+编码器，主机字节序与数据包不同时自动交换字节序。数据包带有序号头部时，额外输出序号和发送时间，接收脚本据此
+统计丢包和乱序。
+"""
+
+import os
+import time
+
+# 解析脚本类型: 配置值 -> 界面显示名称
+PARSER_TYPES = {
+    'single': '单包解析',
+    'batch': '批量解析',
+    'receiver': '接收脚本',
+}
+
+# numpy 字段类型 -> MATLAB类型
+MATLAB_TYPES = {
+    'i1': 'int8', 'u1': 'uint8', 'i2': 'int16', 'u2': 'uint16',
+    'i4': 'int32', 'u4': 'uint32', 'i8': 'int64', 'u8': 'uint64',
+    'f4': 'single', 'f8': 'double',
+}
+
+# 无法从发送间隔推算速率时，接收脚本环形缓冲区按该速率（包/秒）分配
+DEFAULT_EXPECTED_RATE = 1000.0
+
+
+def expected_rate(config):
+    """根据发送配置估算接收端的数据包速率（包/秒）"""
+    if config.send_mode == 'interval' and config.send_interval > 0:
+        return 1.0 / config.send_interval
+    return DEFAULT_EXPECTED_RATE
+
+
+def matlab_bytes(data):
+    """字节串 -> MATLAB uint8 行向量字面量"""
+    return f"uint8([{' '.join(str(b) for b in data)}])"
+
+
+def column_layout(codec):
+    """
+    数据包中各字段的布局 [(名称, 起始字节(从1开始), MATLAB类型), ...]
+
+    带序号头部时前两项为 sequence 和 send_time；随后是时间戳的秒和微秒，
+    其余依次为各数据列。
+    """
+    layout = []
+    header = ['sequence', 'send_time'] if codec.sequence_header else []
+    names = header + ['seconds', 'microseconds'] + list(codec.data_columns)
+    for name, field in zip(names, codec.dtype.names):
+        dtype, offset = codec.dtype.fields[field][:2]
+        layout.append((name, offset + 1, MATLAB_TYPES[dtype.str[1:]]))
+    return layout
+
+
+def need_swap_expression(codec):
+    """判断主机字节序与数据包字节序不同的MATLAB表达式（endian 为 computer 的第3个输出）"""
+    return "endian == 'L'" if codec.byte_order == 'big' else "endian == 'B'"
+
+
+def fixed_point_suffix(column_type):
+    """定点数列还原为物理值的MATLAB表达式后缀（" * 比例 + 偏移"），其他列为空"""
+    if not column_type.is_fixed:
+        return ""
+    suffix = f" * {column_type.scale!r}"
+    if column_type.offset > 0:
+        suffix += f" + {column_type.offset!r}"
+    elif column_type.offset < 0:
+        suffix += f" - {-column_type.offset!r}"
+    return suffix
+
+
+def function_name_for(file_path, default):
+    """MATLAB函数名必须与文件名一致；文件名不是合法标识符时使用默认名称"""
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return name if name.isidentifier() and name.isascii() else default
+
+
+def generate_batch_parser(codec, function_name='parse_udp_batch'):
+    """生成MATLAB批量解析函数的源代码"""
+    layout = column_layout(codec)
+    if codec.sequence_header:
+        (sequence, send_time), layout = layout[:2], layout[2:]
+    seconds, microseconds = layout[0], layout[1]
+    data_layout = layout[2:]
+
+    column_info = "\n".join(f"%   {i:>3}  {name} ({column_type}, 第{offset}字节起)"
+                            for i, ((name, offset, _), column_type) in enumerate(zip(data_layout, codec.types), 1))
+    column_names = ", ".join("'" + str(name).replace("'", "''") + "'" for name, _, _ in data_layout)
+    decode_lines = "\n".join(
+        f"data(:, {i}) = decode_column(packets, {offset}, '{dtype}', need_swap){fixed_point_suffix(column_type)};"
+        for i, ((_, offset, dtype), column_type) in enumerate(zip(data_layout, codec.types), 1))
+
+    outputs, header_info, header_lines = "timestamp, data, valid, names", "", ""
+    if codec.sequence_header:
+        outputs += ", sequence, send_time"
+        header_info = """
+%       sequence  - N×1 uint64 发送序号（丢包/乱序统计）
+%       send_time - N×1 int64 发送时间（Unix纪元起的纳秒）"""
+        header_lines = f"""
+% 序号和发送时间（保留原始整数类型，不损失精度）
+sequence = decode_field(packets, {sequence[1]}, 'uint64', need_swap);
+send_time = decode_field(packets, {send_time[1]}, 'int64', need_swap);
+"""
+
+    return f"""function [{outputs}] = {function_name}(packets)
+% UDP数据包批量解析函数
+% 自动生成于: {time.strftime('%Y-%m-%d %H:%M:%S')}
+%
+% 输入: packets   - N×{codec.packet_size} 的 uint8 矩阵，每行一个数据包
+% 输出: timestamp - N×1 时间戳（秒，含微秒）
+%       data      - N×{len(data_layout)} double 矩阵，每列对应一个数据列
+%       valid     - N×1 逻辑向量，前缀和后缀都正确的数据包为 true
+%       names     - 数据列名（与 data 的列一一对应）{header_info}
+%
+% 数据列:
+{column_info}
+
+PACKET_SIZE = {codec.packet_size};
+names = {{{column_names}}};
+PREFIX = {matlab_bytes(codec.prefix)};
+SUFFIX = {matlab_bytes(codec.suffix)};
+SUFFIX_START = {codec.suffix_offset + 1};
+
+if size(packets, 2) ~= PACKET_SIZE
+    error('数据包大小不匹配: 期望 %d 字节, 实际 %d 字节', PACKET_SIZE, size(packets, 2));
+end
+packets = uint8(packets);
+n = size(packets, 1);
+
+% 数据包为{'大端' if codec.byte_order == 'big' else '小端'}字节序，与主机字节序不同时需要交换
+[~, ~, endian] = computer;
+need_swap = {need_swap_expression(codec)};
+
+% 校验前缀和后缀
+valid = true(n, 1);
+if ~isempty(PREFIX)
+    valid = valid & all(bsxfun(@eq, packets(:, 1:numel(PREFIX)), PREFIX), 2);
+end
+if ~isempty(SUFFIX)
+    valid = valid & all(bsxfun(@eq, packets(:, SUFFIX_START:SUFFIX_START + numel(SUFFIX) - 1), SUFFIX), 2);
+end
+{header_lines}
+% 时间戳
+secs = decode_column(packets, {seconds[1]}, 'int32', need_swap);
+usecs = decode_column(packets, {microseconds[1]}, 'int32', need_swap);
+timestamp = secs + usecs * 1e-6;
+
+% 数据列
+data = zeros(n, {len(data_layout)});
+{decode_lines}
+
+end
+
+function values = decode_column(packets, offset, type, need_swap)
+% 取出每个数据包从 offset 起的一个字段，整体转换为 double 列向量
+values = double(decode_field(packets, offset, type, need_swap));
+end
+
+function values = decode_field(packets, offset, type, need_swap)
+% 取出每个数据包从 offset 起的一个字段，保留原始类型
+switch type
+    case {{'int8', 'uint8'}}
+        width = 1;
+    case {{'int16', 'uint16'}}
+        width = 2;
+    case {{'int32', 'uint32', 'single'}}
+        width = 4;
+    otherwise
+        width = 8;
+end
+bytes = packets(:, offset:offset + width - 1).';
+values = typecast(bytes(:), type);
+if need_swap
+    values = swapbytes(values);
+end
+end
+"""
+
+
+def generate_receiver_script(codec, local_port, parser_name='parse_udp_batch', expected_rate=1000.0,
+                             buffer_seconds=60, multicast_group=''):
+    """
+    生成基于 udpport 的MATLAB接收脚本的源代码
+
+    每次批量读取所有已到达的数据报，调用 parser_name 批量解析，结果写入按
+    expected_rate × buffer_seconds 预先分配的环形缓冲区，接收过程中不增长数组。
+    数据包带有序号头部时同时统计丢包、乱序和单向延迟。
+    """
+    data_columns = len(codec.data_columns)
+    capacity = max(int(round(float(expected_rate) * buffer_seconds)), 1)
+    multicast = f'configureMulticast(u, "{multicast_group}");\n' if multicast_group else ''
+
+    if codec.sequence_header:
+        parse_call = f"[timestamp, data, valid, column_names, sequence, send_time] = {parser_name}(packets);"
+        sequence_init = """first_sequence = [];  % 收到的最小/最大序号，用于统计丢包
+last_sequence = [];
+max_sequence = 0;
+reordered = 0;        % 序号小于前一个数据包的次数
+latency_ms = NaN;     % 最近一批数据包的平均单向延迟（毫秒，需收发两端时钟同步）
+"""
+        sequence_update = """
+    % 丢包与乱序统计（序号在 2^53 以内时 double 可以精确表示）
+    sequence = double(sequence(valid));
+    if ~isempty(sequence)
+        if isempty(first_sequence)
+            first_sequence = sequence(1);
+            last_sequence = sequence(1);
+        end
+        reordered = reordered + sum(diff([last_sequence; sequence]) < 0);
+        last_sequence = sequence(end);
+        first_sequence = min(first_sequence, min(sequence));
+        max_sequence = max(max_sequence, max(sequence));
+        now_ns = posixtime(datetime('now', 'TimeZone', 'UTC')) * 1e9;
+        latency_ms = mean(now_ns - double(send_time(valid))) / 1e6;
+    end
+"""
+        report = """        lost = 0;
+        if ~isempty(first_sequence)
+            lost = max_sequence - first_sequence + 1 - received;
+        end
+        fprintf('已接收 %d 个数据包, 速率 %.0f 包/秒, 无效 %d, 长度不符 %d, 丢包 %d, 乱序 %d, 延迟 %.3f 毫秒\\n', ...
+                received, (received - last_received) / (elapsed - last_report), invalid, bad_size, ...
+                lost, reordered, latency_ms);"""
+    else:
+        parse_call = f"[timestamp, data, valid, column_names] = {parser_name}(packets);"
+        sequence_init = sequence_update = ""
+        report = """        fprintf('已接收 %d 个数据包, 速率 %.0f 包/秒, 无效 %d, 长度不符 %d\\n', received, ...
+                (received - last_received) / (elapsed - last_report), invalid, bad_size);"""
+
+    return f"""% UDP高速接收脚本
+% 自动生成于: {time.strftime('%Y-%m-%d %H:%M:%S')}
+%
+% 依赖: {parser_name}.m（同目录下的批量解析函数）, MATLAB R2020b 及以上（udpport）
+%
+% 每次读取所有已到达的数据报并批量解析，结果写入预先分配的环形缓冲区；
+% 缓冲区保留最近 BUFFER_CAPACITY 个数据包，接收过程中不增长数组。
+% 到达 RUN_SECONDS 后，按时间顺序的数据位于 recent_timestamps / recent_data 中，
+% 列名位于 column_names。用 Ctrl+C 中断后需执行 clear cleanup 释放端口。
+
+LOCAL_PORT = {int(local_port)};
+PACKET_SIZE = {codec.packet_size};
+NUM_COLUMNS = {data_columns};
+BUFFER_CAPACITY = {capacity};   % 约 {buffer_seconds} 秒 × {float(expected_rate):g} 包/秒
+MAX_BLOCK = 4096;              % 每次最多读取的数据报数量
+RUN_SECONDS = inf;             % 接收时长（秒）
+REPORT_SECONDS = 1;            % 状态输出间隔（秒）
+
+% 预分配环形缓冲区
+ring_timestamps = zeros(BUFFER_CAPACITY, 1);
+ring_data = zeros(BUFFER_CAPACITY, NUM_COLUMNS);
+write_pos = 0;        % 最后写入的位置（0 表示尚未写入）
+received = 0;         % 解析成功的数据包总数
+invalid = 0;          % 前缀/后缀不匹配的数据包
+bad_size = 0;         % 长度不符的数据报
+column_names = {{}};
+{sequence_init}
+u = udpport("datagram", "IPV4", "LocalPort", LOCAL_PORT);
+{multicast}cleanup = onCleanup(@() delete(u));
+fprintf('正在端口 %d 上接收，数据包大小 %d 字节...\\n', LOCAL_PORT, PACKET_SIZE);
+
+start_time = tic;
+last_report = 0;
+last_received = 0;
+while toc(start_time) < RUN_SECONDS
+    n = u.NumDatagramsAvailable;
+    if n == 0
+        pause(0.001);
+        continue;
+    end
+
+    % 批量读取并拼接为 N×PACKET_SIZE 矩阵
+    datagrams = read(u, min(n, MAX_BLOCK), "uint8");
+    payloads = {{datagrams.Data}};
+    sized = cellfun(@numel, payloads) == PACKET_SIZE;
+    bad_size = bad_size + sum(~sized);
+    if ~any(sized)
+        continue;
+    end
+    packets = reshape([payloads{{sized}}], PACKET_SIZE, []).';
+
+    {parse_call}
+    invalid = invalid + sum(~valid);
+{sequence_update}    timestamp = timestamp(valid);
+    data = data(valid, :);
+
+    % 写入环形缓冲区（一次超过容量时只保留最新的数据）
+    k = numel(timestamp);
+    if k == 0
+        continue;
+    end
+    if k > BUFFER_CAPACITY
+        timestamp = timestamp(end - BUFFER_CAPACITY + 1:end);
+        data = data(end - BUFFER_CAPACITY + 1:end, :);
+    end
+    index = mod(write_pos + (0:numel(timestamp) - 1), BUFFER_CAPACITY) + 1;
+    ring_timestamps(index) = timestamp;
+    ring_data(index, :) = data;
+    write_pos = index(end);
+    received = received + k;
+
+    elapsed = toc(start_time);
+    if elapsed - last_report >= REPORT_SECONDS
+{report}
+        last_report = elapsed;
+        last_received = received;
+    end
+end
+
+% 按时间顺序取出缓冲区中的数据
+if received < BUFFER_CAPACITY
+    order = 1:received;
+else
+    order = [write_pos + 1:BUFFER_CAPACITY, 1:write_pos];
+end
+recent_timestamps = ring_timestamps(order);
+recent_data = ring_data(order, :);
+clear cleanup
+"""
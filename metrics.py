@@ -0,0 +1,187 @@
+"""
+发送指标模块
+
+MetricsMonitor 按固定间隔采样 SendCounters，得到该间隔内的发送
+速率、字节速率、调度延迟（实际发送时刻相对计划时刻）的 p50/p99/最大值、发送
+错误数和每包编码耗时，供界面/命令行显示，并可定期写入文件，用于在长时间
+测试中把接收端的异常与发送端的卡顿对应起来：
+    - .prom 文件：Prometheus 文本格式，每次整体替换（可由 node_exporter 的
+      textfile collector 读取）
+    - 其他文件：CSV，每个采样间隔追加一行
+"""
+
+import csv
+import os
+import threading
+import time
+
+import numpy as np
+
+# 默认采样间隔（秒）
+DEFAULT_METRICS_INTERVAL = 1.0
+
+# 每个采样间隔最多保留的调度延迟样本数
+LATENESS_WINDOW = 100000
+
+# CSV文件的列（与 SendCounters.sample() 的字段对应）
+CSV_FIELDS = ['time', 'sent', 'skipped', 'errors', 'bytes_sent', 'rate', 'bytes_rate',
+              'lateness_p50', 'lateness_p99', 'lateness_max', 'encode_us']
+
+# Prometheus 指标: (名称, 类型, 说明, 样本字段, 换算系数)
+PROMETHEUS_METRICS = [
+    ('udp_sender_packets_sent_total', 'counter', '已发送的数据包数量', 'sent', 1),
+    ('udp_sender_packets_skipped_total', 'counter', '因发送失败而跳过的数据包数量', 'skipped', 1),
+    ('udp_sender_send_errors_total', 'counter', '发送错误次数', 'errors', 1),
+    ('udp_sender_bytes_sent_total', 'counter', '已发送的字节数', 'bytes_sent', 1),
+    ('udp_sender_packets_per_second', 'gauge', '最近一个采样间隔的发送速率', 'rate', 1),
+    ('udp_sender_bytes_per_second', 'gauge', '最近一个采样间隔的字节速率', 'bytes_rate', 1),
+    ('udp_sender_lateness_max_seconds', 'gauge', '最近一个采样间隔的最大调度延迟', 'lateness_max', 1e-3),
+    ('udp_sender_encode_seconds_per_packet', 'gauge', '平均每个数据包的编码耗时', 'encode_us', 1e-6),
+    ('udp_sender_progress_ratio', 'gauge', '发送进度', 'progress', 1e-2),
+]
+
+
+def lateness_percentiles(samples):
+    """调度延迟样本（纳秒）-> (p50, p99, 最大值)，单位毫秒"""
+    if len(samples) == 0:
+        return 0.0, 0.0, 0.0
+    values = np.fromiter(samples, dtype=np.int64, count=len(samples))
+    p50, p99 = np.percentile(values, [50, 99])
+    return p50 / 1e6, p99 / 1e6, values.max() / 1e6
+
+
+def format_stats(stats, separator="    "):
+    """将采样结果格式化为一行状态文本"""
+    parts = [f"已发送: {stats['sent']}/{stats['total']}",
+             f"速率: {stats['rate']:.0f} 包/秒 ({stats['bytes_rate'] / 1e6:.2f} MB/秒)"]
+    if stats['lateness_max']:
+        parts.append(f"延迟 p50/p99/最大: {stats['lateness_p50']:.3f}/{stats['lateness_p99']:.3f}/"
+                     f"{stats['lateness_max']:.3f} 毫秒")
+    if stats['encode_us']:
+        parts.append(f"编码: {stats['encode_us']:.2f} 微秒/包")
+    if stats['errors']:
+        parts.append(f"错误: {stats['errors']}")
+    return separator.join(parts)
+
+
+class CsvMetricsWriter:
+    """每次采样追加一行CSV"""
+
+    def __init__(self, file_path):
+        new_file = not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+        self.file = open(file_path, 'a', encoding='utf-8', newline='')
+        self.writer = csv.DictWriter(self.file, CSV_FIELDS, extrasaction='ignore')
+        if new_file:
+            self.writer.writeheader()
+
+    def write(self, stats):
+        self.writer.writerow(dict(stats, time=time.strftime('%Y-%m-%d %H:%M:%S')))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class PrometheusMetricsWriter:
+    """每次采样整体替换 Prometheus 文本格式文件（先写临时文件再替换，读取方不会读到一半）"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def write(self, stats):
+        lines = []
+        for name, kind, description, field, scale in PROMETHEUS_METRICS:
+            value = stats[field] * scale  # 计数保持整数，避免大数值被写成科学计数法而丢失精度
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}",
+                      f"{name} {value if isinstance(value, int) else format(value, '.9g')}"]
+        lines += ["# HELP udp_sender_lateness_seconds 最近一个采样间隔的调度延迟分位数",
+                  "# TYPE udp_sender_lateness_seconds gauge",
+                  f'udp_sender_lateness_seconds{{quantile="0.5"}} {stats["lateness_p50"] * 1e-3:.9g}',
+                  f'udp_sender_lateness_seconds{{quantile="0.99"}} {stats["lateness_p99"] * 1e-3:.9g}']
+        temp_path = self.file_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, self.file_path)
+
+    def close(self):
+        pass
+
+
+def create_metrics_writer(file_path):
+    """按扩展名创建指标文件写入器：.prom 为 Prometheus 文本格式，其他为CSV"""
+    if file_path.lower().endswith('.prom'):
+        return PrometheusMetricsWriter(file_path)
+    return CsvMetricsWriter(file_path)
+
+
+class MetricsMonitor:
+    """
+    按固定间隔采样发送计数器
+
+    latest 保存最近一次采样结果；设置了 writer 时每次采样后写入文件。
+    stop() 时再采样一次，使文件中的最后一行包含最终的计数。
+
+    只有设置了 writer 时才需要定时采样：start() 启动后台线程，或给出 asyncio
+    事件循环时用 loop.call_later 在事件循环中采样（大量数据流不必各占一个线程）。
+    没有 writer 时不定时采样，由读取方调用 poll() 按采样间隔按需采样。
+    """
+
+    def __init__(self, counters, interval=DEFAULT_METRICS_INTERVAL, writer=None, on_error=None):
+        """on_error(异常): 写入指标文件失败时调用一次，之后不再写入"""
+        self.counters = counters
+        self.interval = float(interval)
+        self.writer = writer
+        self.on_error = on_error or (lambda error: None)
+        self.latest = counters.sample()
+        self._last_sample = time.perf_counter()
+        self._stop = threading.Event()
+        self._timer = None
+        self.thread = None
+
+    def start(self, loop=None):
+        """开始定时采样；没有 writer 时什么都不做，返回后台线程（没有时为 None）"""
+        if self.writer is None:
+            return None
+        if loop is not None:
+            self._timer = loop.call_later(self.interval, self._tick, loop)
+            return None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def _tick(self, loop):
+        """事件循环中的定时采样"""
+        if not self._stop.is_set():
+            self.sample()
+            self._timer = loop.call_later(self.interval, self._tick, loop)
+
+    def poll(self):
+        """返回最近一次采样结果；没有定时采样且距上次采样已超过采样间隔时先重新采样"""
+        if (self.writer is None and not self._stop.is_set()
+                and time.perf_counter() - self._last_sample >= self.interval):
+            self.sample()
+        return self.latest
+
+    def sample(self):
+        self._last_sample = time.perf_counter()
+        self.latest = self.counters.sample()
+        if self.writer is not None:
+            try:
+                self.writer.write(self.latest)
+            except OSError as e:
+                self.writer = None
+                self.on_error(e)
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.cancel()
+        if self.thread is not None:
+            self.thread.join()
+        self.sample()
+        if self.writer is not None:
+            self.writer.close()
@@ -0,0 +1,531 @@
+"""
+数据包编码模块
+
+根据列名列表和整数列配置预编译数据包格式，供 udp_data_sender.py 和
+gui_demo.py 共用。数据包结构：前缀 + 时间戳(秒, 微秒) + 数据列 + 后缀。
+
+数据列默认按double发送，int_columns 中的列按int32发送；column_types 可以为
+每一列单独指定类型（见 ColumnType），例如开关量用 uint8、12位传感器值用
+uint16，或用带比例/偏移的定点数代替double以减小数据包。
+
+启用序号头部时，前缀之后插入 8字节序号(uint64) + 8字节发送时间(int64，
+Unix纪元起的纳秒)。编码时这两个字段为0，由 PacketStamper 在发送前直接写入
+已编码的数据包，接收端据此统计丢包、重复、乱序和单向延迟。
+
+数据包默认为大端字节序、字段紧密排列；byte_order='little' 时所有数值字段
+按小端字节序写入，align=True 时每个数值字段按自身大小对齐（与C结构体的
+自然对齐相同，偏移从数据包开头算起），整个数据包补齐到最大字段大小的整数倍，
+小端嵌入式接收端可以直接把收到的数据报当作C结构体使用，无需交换字节序或复制。
+"""
+
+import re
+import struct
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# 整数列的取值范围（int32）
+INT32_MIN = -2 ** 31
+INT32_MAX = 2 ** 31 - 1
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+# 列类型名 -> struct格式字符
+COLUMN_TYPES = {
+    'int8': 'b', 'uint8': 'B',
+    'int16': 'h', 'uint16': 'H',
+    'int32': 'i', 'uint32': 'I',
+    'int64': 'q', 'uint64': 'Q',
+    'float32': 'f', 'float64': 'd',
+}
+
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+# 字节序配置值 -> struct/numpy 字节序字符
+BYTE_ORDERS = {'big': '>', 'little': '<'}
+
+# 可以直接向量化解析的时间戳文本（其余格式逐个回退到 parse_timestamp）
+TIMESTAMP_PATTERN = re.compile(r'\s*[-+]?\d+\s*(?::\s*[-+]?\d+\s*){3}')
+
+
+def parse_timestamp(value):
+    """解析 H:M:S:微秒 格式的时间戳，返回 (总秒数, 微秒)"""
+    h, m, s, us = map(int, str(value).split(':'))
+    total_seconds = h * 3600 + m * 60 + s
+    if not (INT32_MIN <= total_seconds <= INT32_MAX and INT32_MIN <= us <= INT32_MAX):
+        raise OverflowError(f"时间戳 {value} 超出int32范围")
+    return total_seconds, us
+
+
+def to_int32(value):
+    """将单元格值转换为int32，超出范围时抛出异常"""
+    result = int(float(value))
+    if not INT32_MIN <= result <= INT32_MAX:
+        raise OverflowError(f"{result} 超出int32范围")
+    return result
+
+
+def _number_text(value):
+    """能精确还原的最短数字文本（整数不带 .0）"""
+    text = repr(float(value))
+    return text[:-2] if text.endswith('.0') else text
+
+
+@dataclass(frozen=True)
+class ColumnType:
+    """
+    数据列的发送类型
+
+    base 为 COLUMN_TYPES 中的类型名。scale/offset 不是默认值时为定点数（base 必须
+    是整数类型）：发送值 = round((原始值 - offset) / scale)，接收端按
+    发送值 * scale + offset 还原。文本形式为 "类型[:比例[:偏移]]"，如 "int16:0.01:-40"。
+    """
+
+    base: str = 'float64'
+    scale: float = 1.0
+    offset: float = 0.0
+
+    def __post_init__(self):
+        if self.base not in COLUMN_TYPES:
+            raise ValueError(f"未知的列类型: {self.base}（可选: {', '.join(COLUMN_TYPES)}）")
+        if self.scale == 0 or not np.isfinite(self.scale) or not np.isfinite(self.offset):
+            raise ValueError(f"定点数的比例必须是非0的有限数: {self}")
+        if self.is_fixed and not self.is_integer:
+            raise ValueError(f"定点数必须使用整数类型: {self}")
+
+    @classmethod
+    def parse(cls, text):
+        """解析 "类型[:比例[:偏移]]" 格式的类型说明"""
+        parts = [part.strip() for part in str(text).strip().lower().split(':')]
+        if len(parts) > 3:
+            raise ValueError(f"列类型格式应为 类型[:比例[:偏移]]: {text}")
+        try:
+            numbers = [float(part) for part in parts[1:]]
+        except ValueError:
+            raise ValueError(f"定点数的比例和偏移必须是数字: {text}") from None
+        return cls(parts[0], *numbers)
+
+    def __str__(self):
+        if not self.is_fixed:
+            return self.base
+        if self.offset == 0:
+            return f"{self.base}:{_number_text(self.scale)}"
+        return f"{self.base}:{_number_text(self.scale)}:{_number_text(self.offset)}"
+
+    @property
+    def format(self):
+        """struct格式字符"""
+        return COLUMN_TYPES[self.base]
+
+    @property
+    def size(self):
+        return struct.calcsize(self.format)
+
+    @property
+    def is_integer(self):
+        """发送值是否为整数（包括定点数）"""
+        return not self.base.startswith('float')
+
+    @property
+    def is_fixed(self):
+        return self.scale != 1.0 or self.offset != 0.0
+
+    @property
+    def limits(self):
+        """整数类型的取值范围 (最小值, 最大值)"""
+        info = np.iinfo(np.dtype(self.format))
+        return int(info.min), int(info.max)
+
+    def convert(self, value):
+        """将单元格值转换为发送值，无法转换或超出范围时抛出异常"""
+        if not self.is_integer:
+            result = float(value)
+            if result != result:
+                raise ValueError("空单元格或NaN")
+            if self.base == 'float32' and abs(result) > FLOAT32_MAX and np.isfinite(result):
+                raise OverflowError(f"{result} 超出float32范围")
+            return result
+        if self.is_fixed:
+            result = round((float(value) - self.offset) / self.scale)
+        else:
+            try:
+                # 整数和整数文本直接转换，大于 2**53 的值不经过 double 而损失精度
+                result = int(value)
+            except (TypeError, ValueError):
+                result = int(float(value))
+        low, high = self.limits
+        if not low <= result <= high:
+            raise OverflowError(f"{result} 超出{self.base}范围")
+        return result
+
+
+# 未指定类型的列
+DEFAULT_COLUMN_TYPE = ColumnType('float64')
+INT_COLUMN_TYPE = ColumnType('int32')
+
+
+def column_type_specs(column_types):
+    """{列名: ColumnType 或类型说明文本} -> {列名: ColumnType}"""
+    return {col: spec if isinstance(spec, ColumnType) else ColumnType.parse(spec)
+            for col, spec in dict(column_types or {}).items()}
+
+
+class PacketCodec:
+    """
+    预编译的数据包编码器
+
+    构造时根据列配置生成一个覆盖前缀、时间戳、全部数据列和后缀的
+    struct.Struct，之后每一行都通过 pack_into 写入同一个预分配缓冲区，
+    避免逐值调用 struct.pack 和拼接 bytes。
+    """
+
+    def __init__(self, columns, int_columns, prefix=b'', suffix=b'', sequence_header=False, column_types=None,
+                 byte_order='big', align=False):
+        """
+        columns: 全部列名（第一列为时间戳）
+        int_columns: 作为int32发送的列名，其余列按double发送
+        sequence_header: 是否在前缀之后加入序号和发送时间字段
+        column_types: {列名: ColumnType 或类型说明文本}，优先于 int_columns
+        byte_order: 'big' 或 'little'
+        align: 是否按C结构体的规则自然对齐各字段并在末尾补齐
+        """
+        if byte_order not in BYTE_ORDERS:
+            raise ValueError(f"未知的字节序: {byte_order}（应为 big 或 little）")
+        self.columns = list(columns)
+        self.int_columns = tuple(int_columns)
+        self.prefix = bytes(prefix)
+        self.suffix = bytes(suffix)
+        self.sequence_header = bool(sequence_header)
+        self.byte_order = byte_order
+        self.align = bool(align)
+
+        int_set = set(self.int_columns)
+        self.column_types = column_type_specs(column_types)
+        self.data_columns = self.columns[1:]
+        self.types = [self.column_types.get(col, INT_COLUMN_TYPE if col in int_set else DEFAULT_COLUMN_TYPE)
+                      for col in self.data_columns]
+        self.is_int = [column_type == INT_COLUMN_TYPE for column_type in self.types]
+        self.converters = [column_type.convert for column_type in self.types]
+        self.defaults = [0 if column_type.is_integer else 0.0 for column_type in self.types]
+
+        # 数值字段: (名称, struct格式字符)
+        fields = [('sequence', 'Q'), ('send_time', 'q')] if self.sequence_header else []
+        fields += [('seconds', 'i'), ('microseconds', 'i')]
+        fields += [(f"col{i + 1}", column_type.format) for i, column_type in enumerate(self.types)]
+
+        # 计算各字段偏移，对齐时在字段前插入填充字节（struct格式中的 'x'）
+        order = BYTE_ORDERS[byte_order]
+        parts = [f"{len(self.prefix)}s"]
+        offset = len(self.prefix)
+        names, formats, offsets = [], [], []
+        largest = 1
+        for name, char in fields:
+            size = struct.calcsize(order + char)
+            if self.align:
+                largest = max(largest, size)
+                padding = -offset % size
+                if padding:
+                    parts.append(f"{padding}x")
+                    offset += padding
+            names.append(name)
+            formats.append(order + char)
+            offsets.append(offset)
+            parts.append(char)
+            offset += size
+        # 后缀在数据包中的偏移（对齐时其后可能还有补齐字节）
+        self.suffix_offset = offset
+        parts.append(f"{len(self.suffix)}s")
+        offset += len(self.suffix)
+        if -offset % largest:
+            parts.append(f"{-offset % largest}x")
+
+        self.format = order + ''.join(parts)
+        self.struct = struct.Struct(self.format)
+        self.packet_size = self.struct.size
+        self.buffer = bytearray(self.packet_size)
+        # 序号头部在数据包中的偏移（未启用时为None）
+        self.header_offset = offsets[0] if self.sequence_header else None
+
+        # 整表向量化编码使用的结构化dtype（前缀/后缀以原始字节写入，填充字节为0）
+        self.dtype = np.dtype({'names': names, 'formats': formats,
+                               'offsets': offsets, 'itemsize': self.packet_size})
+
+        # 复用的字段列表：[前缀, (序号, 发送时间,) 秒, 微秒, 列1, ..., 列N, 后缀]
+        header_fields = [0, 0] if self.sequence_header else []
+        self._fields = [self.prefix] + header_fields + [0, 0] + list(self.defaults) + [self.suffix]
+        self._timestamp_field = 1 + len(header_fields)
+
+    def __reduce__(self):
+        # 传给编码子进程时只传构造参数，由子进程重新编译格式
+        return (PacketCodec, (self.columns, self.int_columns, self.prefix, self.suffix, self.sequence_header,
+                              {col: str(column_type) for col, column_type in self.column_types.items()},
+                              self.byte_order, self.align))
+
+    def type_of(self, column):
+        """数据列的发送类型"""
+        return self.types[self.data_columns.index(column)]
+
+    def pack(self, row, on_error=None):
+        """
+        将一行数据（时间戳, 列1, ..., 列N）打包到内部缓冲区并返回该缓冲区
+
+        无法转换的值以0代替，并调用 on_error(列名, 值, 异常)。
+        返回的 bytearray 会在下次调用时被覆盖，需要保留时请自行复制。
+        """
+        fields = self._fields
+        index = self._timestamp_field
+        try:
+            fields[index], fields[index + 1] = parse_timestamp(row[0])
+        except Exception as e:
+            fields[index] = fields[index + 1] = 0
+            if on_error is not None:
+                on_error(self.columns[0], row[0], e)
+
+        index += 2
+        for value, convert, default, col in zip(row[1:], self.converters, self.defaults, self.data_columns):
+            try:
+                fields[index] = convert(value)
+            except Exception as e:
+                fields[index] = default
+                if on_error is not None:
+                    on_error(col, value, e)
+            index += 1
+
+        self.struct.pack_into(self.buffer, 0, *fields)
+        return self.buffer
+
+    def encode_frame(self, frame):
+        """
+        将整个DataFrame（时间戳列 + 数据列）一次性编码为连续的数据包缓冲区
+
+        数值转换全部向量化完成，只有无法直接向量化解析的单元格才逐个回退到
+        与 pack 相同的转换函数，因此两种路径的编码结果一致：空单元格（None/NaN）
+        在任何类型的列中都按0发送并记为无效值。
+        """
+        start_time = time.perf_counter()
+        count = len(frame)
+        records = np.zeros(count, dtype=self.dtype)
+        raw = records.view(np.uint8).reshape(count, self.packet_size)
+        if self.prefix:
+            raw[:, :len(self.prefix)] = np.frombuffer(self.prefix, dtype=np.uint8)
+        if self.suffix:
+            raw[:, self.suffix_offset:self.suffix_offset + len(self.suffix)] = np.frombuffer(self.suffix, dtype=np.uint8)
+
+        invalid = {}
+        invalid_cells = {}
+        index = frame.index
+
+        def record_invalid(position, mask):
+            positions = np.flatnonzero(mask)
+            if len(positions):
+                col = self.columns[position]
+                invalid[col] = (len(positions), index[positions[0]])
+                invalid_cells[col] = (index[positions], frame.iloc[positions, position].to_numpy(dtype=object))
+
+        seconds, microseconds, timestamp_bad = self._encode_timestamps(frame.iloc[:, 0])
+        records['seconds'] = seconds
+        records['microseconds'] = microseconds
+        record_invalid(0, timestamp_bad)
+
+        for i, column_type in enumerate(self.types):
+            values, bad = self._encode_column(frame.iloc[:, i + 1], column_type)
+            records[f"col{i + 1}"] = values
+            record_invalid(i + 1, bad)
+
+        timestamps = seconds + microseconds * 1e-6
+        packets = PacketBuffer(raw.reshape(-1), self.packet_size, invalid, timestamps)
+        packets.invalid_cells = invalid_cells
+        packets.invalid_timestamps = timestamp_bad
+        packets.encode_seconds = time.perf_counter() - start_time
+        return packets
+
+    def _encode_timestamps(self, series):
+        """向量化解析时间戳列，返回 (秒数数组, 微秒数组, 无效掩码)"""
+        text = series.astype(str)
+        matched = text.str.fullmatch(TIMESTAMP_PATTERN).fillna(False).to_numpy(dtype=bool)
+        parts = text.str.split(':', n=3, expand=True).reindex(columns=range(4))
+        numbers = parts.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, copy=True)
+        numbers[~matched] = 0
+        seconds = numbers[:, 0] * 3600 + numbers[:, 1] * 60 + numbers[:, 2]
+        microseconds = numbers[:, 3]
+        bad = ~matched | (seconds < INT32_MIN) | (seconds > INT32_MAX) \
+            | (microseconds < INT32_MIN) | (microseconds > INT32_MAX)
+        seconds[bad] = 0
+        microseconds[bad] = 0
+
+        # 回退：逐个解析无法向量化的单元格
+        fallback = np.flatnonzero(~matched)
+        if len(fallback):
+            raw_values = series.to_numpy(dtype=object)
+            for pos in fallback:
+                try:
+                    seconds[pos], microseconds[pos] = parse_timestamp(raw_values[pos])
+                    bad[pos] = False
+                except Exception:
+                    pass
+        return seconds.astype(np.int64), microseconds.astype(np.int64), bad
+
+    def _encode_column(self, series, column_type):
+        """向量化转换一列数值，返回 (数值数组, 无效掩码)"""
+        present = series.notna().to_numpy(dtype=bool)
+        numeric = series if series.dtype.kind in 'biuf' else pd.to_numeric(series, errors='coerce')
+        if numeric.dtype.kind in 'iu' and column_type.is_integer and not column_type.is_fixed:
+            # 整数列（包括全部为整数的文本列）直接按整数比较范围，int64/uint64 不经过 double 而损失精度
+            low, high = column_type.limits
+            if numeric.dtype == np.uint64:
+                values = numeric.to_numpy(copy=True)
+                bad = values > np.uint64(high)
+            else:
+                values = numeric.to_numpy(dtype=np.int64, copy=True)
+                bad = (values < max(low, INT64_MIN)) | (values > min(high, INT64_MAX))
+            values[bad] = 0
+            return values, bad
+
+        values = numeric.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        if series.dtype.kind in 'biuf':
+            unparsed = np.zeros(len(values), dtype=bool)
+        else:
+            unparsed = np.isnan(values) & present
+
+        if column_type.is_integer:
+            low, high = column_type.limits
+            with np.errstate(invalid='ignore', over='ignore'):
+                if column_type.is_fixed:
+                    values = np.round((values - column_type.offset) / column_type.scale)
+                else:
+                    values = np.trunc(values)
+                # float(high) + 1 对 int64/uint64 恰好是 2**63/2**64，避免上界在 double 中被舍入
+                bad = ~np.isfinite(values) | (values < low) | (values >= float(high) + 1)
+        elif column_type.base == 'float32':
+            with np.errstate(invalid='ignore'):
+                bad = unparsed | ~present | (np.isfinite(values) & (np.abs(values) > FLOAT32_MAX))
+        else:
+            # 空单元格与 pack 一致按0发送（ColumnType.convert 拒绝NaN），不发送NaN
+            bad = unparsed | ~present
+        values[bad] = 0
+
+        # 回退：逐个转换 to_numeric 无法识别但原始转换可能接受的单元格
+        fallback = np.flatnonzero(bad & present)
+        if len(fallback):
+            raw_values = series.to_numpy(dtype=object)
+            for pos in fallback:
+                try:
+                    values[pos] = column_type.convert(raw_values[pos])
+                    bad[pos] = False
+                except Exception:
+                    pass
+        return values, bad
+
+
+class PacketBuffer:
+    """
+    预编码的连续数据包缓冲区
+
+    所有数据包首尾相接存放在一块连续内存中，第N个数据包是一个零拷贝的
+    memoryview 切片，发送循环只需 sendto(packets[i])。
+    """
+
+    def __init__(self, data, packet_size, invalid=None, timestamps=None):
+        """
+        data: 连续的数据包字节（任意支持缓冲区协议的对象）
+        invalid: {列名: (无效值个数, 首个无效行)}
+        timestamps: 每个数据包的源时间戳（秒，float64数组）
+        """
+        self.data = data
+        self.view = memoryview(data).cast('B')
+        self.packet_size = packet_size
+        self.invalid = invalid or {}
+        self.invalid_cells = {}  # {列名: (无效行索引, 原始值)}，用于写入详细日志
+        self.invalid_timestamps = None  # 无效时间戳的掩码（按0发送），预编码的回放文件为None
+        self.encode_seconds = 0.0  # 编码耗时（秒），预编码的回放文件为0
+        self.timestamps = timestamps
+
+    def __getstate__(self):
+        # memoryview 不能序列化：从编码子进程返回时只传底层数据
+        state = self.__dict__.copy()
+        del state['view']
+        if isinstance(self.data, memoryview):
+            state['data'] = self.view.tobytes()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.view = memoryview(self.data).cast('B')
+
+    def __len__(self):
+        return len(self.view) // self.packet_size
+
+    def __getitem__(self, index):
+        start = index * self.packet_size
+        return self.view[start:start + self.packet_size]
+
+    def with_data(self, data):
+        """
+        换用另一块数据（内容相同，或为空的 b''），保留时间戳、无效值报告和编码耗时
+
+        编码子进程把数据包写入共享内存或文件后，只用 with_data(b'') 传回其余部分。
+        """
+        packets = PacketBuffer(data, self.packet_size, self.invalid, self.timestamps)
+        packets.invalid_cells = self.invalid_cells
+        packets.invalid_timestamps = self.invalid_timestamps
+        packets.encode_seconds = self.encode_seconds
+        return packets
+
+
+class PacketStamper:
+    """
+    在发送前把序号和发送时间写入已编码数据包的头部字段
+
+    可写的缓冲区（编码结果）直接修改，不重新编码；只读的缓冲区（回放文件的
+    映射）先把本批数据包复制到一块可重复使用的暂存缓冲区，再在暂存区中写入，
+    因此常驻内存只增加一批数据包的大小。调用方发送 stamp/stamp_batch 返回的
+    数据包，暂存区中的数据只在下一次调用前有效。序号按实际发出的数据报单调递增，暂停期间重复发送的数据包也会
+    得到新的序号。
+    """
+
+    def __init__(self, header_offset, first_sequence=0, byte_order='big'):
+        self.header_offset = header_offset
+        self.sequence = first_sequence
+        order = BYTE_ORDERS[byte_order]
+        # 序号(uint64) + 发送时间(int64, 纳秒)
+        self.header = struct.Struct(order + 'Qq')
+        self.header_dtype = np.dtype({'names': ['sequence', 'send_time'], 'formats': [order + 'u8', order + 'i8'],
+                                      'offsets': [0, 8], 'itemsize': self.header.size})
+        self._scratch = bytearray()  # 只读数据包的暂存区，按需增大
+
+    def _writable(self, view):
+        """返回可写的数据：只读的 view 复制到暂存区"""
+        if not view.readonly:
+            return view
+        if len(self._scratch) < len(view):
+            self._scratch = bytearray(len(view))
+        scratch = memoryview(self._scratch)[:len(view)]
+        scratch[:] = view
+        return scratch
+
+    def stamp(self, packet):
+        """为单个数据包（memoryview）写入下一个序号和当前时间，返回要发送的数据包"""
+        packet = self._writable(packet)
+        self.header.pack_into(packet, self.header_offset, self.sequence, time.time_ns())
+        self.sequence += 1
+        return packet
+
+    def stamp_batch(self, packets, start, count):
+        """
+        为 packets[start:start+count] 写入连续的序号，整批使用同一个发送时间
+
+        返回 (packets, start)，调用方从中发送这 count 个数据包。
+        """
+        if packets.view.readonly:
+            size = packets.packet_size
+            batch = self._writable(packets.view[start * size:(start + count) * size])
+            packets, start = PacketBuffer(batch, size), 0
+        headers = np.ndarray((count,), dtype=self.header_dtype, buffer=packets.view,
+                             offset=start * packets.packet_size + self.header_offset,
+                             strides=(packets.packet_size,))
+        headers['sequence'] = np.arange(self.sequence, self.sequence + count, dtype=np.uint64)
+        headers['send_time'] = time.time_ns()
+        self.sequence += count
+        return packets, start
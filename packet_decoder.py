@@ -0,0 +1,194 @@
+"""
+数据包批量解码模块
+
+将抓取到的大量数据包（首尾相接的二进制数据，或逐个收到的数据报列表）通过
+np.frombuffer 和编码器的结构化 dtype（字节序和对齐与编码时一致）一次性解码为各列数组，前缀/后缀
+校验也全部向量化完成，用于核对数百万个数据包的发送结果。
+
+    decoder = PacketDecoder.from_config(config)
+    decoded = decoder.decode(captured_bytes)
+    frame = decoded.to_frame()
+    mismatches = find_mismatches(decoded, codec.encode_frame(source_frame))
+
+数据包带有序号头部时，sequence_stats(decoded.sequence) 统计丢包、重复和乱序，
+decoded.latency(接收时间) 计算单向延迟。
+"""
+
+import numpy as np
+import pandas as pd
+
+from replay_file import is_replay_file, read_replay_header, replay_codec
+from sheet_reader import read_header
+
+
+class DecodedPackets:
+    """一批解码结果"""
+
+    def __init__(self, codec, raw, bad_size=0):
+        """
+        raw: N×packet_size 的 uint8 数组
+        bad_size: 因长度不符而被丢弃的数据报数量
+        """
+        self.codec = codec
+        self.raw = raw
+        self.bad_size = bad_size
+        self.records = raw.reshape(-1).view(codec.dtype)
+
+        prefix = np.frombuffer(codec.prefix, dtype=np.uint8)
+        suffix = np.frombuffer(codec.suffix, dtype=np.uint8)
+        self.prefix_ok = (raw[:, :len(prefix)] == prefix).all(axis=1)
+        self.suffix_ok = (raw[:, codec.suffix_offset:codec.suffix_offset + len(suffix)] == suffix).all(axis=1)
+
+    def __len__(self):
+        return len(self.raw)
+
+    @property
+    def valid(self):
+        """前缀和后缀都正确的数据包掩码"""
+        return self.prefix_ok & self.suffix_ok
+
+    @property
+    def timestamps(self):
+        """源时间戳（秒，float64），与 PacketBuffer.timestamps 一致"""
+        return self.records['seconds'] + self.records['microseconds'] * 1e-6
+
+    @property
+    def sequence(self):
+        """发送序号（uint64数组）；数据包不带序号头部时为 None"""
+        if not self.codec.sequence_header:
+            return None
+        return self.records['sequence'].astype(np.uint64)
+
+    @property
+    def send_time(self):
+        """发送时间（Unix纪元起的纳秒，int64数组）；数据包不带序号头部时为 None"""
+        if not self.codec.sequence_header:
+            return None
+        return self.records['send_time'].astype(np.int64)
+
+    def latency(self, receive_time_ns):
+        """
+        单向延迟（秒，float64数组）
+
+        receive_time_ns: 每个数据包的接收时间（time.time_ns()，标量或数组）；
+        收发两端的时钟需要同步，否则结果包含两者的时钟偏差。
+        """
+        if not self.codec.sequence_header:
+            raise ValueError("数据包不带序号头部，无法计算延迟")
+        return (np.asarray(receive_time_ns, dtype=np.int64) - self.send_time) / 1e9
+
+    def column(self, name):
+        """按列名取出一列（本机字节序的数组；定点数列按比例和偏移还原为float64）"""
+        if name == self.codec.columns[0]:
+            return self.timestamps
+        index = self.codec.data_columns.index(name)
+        values = self.records[f"col{index + 1}"].astype(self.codec.dtype[f"col{index + 1}"].newbyteorder('='))
+        column_type = self.codec.types[index]
+        if column_type.is_fixed:
+            return values * column_type.scale + column_type.offset
+        return values
+
+    def to_frame(self):
+        """转换为DataFrame：（sequence、send_time、）seconds、microseconds 加上各数据列"""
+        data = {}
+        if self.codec.sequence_header:
+            data['sequence'] = self.sequence
+            data['send_time'] = self.send_time
+        data['seconds'] = self.records['seconds'].astype(np.int32)
+        data['microseconds'] = self.records['microseconds'].astype(np.int32)
+        for col in self.codec.data_columns:
+            data[col] = self.column(col)
+        return pd.DataFrame(data)
+
+
+class PacketDecoder:
+    """按发送配置批量解码数据包"""
+
+    def __init__(self, codec):
+        self.codec = codec
+
+    @classmethod
+    def from_config(cls, config, columns=None):
+        """
+        根据 SenderConfig 创建解码器
+
+        columns 为空时从配置中的数据文件读取列名（Excel表头或回放文件头部）。
+        """
+        if columns is None:
+            if is_replay_file(config.file_path):
+                return cls(replay_codec(read_replay_header(config.file_path)))
+            columns = read_header(config.file_path, config.sheet_name)
+        return cls(config.create_codec(columns))
+
+    def to_array(self, data):
+        """
+        将抓包数据转换为 N×packet_size 的 uint8 数组，返回 (数组, 长度不符的数据报数量)
+
+        data 可以是首尾相接的字节数据（长度必须是数据包大小的整数倍），
+        也可以是逐个数据报组成的列表（长度不符的数据报被丢弃并计数）。
+        """
+        size = self.codec.packet_size
+        if isinstance(data, (list, tuple)):
+            packets = [packet for packet in data if len(packet) == size]
+            bad_size = len(data) - len(packets)
+            data = b''.join(packets)
+        else:
+            bad_size = 0
+        raw = np.frombuffer(data, dtype=np.uint8)
+        if len(raw) % size:
+            raise ValueError(f"数据长度 {len(raw)} 不是数据包大小 {size} 的整数倍")
+        return raw.reshape(-1, size), bad_size
+
+    def decode(self, data):
+        """解码一批数据包，返回 DecodedPackets"""
+        raw, bad_size = self.to_array(data)
+        return DecodedPackets(self.codec, raw, bad_size)
+
+
+def find_mismatches(decoded, expected):
+    """
+    逐包比较解码结果与期望的编码结果（PacketBuffer 或 DecodedPackets），
+    返回内容不一致的数据包序号数组；数量不同时多出的部分也算作不一致
+    """
+    if isinstance(expected, DecodedPackets):
+        expected_raw = expected.raw
+    else:
+        expected_raw = np.frombuffer(expected.view, dtype=np.uint8).reshape(-1, expected.packet_size)
+    count = min(len(decoded.raw), len(expected_raw))
+    mismatched = np.flatnonzero((decoded.raw[:count] != expected_raw[:count]).any(axis=1))
+    extra = np.arange(count, max(len(decoded.raw), len(expected_raw)))
+    return np.concatenate([mismatched, extra])
+
+
+def sequence_stats(sequence):
+    """
+    按接收顺序的序号统计丢包、重复和乱序
+
+    返回字典：
+        received    收到的数据包数量
+        unique      去重后的序号数量
+        expected    最小到最大序号之间应收到的数量
+        lost        未收到的序号数量（expected - unique）
+        duplicates  重复收到的数据包数量（received - unique）
+        reordered   序号小于前一个数据包的次数
+
+    expected 只由收到的最小和最大序号决定，重复的数据包不增加 expected，
+    也不抵消丢包：lost 与 duplicates 分别统计，received = expected - lost + duplicates。
+    序号按 uint64 回绕处理：以第一个数据包为基准取有符号差值，因此跨越
+    2**64 - 1 -> 0 的序列仍是连续的。
+    """
+    sequence = np.asarray(sequence, dtype=np.uint64)
+    if len(sequence) == 0:
+        return {'received': 0, 'unique': 0, 'expected': 0, 'lost': 0, 'duplicates': 0, 'reordered': 0}
+    # 相对第一个数据包的序号差（模 2**64 后按有符号数解释）
+    offsets = (sequence - sequence[0]).view(np.int64)
+    unique = len(np.unique(offsets))
+    expected = int(offsets.max()) - int(offsets.min()) + 1
+    return {
+        'received': len(sequence),
+        'unique': unique,
+        'expected': expected,
+        'lost': expected - unique,
+        'duplicates': len(sequence) - unique,
+        'reordered': int((offsets[1:] < offsets[:-1]).sum()),
+    }
@@ -0,0 +1,170 @@
+"""
+多进程并行编码模块
+
+编码（时间戳解析 + 数值转换）受GIL限制只能使用一个CPU核心。数据量很大时，
+读取线程按块切分数据，把各块分发到进程池中并行编码：
+    - 发送时按原顺序取回编码结果，第0块编码完成即开始发送，后续数据块继续在
+      其他进程中编码（encode_chunks_shared）。各进程把数据包写入主进程为该块
+      分配的内存块（Windows: 命名共享内存；Linux: /dev/shm 中的文件；空间
+      不足或其他系统: 临时目录中的文件），主进程直接从映射的内存发送，数据包
+      不经过 pickle 传回
+    - 编译回放文件时，各进程把数据包直接写入输出文件中为该块预留的位置
+两种情况下子进程都只传回时间戳和无效值报告，由主进程按块顺序合并。
+
+Windows 下子进程通过重新导入主模块启动，入口脚本必须有 if __name__ == "__main__"
+保护，打包后的程序需要在启动时调用 multiprocessing.freeze_support()。
+"""
+
+import itertools
+import mmap
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from replay_file import ReplayWriter
+
+# 默认编码进程数
+DEFAULT_ENCODE_WORKERS = os.cpu_count() or 1
+
+
+def create_encode_pool(workers=DEFAULT_ENCODE_WORKERS):
+    """创建编码进程池"""
+    return ProcessPoolExecutor(max_workers=max(int(workers), 1))
+
+
+# 内存块的名称序号（Windows 下为映射名称的一部分）
+_block_ids = itertools.count()
+
+# Linux 的共享内存文件系统（tmpfs），不存在时使用临时目录
+SHM_DIR = '/dev/shm'
+
+
+def _encode_into_file(codec, frame, file_path, offset):
+    """
+    在子进程中编码一个数据块并写入文件的指定偏移
+
+    返回不含数据包的编码结果（时间戳和无效值报告）。
+    """
+    packets = codec.encode_frame(frame)
+    with open(file_path, 'r+b') as f:
+        f.seek(offset)
+        f.write(packets.view)
+    return packets.with_data(b'')
+
+
+def _encode_into_block(codec, frame, name):
+    """在子进程中编码一个数据块并写入内存块 name（见 _create_block），返回不含数据包的编码结果"""
+    if os.name != 'nt':
+        return _encode_into_file(codec, frame, name, 0)
+    packets = codec.encode_frame(frame)
+    block = mmap.mmap(-1, len(packets.view), tagname=name)
+    try:
+        block[:] = packets.view
+    finally:
+        block.close()
+    return packets.with_data(b'')
+
+
+def _block_dir(size):
+    """POSIX 下存放内存块文件的目录：/dev/shm 有足够空间时使用它，否则使用临时目录"""
+    try:
+        if shutil.disk_usage(SHM_DIR).free >= size:
+            return SHM_DIR
+    except OSError:
+        pass
+    return None
+
+
+def _create_block(size):
+    """
+    分配子进程可以按名称写入的内存块，返回 (名称, 映射的内存)
+
+    Windows 下是命名的共享内存。其他系统是文件：Linux 下放在 /dev/shm（内存
+    文件系统，即共享内存），空间不足或没有 /dev/shm 时放在临时目录（可能在磁盘上，
+    由页缓存承载）；文件在取回结果后即删除，映射在最后一个数据包视图释放时解除。
+
+    不使用 multiprocessing.shared_memory：发送循环持有的数据包切片会比编码结果
+    活得更久，SharedMemory.close() 在仍有导出的视图时抛出 BufferError 并泄漏
+    文件描述符；普通 mmap 对象不需要显式关闭。
+    """
+    if os.name == 'nt':
+        name = f"udp_encode_{os.getpid()}_{next(_block_ids)}"
+        return name, mmap.mmap(-1, size, tagname=name)
+    fd, name = tempfile.mkstemp(prefix='udp_encode_', dir=_block_dir(size))
+    try:
+        os.ftruncate(fd, size)
+        return name, mmap.mmap(fd, size)
+    except BaseException:
+        os.unlink(name)
+        raise
+    finally:
+        os.close(fd)
+
+
+def _release_block_name(name):
+    if os.name != 'nt':
+        try:
+            os.unlink(name)
+        except FileNotFoundError:
+            pass
+
+
+def encode_chunks_shared(codec, chunks, pool, depth=2):
+    """
+    在编码进程池中编码数据块，按原顺序产出数据位于映射内存块（见 _create_block）中的 PacketBuffer，
+    最多同时提交 depth+1 块
+    """
+    pending = deque()
+    try:
+        for chunk in chunks:
+            if not len(chunk):
+                continue
+            name, block = _create_block(len(chunk) * codec.packet_size)
+            pending.append((pool.submit(_encode_into_block, codec, chunk, name), name, block))
+            if len(pending) > depth:
+                yield _collect(*pending.popleft())
+        while pending:
+            yield _collect(*pending.popleft())
+    finally:
+        for future, name, _ in pending:
+            future.cancel()
+            _release_block_name(name)
+
+
+def _collect(future, name, block):
+    """等待一块编码完成，返回使用内存块数据的 PacketBuffer"""
+    try:
+        return future.result().with_data(block)
+    finally:
+        _release_block_name(name)
+
+
+def compile_replay_parallel(chunks, codec, file_path, source=None, workers=DEFAULT_ENCODE_WORKERS,
+                            on_encoded=None):
+    """
+    与 replay_file.compile_replay_file 相同，但在多个进程中并行编码，返回数据包数量
+
+    每块在提交时即按行数预留文件位置，因此各进程可以乱序完成；同时在途的
+    数据块不超过进程数的两倍，内存占用与文件大小无关。on_encoded 按块顺序
+    收到不含数据包的编码结果（时间戳和无效值报告）。
+    """
+    workers = max(int(workers), 1)
+    on_encoded = on_encoded or (lambda packets: None)
+
+    def finish(future):
+        packets = future.result()
+        writer.add_timestamps(packets.timestamps)
+        on_encoded(packets)
+
+    with ReplayWriter(file_path, codec, source) as writer, create_encode_pool(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            offset = writer.reserve(len(chunk))
+            pending.append(pool.submit(_encode_into_file, codec, chunk, writer.write_path, offset))
+            if len(pending) >= 2 * workers:
+                finish(pending.popleft())
+        while pending:
+            finish(pending.popleft())
+    return writer.packet_count
@@ -0,0 +1,236 @@
+"""
+回放文件模块
+
+将编码完成的数据包流编译为 .udpbin 二进制文件，回放时通过 mmap 直接从
+文件发送，无需重新读取Excel和编码。
+
+文件结构:
+    0       8字节魔数 b'UDPBIN01'
+    8       8字节头部偏移（小端 uint64）
+    16      数据包数据（定长数据包首尾相接）
+    ...     每个数据包的起始偏移表（小端 uint64，相对数据区起点）
+    ...     每个数据包的源时间戳表（小端 float64，单位秒）
+    头部偏移 JSON头部（UTF-8），包含格式、数据包数量和各表位置
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from packet_codec import PacketBuffer, PacketCodec
+
+REPLAY_EXTENSION = '.udpbin'
+REPLAY_MAGIC = b'UDPBIN01'
+REPLAY_VERSION = 1
+
+# 魔数 + 头部偏移
+PREAMBLE = struct.Struct('<8sQ')
+
+
+def is_replay_file(file_path):
+    """判断文件是否为回放文件"""
+    return str(file_path).lower().endswith(REPLAY_EXTENSION)
+
+
+class ReplayWriter:
+    """
+    按块写入回放文件，数据包数量无需预先知道
+
+    数据先写入同一目录下的临时文件（write_path），close() 写完头部后才替换为
+    file_path；中途出错时（with 块抛出异常）删除临时文件，不会在目标位置留下
+    没有头部的不完整文件，已存在的同名回放文件也保持不变。
+    """
+
+    def __init__(self, file_path, codec, source=None):
+        """
+        codec: 编码数据包所用的 PacketCodec，其格式写入文件头部
+        source: 可选的来源信息（文件名、工作表等），原样写入头部
+        """
+        self.codec = codec
+        self.source = source or {}
+        self.packet_count = 0
+        self._timestamps = []
+        self.file_path = file_path
+        self.write_path = f"{file_path}.{os.getpid()}.tmp"
+        self._file = open(self.write_path, 'wb')
+        try:
+            self._file.write(PREAMBLE.pack(REPLAY_MAGIC, 0))
+        except BaseException:
+            self.discard()
+            raise
+
+    def write(self, packets):
+        """追加一块已编码的数据包（PacketBuffer）"""
+        self._file.seek(self.reserve(len(packets)))
+        self._file.write(packets.view)
+        self.add_timestamps(packets.timestamps)
+
+    def reserve(self, count):
+        """
+        为 count 个数据包预留位置，返回其在文件中的偏移
+
+        数据包可以由其他进程直接写入 write_path 的该位置，写入顺序任意；
+        时间戳仍需按数据包顺序通过 add_timestamps() 追加。
+        """
+        offset = PREAMBLE.size + self.packet_count * self.codec.packet_size
+        self.packet_count += count
+        return offset
+
+    def add_timestamps(self, timestamps):
+        """按顺序追加一块数据包的源时间戳"""
+        self._timestamps.append(timestamps)
+
+    def close(self):
+        """写入偏移表、时间戳表和头部，然后替换为 file_path；失败时删除临时文件"""
+        try:
+            self._finish()
+        except BaseException:
+            self.discard()
+            raise
+        os.replace(self.write_path, self.file_path)
+
+    def discard(self):
+        """放弃写入：关闭并删除临时文件"""
+        self._file.close()
+        try:
+            os.unlink(self.write_path)
+        except FileNotFoundError:
+            pass
+
+    def _finish(self):
+        codec = self.codec
+        data_size = self.packet_count * codec.packet_size
+        offsets = np.arange(self.packet_count, dtype='<u8') * codec.packet_size
+        timestamps = (np.concatenate(self._timestamps) if self._timestamps
+                      else np.zeros(0)).astype('<f8')
+
+        offsets_offset = PREAMBLE.size + data_size
+        self._file.seek(offsets_offset)
+        self._file.write(offsets.tobytes())
+        timestamps_offset = offsets_offset + offsets.nbytes
+        self._file.write(timestamps.tobytes())
+        header_offset = timestamps_offset + timestamps.nbytes
+
+        header = {
+            'version': REPLAY_VERSION,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'source': self.source,
+            'columns': codec.columns,
+            'int_columns': [col for col, is_int in zip(codec.data_columns, codec.is_int) if is_int],
+            'prefix_hex': codec.prefix.hex().upper(),
+            'suffix_hex': codec.suffix.hex().upper(),
+            'sequence_header': codec.sequence_header,
+            'column_types': {col: str(column_type) for col, column_type in codec.column_types.items()},
+            'byte_order': codec.byte_order,
+            'align': codec.align,
+            'packet_size': codec.packet_size,
+            'packet_count': self.packet_count,
+            'data_offset': PREAMBLE.size,
+            'offsets_offset': offsets_offset,
+            'timestamps_offset': timestamps_offset,
+        }
+        self._file.write(json.dumps(header, ensure_ascii=False).encode('utf-8'))
+        self._file.seek(0)
+        self._file.write(PREAMBLE.pack(REPLAY_MAGIC, header_offset))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def compile_replay_file(chunks, codec, file_path, source=None, on_encoded=None):
+    """
+    将数据块（DataFrame）逐块编码并写入回放文件，返回数据包数量
+
+    on_encoded(packets) 按块顺序收到每块的编码结果（用于汇总无效值）。
+    """
+    with ReplayWriter(file_path, codec, source) as writer:
+        for chunk in chunks:
+            packets = codec.encode_frame(chunk)
+            writer.write(packets)
+            if on_encoded is not None:
+                on_encoded(packets)
+    return writer.packet_count
+
+
+def read_replay_header(file_path):
+    """只读取回放文件的头部"""
+    with open(file_path, 'rb') as f:
+        magic, header_offset = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != REPLAY_MAGIC:
+            raise ValueError(f"不是有效的回放文件: {file_path}")
+        f.seek(header_offset)
+        return json.loads(f.read().decode('utf-8'))
+
+
+def replay_codec(header):
+    """按回放文件头部记录的数据包格式创建编码器"""
+    return PacketCodec(header['columns'], header['int_columns'], bytes.fromhex(header['prefix_hex']),
+                       bytes.fromhex(header['suffix_hex']), header.get('sequence_header', False),
+                       header.get('column_types'), header.get('byte_order', 'big'), header.get('align', False))
+
+
+def iter_replay_packets(replay):
+    """以单个数据块的形式产出回放文件的数据包，迭代结束或关闭时关闭文件"""
+    try:
+        yield replay.packets
+    finally:
+        replay.close()
+
+
+class ReplayFile:
+    """
+    通过 mmap 打开的回放文件
+
+    packets 是直接指向映射内存的 PacketBuffer，发送时不复制数据，
+    常驻内存只包含实际被访问的页面。映射是只读的：带序号头部的文件在发送时
+    由 PacketStamper 把每批数据包复制到小的暂存区再写入序号和发送时间，
+    不改动文件，也不会像写时复制那样让常驻内存随已发送的数据增长。
+    """
+
+    def __init__(self, file_path):
+        self.header = read_replay_header(file_path)
+        if self.header.get('version') != REPLAY_VERSION:
+            raise ValueError(f"不支持的回放文件版本: {self.header.get('version')}")
+        with open(file_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        count = self.header['packet_count']
+        packet_size = self.header['packet_size']
+        data_offset = self.header['data_offset']
+        view = memoryview(self._mmap)
+        self.offsets = np.frombuffer(self._mmap, dtype='<u8', count=count,
+                                     offset=self.header['offsets_offset'])
+        self.timestamps = np.frombuffer(self._mmap, dtype='<f8', count=count,
+                                        offset=self.header['timestamps_offset'])
+        self.packets = PacketBuffer(view[data_offset:data_offset + count * packet_size], packet_size,
+                                    timestamps=self.timestamps)
+        view.release()
+
+    @property
+    def columns(self):
+        return self.header['columns']
+
+    def close(self):
+        """关闭映射；仍被引用的数据包切片会让映射保持有效直到被回收"""
+        self.packets = self.offsets = self.timestamps = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
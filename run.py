@@ -2,23 +2,192 @@
 """
 UDP Data Sender - 启动脚本
 
-简单的启动脚本，用于运行UDP数据发送工具。
+不带参数时启动图形界面；指定 --config 时以无界面模式运行，配置文件格式与
+界面"保存配置"导出的 JSON 相同（参见 config_example.json）。
+
+    python run.py                                  # 图形界面
+    python run.py --config config.json             # 无界面发送
+    python run.py --config config.json --compile scenario.udpbin
+    python run.py --session session.json           # 同时发送多路数据流
+    python run.py --session session.json --async   # 大量低速率数据流使用 asyncio 引擎
 """
 
+import argparse
+import json
+import multiprocessing
 import sys
 import os
+import time
 
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-try:
-    from udp_data_sender import main
-    if __name__ == "__main__":
-        main()
-except ImportError as e:
-    print(f"导入错误: {e}")
-    print("请确保已安装所有依赖项: pip install -r requirements.txt")
-    sys.exit(1)
-except Exception as e:
-    print(f"运行错误: {e}")
-    sys.exit(1)
+# 无界面模式下输出发送统计的间隔（秒）
+STATS_INTERVAL = 5.0
+
+# 命令行参数 -> 配置文件字段
+OVERRIDES = {
+    'file': 'file_path',
+    'sheet': 'sheet_name',
+    'target_ip': 'target_ip',
+    'target_port': 'target_port',
+    'send_interval': 'send_interval',
+    'send_mode': 'send_mode',
+    'replay_speed': 'replay_speed',
+    'log_file': 'log_file',
+    'multicast_ttl': 'multicast_ttl',
+    'multicast_interface': 'multicast_interface',
+    'encode_workers': 'encode_workers',
+    'sequence_header': 'sequence_header',
+    'byte_order': 'byte_order',
+    'align': 'align',
+    'metrics_file': 'metrics_file',
+    'metrics_interval': 'metrics_interval',
+}
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="UDP Data Sender - 不带参数时启动图形界面")
+    parser.add_argument('--config', help="配置文件(JSON)，指定后以无界面模式运行")
+    parser.add_argument('--session', help="多路会话文件(JSON)，以无界面模式同时发送其中的所有数据流")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="会话使用 asyncio 引擎（单线程调度，适合大量低速率数据流）")
+    parser.add_argument('--file', help="覆盖配置中的数据文件（Excel、CSV/Parquet/Feather/NumPy 或 .udpbin）")
+    parser.add_argument('--sheet', help="覆盖配置中的工作表")
+    parser.add_argument('--target-ip', help="覆盖配置中的目标IP")
+    parser.add_argument('--target-port', help="覆盖配置中的目标端口")
+    parser.add_argument('--dest', action='append', metavar='IP:PORT',
+                        help="附加发送目标（可重复指定，追加到配置中的附加目标之后）")
+    parser.add_argument('--multicast-ttl', help="覆盖配置中的组播TTL")
+    parser.add_argument('--multicast-interface', help="覆盖配置中的组播出口网卡IP")
+    parser.add_argument('--send-interval', help="覆盖配置中的发送间隔(秒)")
+    parser.add_argument('--send-mode', choices=['interval', 'timestamp', 'asap'], help="覆盖配置中的发送模式")
+    parser.add_argument('--replay-speed', help="覆盖配置中的回放速度(倍)")
+    parser.add_argument('--log-file', help="详细日志文件（记录每个无效单元格和每次发送错误）")
+    parser.add_argument('--encode-workers', help="覆盖配置中的并行编码进程数（0 = 不使用进程池）")
+    parser.add_argument('--sequence-header', action='store_const', const='1',
+                        help="在数据包中加入序号和发送时间（用于接收端统计丢包和延迟）")
+    parser.add_argument('--byte-order', choices=['big', 'little'], help="覆盖配置中数值字段的字节序")
+    parser.add_argument('--align', action='store_const', const='1',
+                        help="按C结构体的规则自然对齐各字段（接收端可以直接把数据报当作结构体使用）")
+    parser.add_argument('--metrics-file', help="定期写入发送指标的文件（.prom 为Prometheus文本格式，其他为CSV）")
+    parser.add_argument('--metrics-interval', help="指标采样间隔(秒)，默认1")
+    parser.add_argument('--compile', metavar='OUTPUT', help="只编译回放文件(.udpbin)，不发送")
+    parser.add_argument('--infer-types', action='store_true',
+                        help="只扫描数据文件，推断每列最紧凑的无损类型并输出报告和 column_types 配置，不发送")
+    parser.add_argument('--startup-report', metavar='FILE',
+                        help="图形界面: 窗口显示后写入启动耗时报告(JSON)并退出（见 build.py --measure）")
+    return parser.parse_args(argv)
+
+
+def print_event(event):
+    """在控制台输出引擎事件"""
+    if event['type'] in ('log', 'status'):
+        print(f"[{time.strftime('%H:%M:%S')}] {event['content']}", flush=True)
+    elif event['type'] == 'stream_complete':
+        data = event['data']
+        print(f"[{time.strftime('%H:%M:%S')}] [{event['stream']}] 完成: 发送 {data['total_sent']} 条, "
+              f"跳过 {data['skipped']} 条, 耗时 {data['elapsed']:.2f} 秒", flush=True)
+    elif event['type'] == 'complete':
+        data = event['data']
+        print("===== 操作完成 =====")
+        print(f"成功发送: {data['total_sent']} 条记录")
+        print(f"跳过处理: {data['skipped']} 条记录")
+        print(f"总共处理: {data['total_records']} 条记录")
+        print(f"总耗时: {data['elapsed']:.2f} 秒")
+        if 'lateness_max' in data:
+            print(f"发送延迟: 平均 {data['lateness_mean']:.3f} 毫秒, 最大 {data['lateness_max']:.3f} 毫秒")
+
+
+def run_headless(args):
+    """无界面模式：按配置文件发送或编译回放文件，返回进程退出码"""
+    from metrics import format_stats
+    from sender_engine import SenderConfig, SenderEngine, compile_replay
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    for arg_name, key in OVERRIDES.items():
+        value = getattr(args, arg_name)
+        if value is not None:
+            config[key] = value
+    if args.dest:
+        config['destinations'] = '\n'.join([config.get('destinations', '')] + args.dest)
+    config = SenderConfig.from_dict(config)
+
+    if args.compile:
+        compile_replay(config, args.compile, print_event)
+        return 0
+
+    if args.infer_types:
+        from schema_inference import column_types_text, infer_schema, schema_report
+        inference = infer_schema(config)
+        print("\n".join(schema_report(inference, config)))
+        print("column_types:")
+        print(column_types_text(inference.column_types(config), config.int_columns))
+        return 0
+
+    engine = SenderEngine(config, print_event)
+    engine.start()
+    last_report = time.time()
+    try:
+        while engine.thread.is_alive():
+            engine.thread.join(0.2)
+            if time.time() - last_report >= STATS_INTERVAL and engine.thread.is_alive():
+                stats = engine.sample()
+                print(f"[{time.strftime('%H:%M:%S')}] {format_stats(stats, ', ')}", flush=True)
+                if len(stats['destinations']) > 1:
+                    for name, sent, errors in stats['destinations']:
+                        print(f"    {name}: 已发送 {sent}, 错误 {errors}", flush=True)
+                last_report = time.time()
+    except KeyboardInterrupt:
+        print("正在停止发送...")
+        engine.stop()
+        engine.thread.join()
+    return 1 if 'error' in engine.result else 0
+
+
+def run_session(args):
+    """无界面模式：同时发送会话文件中的所有数据流，返回进程退出码"""
+    from metrics import format_stats
+    from session import SenderSession, load_session
+
+    streams, encoder_workers = load_session(args.session)
+    if args.use_async:
+        from async_engine import AsyncSession
+        session = AsyncSession(streams, print_event, encoder_workers)
+    else:
+        session = SenderSession(streams, print_event, encoder_workers)
+    session.start()
+    last_report = time.time()
+    try:
+        while session.thread.is_alive():
+            session.thread.join(0.2)
+            if time.time() - last_report >= STATS_INTERVAL and session.thread.is_alive():
+                for name, stats in session.sample().items():
+                    print(f"[{time.strftime('%H:%M:%S')}] [{name}] {format_stats(stats, ', ')}", flush=True)
+                last_report = time.time()
+    except KeyboardInterrupt:
+        print("正在停止发送...")
+        session.stop()
+        session.thread.join()
+    return 1 if 'error' in session.result else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    args = parse_args()
+    try:
+        if args.session:
+            sys.exit(run_session(args))
+        if args.config:
+            sys.exit(run_headless(args))
+        from udp_data_sender import main
+        main(args.startup_report)
+    except ImportError as e:
+        print(f"导入错误: {e}")
+        print("请确保已安装所有依赖项: pip install -r requirements.txt")
+        sys.exit(1)
+    except Exception as e:
+        print(f"运行错误: {e}")
+        sys.exit(1)
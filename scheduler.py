@@ -0,0 +1,237 @@
+"""
+发送调度模块
+
+以绝对截止时间调度数据包：第N个数据包的发送时刻固定为 起始时刻 + N*间隔
+（或按源时间戳换算的偏移），编码耗时、队列操作和 sleep 的超时都不会累积成
+漂移。等待时先 sleep 到截止时间前的一小段，再自旋到截止时间，以获得亚毫秒级
+精度。
+
+所有调度器提供相同的接口：
+    feed(timestamps, invalid=None)  每个数据块发送前传入该块的源时间戳（及无效时间戳掩码）
+    wait()            等待下一个数据包的截止时间，返回延迟（纳秒）
+    hold()            暂停期间调用，等待一个保持间隔
+
+不阻塞的调用方（如 asyncio 引擎）改用：
+    next_deadline()   下一个数据包的截止时间（perf_counter_ns，0表示立即）
+    advance()         下一个数据包已发送
+    delay(ns)         将之后的整个时间轴后移 ns 纳秒（暂停后恢复时使用）
+"""
+
+import time
+from collections import deque
+
+# 发送模式: 配置值 -> 界面显示名称
+SEND_MODES = {
+    'interval': '固定间隔',
+    'timestamp': '按时间戳',
+    'asap': '尽快发送',
+}
+
+# 按时间戳回放时允许的速度倍数范围
+MIN_SPEED = 0.1
+MAX_SPEED = 100.0
+
+# 距离截止时间小于该值时改为自旋等待（秒）
+DEFAULT_SPIN_SECONDS = 0.001
+
+
+def wait_until(deadline_ns, spin_ns=int(DEFAULT_SPIN_SECONDS * 1e9)):
+    """sleep + 自旋等待到 perf_counter_ns 截止时间，返回实际到达时刻"""
+    now = time.perf_counter_ns()
+    remaining = deadline_ns - now
+    if remaining > spin_ns:
+        time.sleep((remaining - spin_ns) / 1e9)
+        now = time.perf_counter_ns()
+    while now < deadline_ns:
+        now = time.perf_counter_ns()
+    return now
+
+
+class DeadlineScheduler:
+    """
+    固定间隔的绝对截止时间调度器
+
+    每次调用 wait() 等待下一个截止时间并返回本次的延迟（纳秒）。
+    落后于计划时不再等待，后续数据包会尽快追上原定时间轴。
+    """
+
+    def __init__(self, interval, spin_seconds=DEFAULT_SPIN_SECONDS):
+        """interval: 发送间隔（秒）"""
+        self.interval_ns = int(round(float(interval) * 1e9))
+        self.spin_ns = int(spin_seconds * 1e9)
+        self.start_ns = None
+        self.index = 0
+
+    def start(self):
+        """以当前时刻作为第0个数据包的截止时间"""
+        self.start_ns = time.perf_counter_ns()
+        self.index = 0
+
+    def feed(self, timestamps, invalid=None):
+        """固定间隔调度不使用源时间戳"""
+
+    def next_deadline(self):
+        """下一个数据包的截止时间（perf_counter_ns）"""
+        if self.start_ns is None:
+            self.start()
+        return self.start_ns + self.index * self.interval_ns
+
+    def advance(self):
+        self.index += 1
+
+    def delay(self, ns):
+        if self.start_ns is not None:
+            self.start_ns += ns
+
+    def wait(self):
+        """等待下一个截止时间，返回延迟（纳秒，>=0）"""
+        deadline = self.next_deadline()
+        now = wait_until(deadline, self.spin_ns)
+        self.advance()
+        return now - deadline
+
+    def hold(self):
+        """暂停期间照常按间隔计时"""
+        self.wait()
+
+
+class TimestampScheduler:
+    """
+    按源时间戳调度
+
+    每个数据块的截止时间在 feed() 中由时间戳列一次性向量化算出：
+    (时间戳 - 首个有效时间戳) / 速度倍数。时间戳回退（如无效时间戳按0发送）时
+    沿用前一个截止时间，不会造成等待；开头的无效时间戳不作为起点，否则之后
+    第一个有效时间戳（如 01:00:00:0）要等待一个小时。暂停期间整个时间轴随之后移。
+    """
+
+    def __init__(self, speed=1.0, hold_interval=0.1, spin_seconds=DEFAULT_SPIN_SECONDS):
+        """speed: 速度倍数（1.0为实时）；hold_interval: 暂停期间的重复发送间隔（秒）"""
+        self.speed = float(speed)
+        self.hold_interval = float(hold_interval)
+        self.spin_ns = int(spin_seconds * 1e9)
+        self.start_ns = None
+        self.origin = None
+        self._last_offset = 0.0
+        self._deadlines = []
+        self._position = 0
+
+    def feed(self, timestamps, invalid=None):
+        """
+        根据一个数据块的源时间戳预先计算截止时间（相对起始时刻的纳秒数）
+
+        invalid: 无效时间戳的掩码（PacketBuffer.invalid_timestamps）；为 None 时
+        （如回放文件）把按0发送的时间戳当作无效
+        """
+        import numpy as np  # 只有按时间戳调度用到numpy，界面启动时导入本模块只需要 SEND_MODES
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if not len(timestamps):
+            self._deadlines, self._position = [], 0
+            return
+        if self.origin is None:
+            valid = ~np.asarray(invalid, dtype=bool) if invalid is not None else timestamps != 0
+            first = np.flatnonzero(valid)
+            if not len(first):
+                # 整块都没有有效时间戳：立即发送，等下一块再确定起点
+                self._deadlines = [int(round(self._last_offset))] * len(timestamps)
+                self._position = 0
+                return
+            self.origin = timestamps[first[0]]
+        offsets = (timestamps - self.origin) * (1e9 / self.speed)
+        offsets[0] = max(offsets[0], self._last_offset)
+        offsets = np.maximum.accumulate(offsets)
+        self._last_offset = offsets[-1]
+        self._deadlines = np.rint(offsets).astype(np.int64).tolist()
+        self._position = 0
+
+    def next_deadline(self):
+        """下一个数据包的截止时间（perf_counter_ns）"""
+        if self.start_ns is None:
+            self.start_ns = time.perf_counter_ns()
+        return self.start_ns + self._deadlines[self._position]
+
+    def advance(self):
+        self._position += 1
+
+    def delay(self, ns):
+        if self.start_ns is not None:
+            self.start_ns += ns
+
+    def wait(self):
+        """等待下一个数据包的截止时间，返回延迟（纳秒，>=0）"""
+        deadline = self.next_deadline()
+        self.advance()
+        now = wait_until(deadline, self.spin_ns)
+        return now - deadline
+
+    def hold(self):
+        """暂停期间等待一个保持间隔，并把时间轴整体后移"""
+        before = time.perf_counter_ns()
+        time.sleep(self.hold_interval)
+        self.delay(time.perf_counter_ns() - before)
+
+
+class AsapScheduler:
+    """不等待，尽快发送"""
+
+    def __init__(self, hold_interval=0.1):
+        self.hold_interval = float(hold_interval)
+
+    def feed(self, timestamps, invalid=None):
+        """尽快发送不使用源时间戳"""
+
+    def next_deadline(self):
+        return 0
+
+    def advance(self):
+        pass
+
+    def delay(self, ns):
+        pass
+
+    def wait(self):
+        return 0
+
+    def hold(self):
+        time.sleep(self.hold_interval)
+
+
+def create_scheduler(mode, interval, speed=1.0, spin_seconds=DEFAULT_SPIN_SECONDS):
+    """根据发送模式创建调度器；interval 同时用作暂停期间的重复发送间隔"""
+    if mode == 'interval':
+        return DeadlineScheduler(interval, spin_seconds)
+    if mode == 'timestamp':
+        if not MIN_SPEED <= float(speed) <= MAX_SPEED:
+            raise ValueError(f"回放速度必须在{MIN_SPEED}到{MAX_SPEED}之间")
+        return TimestampScheduler(speed, hold_interval=interval, spin_seconds=spin_seconds)
+    if mode == 'asap':
+        return AsapScheduler(hold_interval=interval)
+    raise ValueError(f"未知的发送模式: {mode}")
+
+
+class LatenessStats:
+    """
+    统计数据包相对截止时间的延迟
+
+    window 大于0时另外保留最近 window 个样本（samples），用于在发送结束后计算
+    整次发送的分位数；SendCounters.lateness 只保存当前采样间隔的样本，会被
+    MetricsMonitor 取走。
+    """
+
+    def __init__(self, window=0):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.samples = deque(maxlen=window) if window > 0 else None
+
+    def add(self, lateness_ns):
+        self.count += 1
+        self.total_ns += lateness_ns
+        if lateness_ns > self.max_ns:
+            self.max_ns = lateness_ns
+        if self.samples is not None:
+            self.samples.append(lateness_ns)
+
+    @property
+    def mean_ns(self):
+        return self.total_ns / self.count if self.count else 0.0
@@ -0,0 +1,181 @@
+"""
+列类型推断模块
+
+逐块扫描数据表，为每个数据列推断不损失信息的最紧凑类型：
+    - 只有 0/1 的列（布尔值）-> uint8
+    - 全部为整数值的列 -> 能容纳最小值和最大值的最窄整数类型
+    - 转换为 float32 后数值不变的列 -> float32
+    - 其他列 -> float64
+含有空单元格的列不推断为整数类型（整数列会把空单元格当作无效值发送0），
+已声明为定点数的列保留原声明。
+
+    inference = infer_schema(config)
+    print("\n".join(schema_report(inference, config)))
+    config_text = column_types_text(inference.column_types(config), config.int_columns)
+"""
+
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from packet_codec import DEFAULT_COLUMN_TYPE, INT_COLUMN_TYPE, ColumnType
+from replay_file import is_replay_file
+from sheet_reader import SheetReader
+
+# 整数候选类型：按字节数从小到大，同样宽度时非负列用无符号类型
+INTEGER_CANDIDATES = [('uint8', 'int8'), ('uint16', 'int16'), ('uint32', 'int32'), ('uint64', 'int64')]
+
+
+class ColumnStats:
+    """一列数据的累计统计，可以逐块更新"""
+
+    def __init__(self):
+        self.count = 0  # 可以解析为数值的单元格个数
+        self.missing = 0  # 空单元格个数
+        self.unparsed = 0  # 无法解析为数值的单元格个数
+        self.integral = True  # 所有数值都是有限的整数值
+        self.float32_exact = True  # 所有数值转换为 float32 后不变
+        self.minimum = None
+        self.maximum = None
+
+    def update(self, series):
+        """加入一块数据"""
+        present = series.notna().to_numpy(dtype=bool)
+        if series.dtype.kind in 'biu':
+            # 整数列直接取最小/最大值，int64/uint64 不经过 double 而损失精度
+            if present.any():
+                self._update_range(int(series.min()), int(series.max()))
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        elif series.dtype.kind == 'f':
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+            # 与编码器一致：to_numeric 无法识别的单元格再逐个用 float() 尝试
+            raw_values = series.to_numpy(dtype=object)
+            for pos in np.flatnonzero(np.isnan(values) & present):
+                try:
+                    values[pos] = float(raw_values[pos])
+                except (TypeError, ValueError):
+                    pass
+
+        parsed = ~np.isnan(values)
+        self.missing += int((~present).sum())
+        self.unparsed += int((present & ~parsed).sum())
+        values = values[parsed]
+        self.count += len(values)
+        if not len(values):
+            return
+
+        finite = np.isfinite(values)
+        if self.integral:
+            self.integral = bool(finite.all()) and bool((np.trunc(values) == values).all())
+        if self.float32_exact:
+            with np.errstate(over='ignore'):
+                self.float32_exact = bool((values.astype(np.float32) == values).all())
+        if series.dtype.kind not in 'biu' and finite.any():
+            self._update_range(values[finite].min(), values[finite].max())
+
+    def _update_range(self, minimum, maximum):
+        self.minimum = minimum if self.minimum is None else min(self.minimum, minimum)
+        self.maximum = maximum if self.maximum is None else max(self.maximum, maximum)
+
+    def infer(self):
+        """返回 (推断的 ColumnType, 原因)"""
+        if self.count == 0:
+            return DEFAULT_COLUMN_TYPE, "没有数值"
+        if self.integral and not self.missing:
+            for unsigned, signed in INTEGER_CANDIDATES:
+                column_type = ColumnType(unsigned if self.minimum >= 0 else signed)
+                low, high = column_type.limits
+                if low <= self.minimum and self.maximum <= high:
+                    if self.minimum >= 0 and self.maximum <= 1:
+                        return column_type, "布尔值"
+                    return column_type, f"整数 {int(self.minimum)} ~ {int(self.maximum)}"
+        if self.float32_exact:
+            return ColumnType('float32'), "float32可精确表示"
+        if self.integral:
+            return DEFAULT_COLUMN_TYPE, "含空单元格的整数列"
+        return DEFAULT_COLUMN_TYPE, "需要double精度"
+
+
+class SchemaInference:
+    """按数据块累计各数据列的统计并推断列类型"""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.stats = {col: ColumnStats() for col in self.columns[1:]}  # 第一列是时间戳
+        self.rows = 0
+
+    def update(self, frame):
+        """加入一块数据（列与 columns 一致的 DataFrame）"""
+        for col, stats in self.stats.items():
+            stats.update(frame[col])
+        self.rows += len(frame)
+
+    def infer(self, config=None):
+        """
+        返回 {列名: (ColumnType, 原因)}
+
+        给出 config 时，其中声明为定点数的列保留原声明（定点数本身就是有损的，
+        由使用者有意选择）。
+        """
+        declared = dict(config.column_types) if config is not None else {}
+        result = {}
+        for col, stats in self.stats.items():
+            if col in declared and declared[col].is_fixed:
+                result[col] = (declared[col], "保留定点数声明")
+            else:
+                result[col] = stats.infer()
+        return result
+
+    def column_types(self, config=None):
+        """返回 {列名: ColumnType}"""
+        return {col: column_type for col, (column_type, _) in self.infer(config).items()}
+
+
+def infer_schema(config):
+    """读取配置中的数据文件的全部数据行，返回 SchemaInference"""
+    if is_replay_file(config.file_path):
+        raise ValueError("回放文件中的数据已经编码，无法推断列类型")
+    reader = SheetReader(config.file_path, config.sheet_name, config.data_start_row)
+    inference = SchemaInference(reader.columns)
+    for chunk in reader:
+        inference.update(chunk)
+    return inference
+
+
+def column_types_text(column_types, int_columns=()):
+    """
+    推断结果 -> 配置中 column_types 的文本（每行 列名=类型）
+
+    只列出与整数列名/默认double不同的列。
+    """
+    int_columns = set(int_columns)
+    lines = []
+    for col, column_type in column_types.items():
+        default = INT_COLUMN_TYPE if col in int_columns else DEFAULT_COLUMN_TYPE
+        if column_type != default:
+            lines.append(f"{col}={column_type}")
+    return "\n".join(lines)
+
+
+def schema_report(inference, config):
+    """与配置中当前的数据包格式比较，返回报告文本行"""
+    current = config.create_codec(inference.columns)
+    proposed = replace(config, column_types=tuple(inference.column_types(config).items())).create_codec(
+        inference.columns)
+    lines = [f"列类型推断: {inference.rows} 行, {len(inference.stats)} 个数据列"]
+    for col, (column_type, reason) in inference.infer(config).items():
+        stats = inference.stats[col]
+        mark = "*" if column_type != current.type_of(col) else " "
+        notes = [reason]
+        if stats.missing:
+            notes.append(f"{stats.missing} 个空单元格")
+        if stats.unparsed:
+            notes.append(f"{stats.unparsed} 个无法解析的值")
+        lines.append(f"{mark} {col}: {current.type_of(col)} -> {column_type} ({', '.join(notes)})")
+    saved = current.packet_size - proposed.packet_size
+    lines.append(f"数据包大小: 当前 {current.packet_size} 字节 -> 推断 {proposed.packet_size} 字节"
+                 f" (减少 {saved} 字节, {saved / current.packet_size:.1%})")
+    return lines
@@ -0,0 +1,604 @@
+"""
+发送引擎模块
+
+与图形界面无关的发送逻辑：读取/编码数据、调度和发送。配置在启动前
+解析为不可变的 SenderConfig 快照，工作线程不再访问任何 Tk 变量，因此
+既可以由界面驱动，也可以在无显示器的服务器上通过 run.py 命令行运行。
+
+引擎通过 on_event 回调报告事件，事件格式与界面消息队列一致：
+    {'type': 'log' | 'status', 'content': 文本}
+    {'type': 'complete', 'data': 统计信息}
+
+发送进度不通过事件逐包报告，而是由工作线程累加 SendCounters 中的计数，
+界面/命令行按自己的节奏定时采样。
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from metrics import DEFAULT_METRICS_INTERVAL, LATENESS_WINDOW, MetricsMonitor, create_metrics_writer, lateness_percentiles
+from packet_codec import BYTE_ORDERS, ColumnType, PacketCodec, PacketStamper
+from parallel_encoder import compile_replay_parallel, create_encode_pool, encode_chunks_shared
+from replay_file import ReplayFile, compile_replay_file, is_replay_file, iter_replay_packets, replay_codec
+from scheduler import DEFAULT_SPIN_SECONDS, MAX_SPEED, MIN_SPEED, SEND_MODES, LatenessStats, create_scheduler
+from sheet_reader import SheetReader, prefetch
+from transport import DEFAULT_BATCH_SIZE, DEFAULT_MULTICAST_TTL, FanoutTransport
+
+
+def parse_hex(text, name):
+    """解析十六进制字符串（允许空格和0x前缀）"""
+    text = str(text).replace(" ", "").replace("0x", "").replace("0X", "")
+    if len(text) % 2 != 0:
+        raise ValueError(f"{name}十六进制长度必须是偶数")
+    return bytes.fromhex(text)
+
+
+def parse_int_columns(text):
+    """解析每行一个的整数列名"""
+    return tuple(line.strip() for line in str(text).split('\n') if line.strip())
+
+
+def parse_column_types(text):
+    """解析每行一个的列类型（列名=类型[:比例[:偏移]]），返回 ((列名, ColumnType), ...)"""
+    column_types = []
+    for line in parse_int_columns(text):
+        column, sep, spec = line.rpartition('=')
+        if not sep or not column.strip():
+            raise ValueError(f"列类型格式应为 列名=类型: {line}")
+        column_types.append((column.strip(), ColumnType.parse(spec)))
+    return tuple(column_types)
+
+
+def parse_bool(value):
+    """解析配置中的开关（'1'/'0'、'true'/'false' 或布尔值）"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def parse_destinations(text):
+    """解析每行一个的附加目标（IP:端口）"""
+    destinations = []
+    for line in parse_int_columns(text):
+        ip, sep, port = line.rpartition(':')
+        if not sep or not ip or not port.strip().isdigit() or not 0 < int(port) < 65536:
+            raise ValueError(f"目标地址格式应为 IP:端口: {line}")
+        destinations.append((ip.strip(), int(port)))
+    return tuple(destinations)
+
+
+@dataclass(frozen=True)
+class SenderConfig:
+    """发送配置快照（不可变），字段与界面/配置文件一一对应"""
+
+    file_path: str
+    sheet_name: str = 'A'
+    data_start_row: int = 2
+    target_ip: str = '127.0.0.1'
+    target_port: int = 5005
+    send_interval: float = 0.1
+    send_mode: str = 'interval'
+    replay_speed: float = 1.0
+    prefix: bytes = b'\x55\xAA\x00\x00'
+    suffix: bytes = b'\x00\x00'
+    int_columns: tuple = ()
+    column_types: tuple = ()  # ((列名, ColumnType), ...)，优先于 int_columns
+    log_file: str = ''
+    destinations: tuple = ()  # 附加目标 ((IP, 端口), ...)，与主目标同时发送
+    multicast_ttl: int = DEFAULT_MULTICAST_TTL
+    multicast_interface: str = ''
+    encode_workers: int = 0  # 并行编码进程数，0或1表示在读取线程中编码
+    sequence_header: bool = False  # 是否在数据包中加入序号和发送时间
+    byte_order: str = 'big'  # 数值字段的字节序: big / little
+    align: bool = False  # 是否按C结构体的规则自然对齐各字段
+    metrics_file: str = ''  # 定期写入发送指标的文件（.prom 为Prometheus文本格式，其他为CSV）
+    metrics_interval: float = DEFAULT_METRICS_INTERVAL
+
+    @classmethod
+    def from_dict(cls, config):
+        """从配置字典（save_config / config_example.json 的格式）创建并校验配置"""
+        data_start_row = int(config.get('data_start_row', 2))
+        if data_start_row < 1:
+            raise ValueError("数据起始行必须大于0")
+        target_port = int(config.get('target_port', 5005))
+        if not 0 < target_port < 65536:
+            raise ValueError("目标端口必须在1到65535之间")
+        send_interval = float(config.get('send_interval', 0.1))
+        if send_interval < 0:
+            raise ValueError("发送间隔不能为负数")
+        send_mode = config.get('send_mode', 'interval')
+        if send_mode not in SEND_MODES:
+            raise ValueError(f"未知的发送模式: {send_mode}")
+        replay_speed = float(config.get('replay_speed', 1.0))
+        if send_mode == 'timestamp' and not MIN_SPEED <= replay_speed <= MAX_SPEED:
+            raise ValueError(f"回放速度必须在{MIN_SPEED}到{MAX_SPEED}之间")
+        multicast_ttl = int(config.get('multicast_ttl', DEFAULT_MULTICAST_TTL))
+        if not 0 <= multicast_ttl <= 255:
+            raise ValueError("组播TTL必须在0到255之间")
+        encode_workers = int(config.get('encode_workers', 0))
+        if encode_workers < 0:
+            raise ValueError("编码进程数不能为负数")
+        byte_order = config.get('byte_order', 'big')
+        if byte_order not in BYTE_ORDERS:
+            raise ValueError(f"未知的字节序: {byte_order}（应为 big 或 little）")
+        metrics_interval = float(config.get('metrics_interval', DEFAULT_METRICS_INTERVAL))
+        if metrics_interval <= 0:
+            raise ValueError("指标采样间隔必须大于0")
+
+        return cls(
+            file_path=config.get('file_path', ''),
+            sheet_name=config.get('sheet_name', 'A'),
+            data_start_row=data_start_row,
+            target_ip=config.get('target_ip', '127.0.0.1'),
+            target_port=target_port,
+            send_interval=send_interval,
+            send_mode=send_mode,
+            replay_speed=replay_speed,
+            prefix=parse_hex(config.get('prefix_hex', '55AA0000'), "前缀"),
+            suffix=parse_hex(config.get('suffix_hex', '0000'), "后缀"),
+            int_columns=parse_int_columns(config.get('int_columns', '')),
+            column_types=parse_column_types(config.get('column_types', '')),
+            log_file=config.get('log_file', ''),
+            destinations=parse_destinations(config.get('destinations', '')),
+            multicast_ttl=multicast_ttl,
+            multicast_interface=config.get('multicast_interface', ''),
+            encode_workers=encode_workers,
+            sequence_header=parse_bool(config.get('sequence_header', False)),
+            byte_order=byte_order,
+            align=parse_bool(config.get('align', False)),
+            metrics_file=config.get('metrics_file', ''),
+            metrics_interval=metrics_interval,
+        )
+
+    def to_dict(self):
+        """转换为配置文件格式"""
+        return {
+            'file_path': self.file_path,
+            'sheet_name': self.sheet_name,
+            'data_start_row': str(self.data_start_row),
+            'target_ip': self.target_ip,
+            'target_port': str(self.target_port),
+            'send_interval': str(self.send_interval),
+            'send_mode': self.send_mode,
+            'replay_speed': str(self.replay_speed),
+            'prefix_hex': self.prefix.hex().upper(),
+            'suffix_hex': self.suffix.hex().upper(),
+            'int_columns': '\n'.join(self.int_columns),
+            'column_types': '\n'.join(f"{col}={column_type}" for col, column_type in self.column_types),
+            'log_file': self.log_file,
+            'destinations': '\n'.join(f"{ip}:{port}" for ip, port in self.destinations),
+            'multicast_ttl': str(self.multicast_ttl),
+            'multicast_interface': self.multicast_interface,
+            'encode_workers': str(self.encode_workers),
+            'sequence_header': '1' if self.sequence_header else '0',
+            'byte_order': self.byte_order,
+            'align': '1' if self.align else '0',
+            'metrics_file': self.metrics_file,
+            'metrics_interval': str(self.metrics_interval),
+        }
+
+    @property
+    def all_destinations(self):
+        """主目标加附加目标"""
+        return ((self.target_ip, self.target_port),) + self.destinations
+
+    def create_codec(self, columns):
+        """按本配置的数据包格式为给定列创建编码器"""
+        return PacketCodec(columns, self.int_columns, self.prefix, self.suffix, self.sequence_header,
+                           dict(self.column_types), self.byte_order, self.align)
+
+
+def compile_replay(config, filename, on_event=None):
+    """按配置读取并编码数据，写入回放文件，返回数据包数量"""
+    reader = SheetReader(config.file_path, config.sheet_name, config.data_start_row)
+    codec = config.create_codec(reader.columns)
+    source = {
+        'file_path': config.file_path,
+        'sheet_name': config.sheet_name,
+        'data_start_row': config.data_start_row
+    }
+    invalid_totals = {}
+
+    def on_encoded(packets):
+        merge_invalid(invalid_totals, packets)
+
+    start_time = time.time()
+    if config.encode_workers > 1:
+        count = compile_replay_parallel(prefetch(iter(reader)), codec, filename, source, config.encode_workers,
+                                        on_encoded)
+    else:
+        count = compile_replay_file(prefetch(iter(reader)), codec, filename, source, on_encoded)
+    if on_event is not None:
+        for col, (invalid_count, first_row) in invalid_totals.items():
+            on_event({'type': 'log', 'content': f"列 {col}: 共 {invalid_count:,} 个无法转换的值已按0写入，首次出现于行 {first_row}"})
+        on_event({'type': 'log', 'content': f"回放文件已生成: {filename}，共 {count} 个数据包，耗时 {time.time() - start_time:.2f} 秒"})
+    return count
+
+
+def merge_invalid(invalid_totals, packets):
+    """将一个数据块的无效值报告累计到 {列名: [个数, 首个无效行]}，返回本块中首次出现的列"""
+    new_columns = []
+    for col, (count, first_row) in packets.invalid.items():
+        if col not in invalid_totals:
+            invalid_totals[col] = [0, first_row]
+            new_columns.append(col)
+        invalid_totals[col][0] += count
+    return new_columns
+
+
+def encode_chunks(codec, chunks, encoder, depth=2):
+    """在共享的编码线程池中编码数据块，按原顺序产出，最多同时提交 depth+1 块"""
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(encoder.submit(codec.encode_frame, chunk))
+            if len(pending) > depth:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+class DetailLog:
+    """详细日志文件：记录全部日志以及逐个单元格/逐次发送的错误明细"""
+
+    def __init__(self, file_path):
+        self.file = open(file_path, 'a', encoding='utf-8', buffering=1 << 16)
+
+    def write(self, content):
+        self.file.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {content}\n")
+
+    def close(self):
+        self.file.close()
+
+
+class SendCounters:
+    """
+    发送计数器
+
+    工作线程直接累加各计数（单个属性赋值在GIL下是原子的，无需加锁），不再为
+    每个数据包向消息队列投递消息。progress() 随时读取当前计数；sample() 计算
+    自上次采样以来的速率和调度延迟分位数，只由 MetricsMonitor 定期调用。
+    """
+
+    def __init__(self):
+        self.sent = 0          # 成功发送的数据包
+        self.skipped = 0       # 因发送失败而跳过的数据包
+        self.errors = 0        # 发送错误次数
+        self.bytes_sent = 0    # 成功发送的字节数
+        self.current_row = 0   # 已处理到的数据行（从0开始计数）
+        self.total = None      # 预计总数据包数量（未知时为None）
+        self.encoded = 0       # 已编码的数据包
+        self.encode_seconds = 0.0  # 编码这些数据包的总耗时
+        self.destinations = []  # 各目标的计数（transport.Destination）
+        self.lateness = deque(maxlen=LATENESS_WINDOW)  # 本采样间隔内的调度延迟（纳秒）
+        self._last_time = time.perf_counter()
+        self._last_sent = 0
+        self._last_bytes = 0
+
+    def add_encoded(self, packets):
+        """累计一个数据块的编码耗时"""
+        self.encoded += len(packets)
+        self.encode_seconds += packets.encode_seconds
+
+    def progress(self):
+        """当前计数和进度"""
+        total = max(self.total or 0, self.current_row)
+        return {
+            'sent': self.sent,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'bytes_sent': self.bytes_sent,
+            'current_row': self.current_row,
+            'total': total,
+            'progress': (self.current_row / total) * 100 if total else 0.0,
+            'destinations': [(d.name, d.sent, d.errors) for d in self.destinations],
+        }
+
+    def sample(self):
+        """
+        采样当前计数，在 progress() 的基础上加入自上次采样以来的发送速率（包/秒、
+        字节/秒）、调度延迟的 p50/p99/最大值（毫秒）和平均每包编码耗时（微秒）
+        """
+        now = time.perf_counter()
+        stats = self.progress()
+        elapsed = now - self._last_time
+        # 换一个新的延迟窗口；工作线程之后的样本写入新窗口
+        window, self.lateness = self.lateness, deque(maxlen=LATENESS_WINDOW)
+        stats['rate'] = (stats['sent'] - self._last_sent) / elapsed if elapsed > 0 else 0.0
+        stats['bytes_rate'] = (stats['bytes_sent'] - self._last_bytes) / elapsed if elapsed > 0 else 0.0
+        stats['lateness_p50'], stats['lateness_p99'], stats['lateness_max'] = lateness_percentiles(window)
+        stats['encode_us'] = self.encode_seconds / self.encoded * 1e6 if self.encoded else 0.0
+        self._last_time, self._last_sent, self._last_bytes = now, stats['sent'], stats['bytes_sent']
+        return stats
+
+
+class SenderEngine:
+    """
+    发送引擎
+
+    run() 在当前线程中发送直到完成或被停止，start() 在后台线程中运行。
+    pause()/resume()/stop() 可以从任意线程调用。
+
+    encoder 为共享的编码线程池（concurrent.futures.Executor），为空时在读取线程中编码，
+    配置了 encode_workers 时则在发送期间使用自己的编码进程池；
+    spin_seconds 为调度器的自旋等待时长，多个引擎同时运行时应设为0；
+    batch_size 为尽快发送模式下每次提交的数据包数量（Linux: sendmmsg），1 表示逐包发送。
+    """
+
+    def __init__(self, config, on_event=None, encoder=None, spin_seconds=DEFAULT_SPIN_SECONDS,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        self.config = config
+        self.on_event = on_event or (lambda event: None)
+        self.encoder = encoder
+        self.spin_seconds = spin_seconds
+        self.batch_size = batch_size
+        self.pause_flag = threading.Event()
+        self.stop_flag = threading.Event()
+        self.thread = None
+        self.result = None
+        self.counters = SendCounters()
+        self.codec = None       # 当前数据源的编码器（open_chunks 之后有效）
+        self.monitor = None
+        self.detail_log = None
+        self.send_errors = {}  # {错误信息: 次数}
+
+    def emit(self, event):
+        self.on_event(event)
+
+    def log(self, content):
+        if self.detail_log is not None:
+            self.detail_log.write(content)
+        self.emit({'type': 'log', 'content': content})
+
+    def detail(self, content):
+        """只写入详细日志文件的消息"""
+        if self.detail_log is not None:
+            self.detail_log.write(content)
+
+    def on_transport_error(self, destination, error):
+        """某个目标发送失败"""
+        self.counters.errors += 1
+        self.record_send_error(f"{destination.name}: {error}")
+
+    def record_send_error(self, error):
+        """汇总发送错误：每种错误只在界面上报告第一次，其余只计数"""
+        message = str(error)
+        count = self.send_errors.get(message, 0) + 1
+        self.send_errors[message] = count
+        if count == 1:
+            self.log(f"发送错误: {message}（后续相同错误只计数）")
+        else:
+            self.detail(f"发送错误: {message}")
+
+    def record_invalid_cells(self, packets):
+        """将无法转换的单元格明细写入详细日志文件"""
+        if self.detail_log is None:
+            return
+        for col, (rows, values) in packets.invalid_cells.items():
+            for row, value in zip(rows, values):
+                self.detail_log.write(f"[行: {row}] 处理值 {value} (列: {col}) 时出错，已按0发送")
+
+    def start(self):
+        """在后台线程中开始发送"""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def pause(self):
+        self.pause_flag.set()
+
+    def resume(self):
+        self.pause_flag.clear()
+
+    def stop(self):
+        self.stop_flag.set()
+        self.pause_flag.set()  # 确保暂停
+
+    @property
+    def is_paused(self):
+        return self.pause_flag.is_set()
+
+    def start_monitor(self, loop=None):
+        """
+        开始采样发送指标；配置了指标文件时定时采样并写入文件
+
+        loop 为 asyncio 事件循环时在事件循环中定时采样，否则使用后台线程；
+        没有指标文件时不启动线程，由 sample() 按采样间隔按需采样。
+        """
+        writer = create_metrics_writer(self.config.metrics_file) if self.config.metrics_file else None
+        self.monitor = MetricsMonitor(self.counters, self.config.metrics_interval, writer,
+                                      on_error=lambda e: self.log(f"写入指标文件失败，停止写入: {e}"))
+        self.monitor.start(loop)
+
+    def stop_monitor(self):
+        if self.monitor is not None:
+            self.monitor.stop()
+
+    def sample(self):
+        """当前计数加上最近一次采样的速率、延迟和编码耗时，可从任意线程调用"""
+        stats = dict(self.monitor.poll()) if self.monitor is not None else self.counters.sample()
+        stats.update(self.counters.progress())
+        return stats
+
+    def open_chunks(self, background=True):
+        """
+        打开数据源，返回 (数据包块的迭代器, 预计数据包数量)
+
+        background 为 True 时在后台线程中提前读取和编码；为 False 时返回普通生成器，
+        由调用方决定在哪个线程中取下一块。
+        """
+        config = self.config
+        if not os.path.exists(config.file_path):
+            raise FileNotFoundError(f"文件不存在: {config.file_path}")
+        if is_replay_file(config.file_path):
+            # 回放文件：直接从映射内存发送已编码的数据包
+            replay = ReplayFile(config.file_path)
+            self.codec = replay_codec(replay.header)
+            return iter_replay_packets(replay), len(replay.packets)
+        # 流式读取Excel文件：先读表头，数据行在后台线程中逐块读取并编码
+        reader = SheetReader(config.file_path, config.sheet_name, config.data_start_row)
+        codec = self.codec = config.create_codec(reader.columns)
+        if not background:
+            return (codec.encode_frame(chunk) for chunk in reader), reader.total_rows
+        if self.encoder is not None:
+            depth = max(config.encode_workers, 2)
+            if isinstance(self.encoder, ProcessPoolExecutor):
+                # 编码进程把数据包写入主进程映射的内存块，不经 pickle 传回
+                chunks = encode_chunks_shared(codec, reader, self.encoder, depth)
+            else:
+                chunks = encode_chunks(codec, reader, self.encoder, depth)
+            return prefetch(chunks), reader.total_rows
+        return prefetch(codec.encode_frame(chunk) for chunk in reader), reader.total_rows
+
+    def create_stamper(self):
+        """数据包带有序号头部时创建写入序号和发送时间的 PacketStamper，否则返回 None"""
+        if self.codec is None or not self.codec.sequence_header:
+            return None
+        self.log("数据包带有序号和发送时间头部")
+        return PacketStamper(self.codec.header_offset, byte_order=self.codec.byte_order)
+
+    def note_invalid(self, packets, invalid_totals):
+        """累计一个数据块中无法转换的值，每列第一次出现时报告"""
+        for col in merge_invalid(invalid_totals, packets):
+            self.log(f"列 {col}: 存在无法转换的值（按0发送），首次出现于行 {invalid_totals[col][1]}")
+        self.record_invalid_cells(packets)
+
+    def summarize(self, invalid_totals, destinations, total_records, start_time, lateness):
+        """
+        输出汇总日志，返回统计信息
+
+        lateness 为整次发送的 LatenessStats；延迟分位数按其保留的最近样本计算（毫秒）。
+        """
+        for col, (count, first_row) in invalid_totals.items():
+            self.log(f"列 {col}: 共 {count:,} 个无法转换的值已按0发送，首次出现于行 {first_row}")
+        for message, count in self.send_errors.items():
+            self.log(f"发送错误 \"{message}\": 共 {count:,} 次")
+        if len(destinations) > 1:
+            for destination in destinations:
+                self.log(f"目标 {destination.name}: 已发送 {destination.sent} 个数据包, 错误 {destination.errors} 次")
+
+        lateness_p50, lateness_p99, _ = lateness_percentiles(lateness.samples or ())
+        return {
+            'total_sent': self.counters.sent,
+            'skipped': self.counters.skipped,
+            'total_records': total_records,
+            'elapsed': time.time() - start_time,
+            'lateness_mean': lateness.mean_ns / 1e6,
+            'lateness_max': lateness.max_ns / 1e6,
+            'lateness_p50': lateness_p50,
+            'lateness_p99': lateness_p99,
+            'destinations': [(d.name, d.sent, d.errors) for d in destinations]
+        }
+
+    def run(self):
+        """发送数据直到完成或停止，返回统计信息"""
+        config = self.config
+        counters = self.counters
+        transport = None
+        pool = None
+        try:
+            if config.log_file:
+                self.detail_log = DetailLog(config.log_file)
+            self.start_monitor()
+            if config.encode_workers > 1 and self.encoder is None and not is_replay_file(config.file_path):
+                pool = self.encoder = create_encode_pool(config.encode_workers)
+            # 目标地址只解析一次；尽快发送模式下批量提交（Linux: sendmmsg）
+            batch_size = self.batch_size if config.send_mode == 'asap' else 1
+            transport = FanoutTransport(config.all_destinations, batch_size, config.multicast_ttl,
+                                        config.multicast_interface, on_error=self.on_transport_error)
+            counters.destinations = transport.destinations
+            if len(transport.destinations) > 1:
+                self.log(f"发送目标: {', '.join(d.name for d in transport.destinations)}")
+            scheduler = create_scheduler(config.send_mode, config.send_interval, config.replay_speed,
+                                         self.spin_seconds)
+
+            self.emit({'type': 'status', 'content': '正在读取文件...'})
+            chunks, estimated_records = self.open_chunks()
+            transport.stamper = self.create_stamper()
+            counters.total = estimated_records
+            if estimated_records is not None:
+                self.log(f"开始发送数据，预计 {estimated_records} 条记录...")
+            else:
+                self.log("开始发送数据...")
+            self.emit({'type': 'status', 'content': '正在发送...'})
+
+            invalid_totals = {}
+            last_packet = None
+            total_records = 0
+            start_time = time.time()
+            lateness = LatenessStats(LATENESS_WINDOW)
+
+            try:
+                for packets in chunks:
+                    total_records += len(packets)
+                    scheduler.feed(packets.timestamps, packets.invalid_timestamps)
+                    self.note_invalid(packets, invalid_totals)
+                    counters.add_encoded(packets)
+                    packet_size = packets.packet_size
+
+                    sent_count = 0
+                    while sent_count < len(packets) and not self.stop_flag.is_set():
+                        if transport.batch_size > 1 and not self.pause_flag.is_set():
+                            count = min(transport.batch_size, len(packets) - sent_count)
+                            # 所有目标都发送失败的数据包被跳过
+                            sent = transport.send_batch(packets, sent_count, count)
+                            sent_count += count
+                            counters.sent += sent
+                            counters.bytes_sent += sent * packet_size
+                            counters.skipped += count - sent
+                            counters.current_row = total_records - len(packets) + sent_count
+                            last_packet = packets[sent_count - 1]
+                            continue
+
+                        if not self.pause_flag.is_set():
+                            binary_data = last_packet = packets[sent_count]
+                            sent_count += 1
+                            counters.current_row += 1
+                            late = scheduler.wait()
+                            lateness.add(late)
+                            counters.lateness.append(late)
+                        elif last_packet is not None:
+                            # 暂停时重复发送最后一个数据包
+                            binary_data = last_packet
+                            scheduler.hold()
+                        else:
+                            scheduler.hold()
+                            continue
+
+                        if not transport.send(binary_data):
+                            counters.skipped += 1
+                        elif not self.pause_flag.is_set():
+                            counters.sent += 1
+                            counters.bytes_sent += packet_size
+
+                    if self.stop_flag.is_set():
+                        break
+            finally:
+                chunks.close()
+
+            self.result = self.summarize(invalid_totals, transport.destinations, total_records, start_time, lateness)
+        except Exception as e:
+            self.log(f"发生错误: {e}")
+            self.result = {'total_sent': 0, 'skipped': 0, 'total_records': 0, 'elapsed': 0, 'error': str(e)}
+        finally:
+            if transport is not None:
+                transport.close()
+                self.log("Socket连接已关闭")
+            self.stop_monitor()
+            if self.detail_log is not None:
+                self.detail_log.close()
+                self.detail_log = None
+            if pool is not None:
+                pool.shutdown(wait=False)
+                self.encoder = None
+
+        # 发送完成消息
+        self.emit({'type': 'complete', 'data': self.result})
+        return self.result
@@ -0,0 +1,133 @@
+"""
+多路发送会话模块
+
+在一个进程中同时运行多路相互独立的数据流（不同的文件/工作表、数据包格式、
+发送模式和目标端口），每一路有自己的 SenderEngine、调度器和发送线程，所有
+数据流共用一个编码线程池。
+
+会话文件为JSON格式（参见 session_example.json）：
+    {
+      "encoder_workers": 2,
+      "streams": [
+        {"name": "总线1", "config": "config_bus1.json", "target_port": "5005"},
+        {"name": "总线2", "file_path": "bus2.xlsx", "sheet_name": "A", ...}
+      ]
+    }
+每一路的字段与单路配置文件相同；指定 "config" 时先加载该配置文件，再用
+同一项中的其他字段覆盖。
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler import DEFAULT_SPIN_SECONDS
+from sender_engine import SenderConfig, SenderEngine
+
+# 默认编码线程数
+DEFAULT_ENCODER_WORKERS = 2
+
+
+def load_session(file_path):
+    """读取会话文件，返回 ([(名称, SenderConfig), ...], 编码线程数)"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        session = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(file_path))
+
+    streams = []
+    for i, stream in enumerate(session.get('streams', [])):
+        stream = dict(stream)
+        name = str(stream.pop('name', f"流{i + 1}"))
+        config = {}
+        if 'config' in stream:
+            with open(os.path.join(base_dir, stream.pop('config')), 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        config.update(stream)
+        try:
+            streams.append((name, SenderConfig.from_dict(config)))
+        except ValueError as e:
+            raise ValueError(f"{name}: {e}") from e
+    if not streams:
+        raise ValueError("会话中没有数据流")
+    if len({name for name, _ in streams}) != len(streams):
+        raise ValueError("数据流名称不能重复")
+    return streams, int(session.get('encoder_workers', DEFAULT_ENCODER_WORKERS))
+
+
+class SenderSession:
+    """
+    多路发送会话
+
+    各数据流的事件带上 'stream' 字段转发给 on_event，日志内容以 [名称] 开头；
+    某一路完成时发出 {'type': 'stream_complete', 'stream': 名称, 'data': 统计信息}，
+    全部完成后发出汇总的 {'type': 'complete', 'data': 统计信息}。
+    """
+
+    def __init__(self, streams, on_event=None, encoder_workers=DEFAULT_ENCODER_WORKERS):
+        """streams: [(名称, SenderConfig), ...]"""
+        self.on_event = on_event or (lambda event: None)
+        self.encoder = ThreadPoolExecutor(max_workers=max(int(encoder_workers), 1),
+                                          thread_name_prefix='encoder')
+        # 多个发送线程同时自旋等待会互相争抢GIL，造成彼此的发送抖动，因此只用 sleep 等待
+        spin_seconds = 0 if len(streams) > 1 else DEFAULT_SPIN_SECONDS
+        self.engines = {name: SenderEngine(config, self._forward(name), self.encoder, spin_seconds)
+                        for name, config in streams}
+        self.thread = None
+        self.result = None
+
+    def _forward(self, name):
+        """为某一路数据流创建事件转发函数"""
+        def forward(event):
+            if event['type'] == 'complete':
+                self.on_event({'type': 'stream_complete', 'stream': name, 'data': event['data']})
+            else:
+                self.on_event(dict(event, stream=name, content=f"[{name}] {event['content']}"))
+        return forward
+
+    def start(self):
+        """在后台线程中运行会话"""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def pause(self):
+        for engine in self.engines.values():
+            engine.pause()
+
+    def resume(self):
+        for engine in self.engines.values():
+            engine.resume()
+
+    def stop(self):
+        for engine in self.engines.values():
+            engine.stop()
+
+    def sample(self):
+        """采样每一路的发送计数"""
+        return {name: engine.sample() for name, engine in self.engines.items()}
+
+    def run(self):
+        """同时运行所有数据流直到全部完成，返回汇总统计信息"""
+        start_time = time.time()
+        try:
+            threads = [engine.start() for engine in self.engines.values()]
+            for thread in threads:
+                thread.join()
+        finally:
+            self.encoder.shutdown(wait=False)
+
+        results = {name: engine.result for name, engine in self.engines.items()}
+        self.result = {
+            'total_sent': sum(result['total_sent'] for result in results.values()),
+            'skipped': sum(result['skipped'] for result in results.values()),
+            'total_records': sum(result['total_records'] for result in results.values()),
+            'elapsed': time.time() - start_time,
+            'streams': results,
+        }
+        failed = [name for name, result in results.items() if 'error' in result]
+        if failed:
+            self.result['error'] = f"数据流发送失败: {', '.join(failed)}"
+        self.on_event({'type': 'complete', 'data': self.result})
+        return self.result
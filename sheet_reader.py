@@ -0,0 +1,353 @@
+"""
+工作表读取模块
+
+提供只读取表头的快速路径，以及基于 openpyxl 只读模式按块读取数据行的
+流式读取器，发送端无需先把整个工作表载入内存即可开始发送。
+
+除Excel外也可以直接读取上游数据处理流程产生的列式/文本文件，跳过转换为
+Excel这一步（openpyxl 解析是启动时最慢的环节）：
+    - .csv：第一行为列名，安装了 pyarrow 时用其流式解析器逐批读取，否则由
+      pandas C 解析器按块读取（列名都取自读取数据的同一个解析器）
+    - .parquet / .feather：需要安装 pyarrow，Parquet 按行组分批读取，Feather 内存映射
+    - .npy：一维结构化数组，字段名为列名（内存映射）
+    - .npz：每个一维数组是一列，数组名为列名，按保存顺序排列
+这些格式没有工作表，sheet_name 被忽略；"数据起始行"的含义与Excel相同，
+第一列同样是 H:M:S:微秒 格式的时间戳文本。
+"""
+
+import importlib
+import os
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+
+# 每块读取的行数
+DEFAULT_CHUNK_ROWS = 5000
+
+# 可以用 openpyxl 只读模式流式读取的文件类型
+STREAMING_EXTENSIONS = ('.xlsx', '.xlsm')
+
+# 非Excel数据文件: 扩展名 -> 格式
+DATA_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.feather': 'feather',
+    '.npy': 'npy',
+    '.npz': 'npz',
+}
+
+# 统计CSV行数时每次读取的字节数
+COUNT_BLOCK_SIZE = 1 << 20
+
+# pyarrow 流式解析CSV时每批读取的字节数（列类型由第一批推断）
+CSV_BLOCK_SIZE = 1 << 22
+
+
+def file_format(file_path):
+    """数据文件格式：'excel' 或 DATA_FORMATS 中的格式"""
+    return DATA_FORMATS.get(os.path.splitext(str(file_path))[1].lower(), 'excel')
+
+
+def import_pyarrow(module):
+    """导入 pyarrow 的子模块，未安装时给出安装提示"""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ImportError("读取Parquet/Feather文件需要安装 pyarrow: pip install pyarrow") from None
+
+
+def open_csv_reader(file_path):
+    """
+    安装了 pyarrow 时打开其流式CSV解析器（空字符串视为空单元格，与pandas一致），
+    否则返回None。打开时只解析第一批数据，reader.schema.names 即为列名。
+    """
+    try:
+        from pyarrow import csv
+    except ImportError:
+        return None
+    return csv.open_csv(file_path, read_options=csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+                        convert_options=csv.ConvertOptions(strings_can_be_null=True))
+
+
+def count_lines(file_path):
+    """按换行符统计文本文件的行数（最后一行没有换行符时也计入），内存占用固定"""
+    lines = 0
+    last = b'\n'
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(COUNT_BLOCK_SIZE), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    return lines + (last != b'\n')
+
+
+def read_numpy_columns(file_path):
+    """读取 .npy（结构化数组）或 .npz（每个数组一列），返回 {列名: 一维数组}"""
+    if file_format(file_path) == 'npy':
+        array = np.load(file_path, mmap_mode='r')
+        if array.dtype.names is None or array.ndim != 1:
+            raise ValueError(f"{file_path} 不是一维结构化数组，无法确定列名")
+        columns = {name: array[name] for name in array.dtype.names}
+    else:
+        with np.load(file_path) as archive:
+            columns = {name: archive[name] for name in archive.files}
+    lengths = {len(values) if values.ndim == 1 else -1 for values in columns.values()}
+    if len(lengths) > 1 or -1 in lengths:
+        raise ValueError(f"{file_path} 中的数组必须都是长度相同的一维数组")
+    return columns
+
+
+def read_header(file_path, sheet_name):
+    """只读取工作表的表头行（列式文件读取字段名），返回列名列表"""
+    kind = file_format(file_path)
+    if kind == 'csv':
+        reader = open_csv_reader(file_path)
+        if reader is not None:
+            reader.close()
+            return reader.schema.names
+        return pd.read_csv(file_path, nrows=0).columns.tolist()
+    if kind == 'parquet':
+        return import_pyarrow('pyarrow.parquet').read_schema(file_path).names
+    if kind == 'feather':
+        return import_pyarrow('pyarrow.feather').read_table(file_path, memory_map=True).column_names
+    if kind == 'npy':
+        return list(np.load(file_path, mmap_mode='r').dtype.names or ())
+    if kind == 'npz':
+        with np.load(file_path) as archive:
+            return list(archive.files)
+    return pd.read_excel(file_path, sheet_name=sheet_name, nrows=0).columns.tolist()
+
+
+class SheetReader:
+    """
+    按块读取工作表数据行
+
+    迭代时逐块返回 DataFrame，列名与 read_header 一致，索引与
+    pd.read_excel 读取整表后的行索引一致。data_start_row 的含义与界面上的
+    "数据起始行"相同（等价于 df.iloc[data_start_row-1:]）。CSV/Parquet/
+    Feather/NumPy 文件同样按块读取，行索引为数据行的序号（从0开始）。
+    """
+
+    def __init__(self, file_path, sheet_name, data_start_row=2, chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.file_path = file_path
+        self.sheet_name = sheet_name
+        self.skip_rows = max(int(data_start_row) - 1, 0)
+        self.chunk_rows = chunk_rows
+        self.format = file_format(file_path)
+        self._source = None  # 已经打开的CSV解析器、Feather 表或 NumPy 各列数组，迭代时复用
+        if self.format == 'csv':
+            # 列名取自读取数据的同一个解析器，重复/空白列名的处理与数据一致
+            self._source = open_csv_reader(file_path)
+        if self._source is not None:
+            self.columns = self._source.schema.names
+        else:
+            self.columns = read_header(file_path, sheet_name)
+        self.streaming = self.format == 'excel' and str(file_path).lower().endswith(STREAMING_EXTENSIONS)
+        if self.streaming:
+            self.total_rows = self._estimate_rows()
+        elif self.format == 'excel':
+            self.total_rows = None
+        else:
+            self.total_rows = max(self._count_rows() - self.skip_rows, 0)
+
+    def _estimate_rows(self):
+        """根据工作表尺寸估计数据行数（仅用于显示进度，可能偏大）"""
+        import openpyxl
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            max_row = workbook[self.sheet_name].max_row
+        finally:
+            workbook.close()
+        if max_row is None:
+            return None
+        return max(max_row - 1 - self.skip_rows, 0)
+
+    def _count_rows(self):
+        """非Excel文件的数据行数（CSV按换行符计数而不解析，仅用于显示进度，可能偏大）"""
+        if self.format == 'csv':
+            return max(count_lines(self.file_path) - 1, 0)
+        if self.format == 'parquet':
+            return import_pyarrow('pyarrow.parquet').ParquetFile(self.file_path).metadata.num_rows
+        if self.format == 'feather':
+            self._source = import_pyarrow('pyarrow.feather').read_table(self.file_path, memory_map=True)
+            return self._source.num_rows
+        self._source = read_numpy_columns(self.file_path)
+        return len(next(iter(self._source.values()))) if self._source else 0
+
+    def __iter__(self):
+        if self.streaming:
+            return self._iter_streaming()
+        readers = {
+            'csv': self._iter_csv,
+            'parquet': self._iter_parquet,
+            'feather': self._iter_table,
+            'npy': self._iter_numpy,
+            'npz': self._iter_numpy,
+        }
+        return readers.get(self.format, self._iter_loaded)()
+
+    def _trim(self, chunk, start):
+        """为从第 start 个数据行开始的数据块设置行索引，并去掉数据起始行之前的行"""
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        return chunk.iloc[max(self.skip_rows - start, 0):]
+
+    def _iter_csv(self):
+        """
+        逐批读取 pyarrow 流式解析器的记录批，或由 pandas C 解析器按块读取CSV
+
+        pyarrow 按第一批推断列类型，之后的数据不符合该类型（如整数列后面出现小数）
+        时从出错的那一批开始改用 pandas 读取剩余的行。
+        """
+        reader, self._source = self._source, None
+        if reader is None:
+            reader = open_csv_reader(self.file_path)
+        start = 0
+        if reader is not None:
+            import pyarrow
+            try:
+                for batch in reader:
+                    for offset in range(0, batch.num_rows, self.chunk_rows):
+                        piece = batch.slice(offset, self.chunk_rows)
+                        chunk = self._trim(piece.to_pandas(), start)
+                        start += piece.num_rows
+                        if len(chunk):
+                            yield chunk
+                return
+            except pyarrow.ArrowInvalid:
+                pass
+            finally:
+                reader.close()
+        # 按位置读取后再设置列名：重复列名不会被 pandas 改名或拒绝
+        for chunk in pd.read_csv(self.file_path, chunksize=self.chunk_rows, header=0,
+                                 names=range(len(self.columns)), skiprows=range(1, start + 1)):
+            chunk.columns = self.columns
+            rows = len(chunk)
+            chunk = self._trim(chunk, start)
+            start += rows
+            if len(chunk):
+                yield chunk
+
+    def _iter_parquet(self):
+        """按批读取Parquet文件"""
+        parquet = import_pyarrow('pyarrow.parquet').ParquetFile(self.file_path)
+        start = 0
+        for batch in parquet.iter_batches(batch_size=self.chunk_rows):
+            chunk = self._trim(batch.to_pandas(), start)
+            start += batch.num_rows
+            if len(chunk):
+                yield chunk
+
+    def _iter_table(self):
+        """从（内存映射的）Arrow表中逐块切片"""
+        table = self._source
+        if table is None:
+            table = import_pyarrow('pyarrow.feather').read_table(self.file_path, memory_map=True)
+        for start in range(self.skip_rows, table.num_rows, self.chunk_rows):
+            yield self._trim(table.slice(start, self.chunk_rows).to_pandas(), start)
+
+    def _iter_numpy(self):
+        """从 .npy/.npz 的各列数组中逐块切片（字节串列解码为文本）"""
+        columns = self._source if self._source is not None else read_numpy_columns(self.file_path)
+        total = len(next(iter(columns.values()))) if columns else 0
+        for start in range(self.skip_rows, total, self.chunk_rows):
+            stop = min(start + self.chunk_rows, total)
+            data = {}
+            for name, values in columns.items():
+                values = np.asarray(values[start:stop])
+                data[name] = values.astype(str) if values.dtype.kind == 'S' else values
+            yield pd.DataFrame(data, index=pd.RangeIndex(start, stop))
+
+    def _iter_loaded(self):
+        """不支持流式读取的格式：整表读取后再分块"""
+        df = pd.read_excel(self.file_path, sheet_name=self.sheet_name)
+        data_rows = df.iloc[self.skip_rows:]
+        self.total_rows = len(data_rows)
+        for start in range(0, len(data_rows), self.chunk_rows):
+            yield data_rows.iloc[start:start + self.chunk_rows]
+
+    def _make_chunk(self, rows, index):
+        """构造数据块，空单元格统一为NaN（与 pd.read_excel 一致）"""
+        chunk = pd.DataFrame(rows, columns=self.columns, index=index)
+        return chunk.where(chunk.notna(), np.nan).infer_objects()
+
+    def _iter_streaming(self):
+        """openpyxl 只读模式逐行读取，每满 chunk_rows 行返回一块"""
+        import openpyxl
+        width = len(self.columns)
+        blank = (None,) * width
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            rows, index = [], []
+            pending_blank = []  # 空行只有在后面还有数据时才保留（与 pandas 一致）
+            position = -1
+            for values in workbook[self.sheet_name].iter_rows(min_row=2, values_only=True):
+                position += 1
+                values = tuple(values[:width]) + (None,) * (width - len(values))
+                if values == blank:
+                    pending_blank.append(position)
+                    continue
+                for blank_position in pending_blank:
+                    if blank_position >= self.skip_rows:
+                        rows.append(blank)
+                        index.append(blank_position)
+                pending_blank.clear()
+                if position < self.skip_rows:
+                    continue
+                rows.append(values)
+                index.append(position)
+                while len(rows) >= self.chunk_rows:
+                    yield self._make_chunk(rows[:self.chunk_rows], index[:self.chunk_rows])
+                    rows, index = rows[self.chunk_rows:], index[self.chunk_rows:]
+            if rows:
+                yield self._make_chunk(rows, index)
+        finally:
+            workbook.close()
+
+
+def prefetch(iterable, depth=2):
+    """
+    在后台线程中提前生成 iterable 的元素，最多缓存 depth 个
+
+    后台线程在第一次取值时才启动。生产端的异常会在消费端重新抛出；提前关闭
+    返回的生成器会通知后台线程停止，等待它退出，并由它关闭 iterable（例如
+    释放打开的工作簿），不会在消费端停止后继续读取。
+    """
+    items = queue.Queue(maxsize=depth)
+    cancelled = threading.Event()
+
+    def put(item):
+        while not cancelled.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        try:
+            for item in iterable:
+                if not put(('item', item)):
+                    return
+            put(('done', None))
+        except BaseException as e:
+            put(('error', e))
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            kind, value = items.get()
+            if kind == 'done':
+                return
+            if kind == 'error':
+                raise value
+            yield value
+    finally:
+        cancelled.set()
+        thread.join()
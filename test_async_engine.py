@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证 asyncio 发送引擎
+
+多路数据流在同一个事件循环中发送到不同的本机端口，检查每个端口收到的内容。
+"""
+
+import csv
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from async_engine import AsyncSession
+from packet_codec import PacketCodec
+from sender_engine import SenderConfig
+
+EXAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'udp_example.xlsx')
+STREAM_COUNT = 20
+MANY_STREAMS = 50
+
+
+def test_async_session_sends_all_streams():
+    """每一路按自己的格式发送到自己的端口，且不为每一路创建线程"""
+    receivers = []
+    streams = []
+    for i in range(STREAM_COUNT):
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(1)
+        receivers.append(receiver)
+        send_mode = 'asap' if i % 2 else 'interval'
+        streams.append((f"sensor{i}", SenderConfig(
+            file_path=EXAMPLE_FILE, data_start_row=1, target_port=receiver.getsockname()[1],
+            send_interval=0.01, send_mode=send_mode, prefix=bytes([0x55, 0xAA, 0x00, i]))))
+    events = []
+    threads_before = threading.active_count()
+    try:
+        session = AsyncSession(streams, events.append, encoder_workers=2)
+        session.start()
+        session.thread.join(30)
+        result = session.result
+        frame = pd.read_excel(EXAMPLE_FILE, sheet_name='A')
+
+        assert threading.active_count() <= threads_before
+        assert 'error' not in result
+        assert result['total_sent'] == STREAM_COUNT * len(frame)
+        for receiver, (name, config) in zip(receivers, streams):
+            expected = PacketCodec(frame.columns, (), config.prefix, config.suffix).encode_frame(frame)
+            for i in range(len(frame)):
+                assert receiver.recv(65535) == bytes(expected[i])
+        assert events[-1]['type'] == 'complete'
+    finally:
+        for receiver in receivers:
+            receiver.close()
+
+
+def test_async_session_thread_count():
+    """发送期间线程数不随数据流数量增长；指标文件在事件循环中定时写入"""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    threads_before = threading.active_count()
+    peak = threads_before
+    with tempfile.TemporaryDirectory() as temp_dir:
+        metrics_file = os.path.join(temp_dir, 'metrics.csv')
+        streams = [(f"sensor{i}", SenderConfig(
+            file_path=EXAMPLE_FILE, data_start_row=1, target_port=receiver.getsockname()[1], send_interval=0.05,
+            metrics_file=metrics_file if i == 0 else '', metrics_interval=0.02)) for i in range(MANY_STREAMS)]
+        try:
+            session = AsyncSession(streams, encoder_workers=2)
+            session.start()
+            while session.thread.is_alive():
+                peak = max(peak, threading.active_count())
+                time.sleep(0.005)
+        finally:
+            receiver.close()
+        with open(metrics_file, 'r', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+
+    # 会话线程 + 编码线程池
+    assert peak <= threads_before + 1 + 2, peak
+    assert 'error' not in session.result
+    assert len(rows) > 1 and int(rows[-1]['sent']) == session.result['streams']['sensor0']['total_sent']
+
+
+def test_async_destination_counts():
+    """每个目标的发送/错误次数按实际结果统计：发送失败的目标不计入已发送，全部目标失败的数据包被跳过"""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    # 未开启 SO_BROADCAST 时发送到广播地址会立即失败
+    broadcast = ('255.255.255.255', 9)
+    port = receiver.getsockname()[1]
+    streams = [
+        ('mixed', SenderConfig(file_path=EXAMPLE_FILE, data_start_row=1, target_port=port, send_mode='asap',
+                               destinations=(broadcast,))),
+        ('failing', SenderConfig(file_path=EXAMPLE_FILE, data_start_row=1, target_ip=broadcast[0],
+                                 target_port=broadcast[1], send_mode='asap')),
+    ]
+    try:
+        session = AsyncSession(streams, encoder_workers=1)
+        session.run()
+        count = len(pd.read_excel(EXAMPLE_FILE, sheet_name='A'))
+        mixed, failing = session.result['streams']['mixed'], session.result['streams']['failing']
+
+        assert mixed['destinations'] == [(f"127.0.0.1:{port}", count, 0), ("255.255.255.255:9", 0, count)]
+        assert (mixed['total_sent'], mixed['skipped']) == (count, 0)
+        assert failing['destinations'] == [("255.255.255.255:9", 0, count)]
+        assert (failing['total_sent'], failing['skipped']) == (0, count)
+    finally:
+        receiver.close()
+
+
+if __name__ == "__main__":
+    test_async_session_sends_all_streams()
+    test_async_session_thread_count()
+    test_async_destination_counts()
+    print("测试完成！")
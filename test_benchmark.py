@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证回环性能基准测试
+
+每种发送路径用发送引擎运行小用例，检查发送/接收计数和结果字段，以及与基准结果的对比。
+"""
+
+from benchmark import ENGINES, LoopbackReceiver, build_matrix, case_key, compare_results, run_case
+
+
+def test_run_cases():
+    """每种发送路径都由发送引擎把全部数据包发送到回环接收端；固定间隔的用例统计到非零的调度延迟"""
+    with LoopbackReceiver() as receiver:
+        for case in build_matrix(column_counts=(4,), int_ratios=(0.5,), intervals=(0.0, 0.001)):
+            result = run_case(receiver, packets=200, **case)
+            assert result['sent'] == result['received'] == 200, result
+            assert result['lost'] == 0
+            assert result['packet_size'] == 4 + 8 + 2 * 4 + 2 * 8 + 2
+            assert result['packets_per_s'] > 0 and result['cpu_us_per_packet'] > 0
+            assert result['encode_seconds'] > 0
+            assert result['jitter_max_us'] > 0 and result['jitter_p99_us'] >= result['jitter_p50_us']
+            if case['interval'] > 0:
+                assert result['lateness_p99_us'] > 0 and result['lateness_max_us'] > 0, result
+            else:
+                assert result['lateness_p99_us'] is None
+
+
+def test_build_matrix_and_compare():
+    """batched 只用于尽快发送；速率下降和固定间隔用例的抖动增加超过阈值时被报告"""
+    matrix = build_matrix(column_counts=(8,), int_ratios=(0.5,), intervals=(0.0, 0.001))
+    assert [(case['engine'], case['interval']) for case in matrix] == [
+        ('per_row', 0.0), ('pre_encoded', 0.0), ('batched', 0.0), ('per_row', 0.001), ('pre_encoded', 0.001)]
+    assert set(ENGINES) == {case['engine'] for case in matrix}
+
+    baseline = [dict(case, packets_per_s=1000.0, jitter_p99_us=100.0) for case in matrix]
+    rates = [900.0, 700.0, 1000.0, 1000.0, 500.0]
+    jitters = [900.0, 100.0, 900.0, 400.0, 130.0]  # 尽快发送的抖动不参与对比；130 未超过绝对阈值
+    results = [dict(case, packets_per_s=rate, jitter_p99_us=jitter)
+               for case, rate, jitter in zip(matrix, rates, jitters)]
+    assert compare_results(results, baseline, tolerance=0.2) == [
+        (case_key(matrix[1]), 'packets_per_s', 1000.0, 700.0),
+        (case_key(matrix[3]), 'jitter_p99_us', 100.0, 400.0),
+        (case_key(matrix[4]), 'packets_per_s', 1000.0, 500.0)]
+
+
+if __name__ == "__main__":
+    test_run_cases()
+    test_build_matrix_and_compare()
+    print("测试完成！")
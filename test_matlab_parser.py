@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证MATLAB批量解析函数的生成
+
+检查生成脚本中的字段偏移与实际编码的数据包一致（按大端字节序读取）。
+"""
+
+import struct
+
+import pandas as pd
+
+from matlab_parser import column_layout, expected_rate, function_name_for, generate_batch_parser, generate_receiver_script
+from packet_codec import PacketCodec
+from sender_engine import SenderConfig
+
+COLUMNS = ['Timestamp', 'Speed_Ref_Int', 'Altitude_Double', "Pilot's_Input"]
+
+
+def test_column_layout_matches_packets():
+    """按布局中的偏移读取大端数值，得到原始数据"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA\x00\x00', b'\x00\x00')
+    frame = pd.DataFrame({'Timestamp': ['01:02:03:456789'], 'Speed_Ref_Int': [-120],
+                          'Altitude_Double': [2.5], "Pilot's_Input": [0.125]})
+    packet = bytes(codec.encode_frame(frame)[0])
+
+    values = []
+    for name, offset, dtype in column_layout(codec):
+        fmt = '>i' if dtype == 'int32' else '>d'
+        values.append(struct.unpack_from(fmt, packet, offset - 1)[0])
+    assert values == [3723, 456789, -120, 2.5, 0.125]
+
+
+def test_generate_batch_parser():
+    """生成的函数名、列名和字段解析语句"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA\x00\x00', b'\x00\x00')
+    script = generate_batch_parser(codec, function_name_for('/tmp/bus1_decode.m', 'parse_udp_batch'))
+
+    assert script.startswith("function [timestamp, data, valid, names] = bus1_decode(packets)")
+    assert "names = {'Speed_Ref_Int', 'Altitude_Double', 'Pilot''s_Input'};" in script
+    assert "data(:, 1) = decode_column(packets, 13, 'int32', need_swap);" in script
+    assert "data(:, 3) = decode_column(packets, 25, 'double', need_swap);" in script
+    assert "swapbytes" in script and "fprintf" not in script
+    assert function_name_for('/tmp/1-bad name.m', 'parse_udp_batch') == 'parse_udp_batch'
+
+
+def test_generate_receiver_script():
+    """接收脚本按数据包大小和预计速率预分配环形缓冲区，并调用批量解析函数"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA\x00\x00', b'\x00\x00')
+    config = SenderConfig(file_path='', target_ip='239.1.1.1', target_port=6000, send_interval=0.002)
+    script = generate_receiver_script(codec, config.target_port, 'receive_udp_decode', expected_rate(config),
+                                      buffer_seconds=10, multicast_group=config.target_ip)
+
+    assert "LOCAL_PORT = 6000;" in script
+    assert f"PACKET_SIZE = {codec.packet_size};" in script
+    assert "BUFFER_CAPACITY = 5000;" in script
+    assert "ring_data = zeros(BUFFER_CAPACITY, NUM_COLUMNS);" in script
+    assert "= receive_udp_decode(packets);" in script
+    assert 'configureMulticast(u, "239.1.1.1");' in script
+    assert expected_rate(SenderConfig(file_path='', send_mode='asap')) == 1000.0
+
+
+def test_column_types():
+    """紧凑类型按实际宽度解析，定点数列乘比例加偏移"""
+    codec = PacketCodec(COLUMNS, [], column_types={'Speed_Ref_Int': 'uint8', 'Altitude_Double': 'int16:0.01:-40',
+                                                   "Pilot's_Input": 'float32'})
+    script = generate_batch_parser(codec)
+
+    assert [dtype for _, _, dtype in column_layout(codec)][2:] == ['uint8', 'int16', 'single']
+    assert "data(:, 1) = decode_column(packets, 9, 'uint8', need_swap);" in script
+    assert "data(:, 2) = decode_column(packets, 10, 'int16', need_swap) * 0.01 - 40.0;" in script
+    assert "data(:, 3) = decode_column(packets, 12, 'single', need_swap);" in script
+    assert f"PACKET_SIZE = {8 + 1 + 2 + 4};" in script
+
+
+def test_byte_order_and_alignment():
+    """字段偏移包含对齐填充，小端数据包在大端主机上交换字节序"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55', b'\x0D', byte_order='little', align=True)
+    script = generate_batch_parser(codec)
+
+    assert [offset for _, offset, _ in column_layout(codec)] == [5, 9, 13, 17, 25]
+    assert "need_swap = endian == 'B';" in script
+    assert "SUFFIX_START = 33;" in script and "PACKET_SIZE = 40;" in script
+    assert "need_swap = endian == 'L';" in generate_batch_parser(PacketCodec(COLUMNS, []))
+
+
+if __name__ == "__main__":
+    test_column_layout_matches_packets()
+    test_generate_batch_parser()
+    test_generate_receiver_script()
+    test_column_types()
+    test_byte_order_and_alignment()
+    print("测试完成！")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证发送指标的采样与导出
+
+检查按采样间隔计算的速率和延迟分位数，以及CSV/Prometheus文件的内容。
+"""
+
+import csv
+import os
+import socket
+import tempfile
+import time
+
+from metrics import CsvMetricsWriter, MetricsMonitor, PrometheusMetricsWriter, format_stats
+from sender_engine import SendCounters, SenderConfig, SenderEngine
+
+EXAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'udp_example.xlsx')
+
+
+def test_sample_window():
+    """每次采样只统计自上次采样以来的调度延迟"""
+    counters = SendCounters()
+    counters.sample()
+    counters.sent, counters.bytes_sent, counters.total = 100, 3000, 200
+    counters.current_row = 100
+    counters.lateness.extend([1000000] * 99 + [5000000])
+    stats = counters.sample()
+
+    assert stats['progress'] == 50.0 and stats['rate'] > 0 and stats['bytes_rate'] > 0
+    assert stats['lateness_p50'] == 1.0 and stats['lateness_max'] == 5.0
+    assert counters.sample()['lateness_max'] == 0.0
+    assert "已发送: 100/200" in format_stats(stats) and "错误" not in format_stats(stats)
+
+
+def test_writers():
+    """CSV每次追加一行；Prometheus文件每次整体替换"""
+    counters = SendCounters()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = os.path.join(temp_dir, 'metrics.csv')
+        prom_path = os.path.join(temp_dir, 'metrics.prom')
+        for writer in (CsvMetricsWriter(csv_path), PrometheusMetricsWriter(prom_path)):
+            monitor = MetricsMonitor(counters, interval=60, writer=writer)
+            counters.sent = 7
+            monitor.sample()
+            counters.sent = 9
+            monitor.stop()
+
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        assert [row['sent'] for row in rows] == ['7', '9']
+        with open(prom_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        assert "udp_sender_packets_sent_total 9\n" in text
+        assert 'udp_sender_lateness_seconds{quantile="0.99"}' in text
+        assert not os.path.exists(prom_path + '.tmp')
+
+
+def test_monitor_without_writer():
+    """没有指标文件时不启动线程，读取时按采样间隔按需采样"""
+    counters = SendCounters()
+    monitor = MetricsMonitor(counters, interval=0.01)
+    assert monitor.start() is None and monitor.thread is None
+    counters.sent = 5
+    assert monitor.poll()['sent'] == 0
+    time.sleep(0.02)
+    assert monitor.poll()['sent'] == 5
+    monitor.stop()
+
+
+def test_engine_metrics_file():
+    """引擎发送期间写入指标文件，最后一行包含最终计数"""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        metrics_file = os.path.join(temp_dir, 'metrics.csv')
+        config = SenderConfig(file_path=EXAMPLE_FILE, data_start_row=1, target_port=receiver.getsockname()[1],
+                              send_interval=0.001, metrics_file=metrics_file, metrics_interval=0.01)
+        engine = SenderEngine(config)
+        try:
+            result = engine.run()
+        finally:
+            receiver.close()
+        with open(metrics_file, 'r', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+
+    assert int(rows[-1]['sent']) == result['total_sent']
+    assert int(rows[-1]['bytes_sent']) == result['total_sent'] * engine.codec.packet_size
+    assert float(rows[-1]['encode_us']) > 0
+    assert engine.sample()['sent'] == result['total_sent']
+
+
+if __name__ == "__main__":
+    test_sample_window()
+    test_writers()
+    test_monitor_without_writer()
+    test_engine_metrics_file()
+    print("测试完成！")
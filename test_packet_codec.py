@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证预编译数据包编码器
+
+将 PacketCodec 的输出与逐值 struct.pack 拼接的结果进行对比。
+"""
+
+import struct
+
+import numpy as np
+import pandas as pd
+
+from packet_codec import ColumnType, PacketCodec, PacketStamper
+
+COLUMNS = ['Timestamp', 'Speed_Ref_Int', 'Altitude_Double', 'Gear_Status_Int']
+INT_COLUMNS = ['Speed_Ref_Int', 'Gear_Status_Int']
+PREFIX = b'\x55\xAA\x00\x00'
+SUFFIX = b'\x00\x00'
+
+
+def build_reference_packet(total_seconds, microseconds, speed, altitude, gear):
+    """按原始逐值拼接方式构建参考数据包"""
+    return (PREFIX
+            + struct.pack('>i', total_seconds) + struct.pack('>i', microseconds)
+            + struct.pack('>i', speed) + struct.pack('>d', altitude) + struct.pack('>i', gear)
+            + SUFFIX)
+
+
+def test_pack_matches_reference():
+    """编码结果与逐值打包一致"""
+    codec = PacketCodec(COLUMNS, INT_COLUMNS, PREFIX, SUFFIX)
+    packet = codec.pack(['01:02:03:456789', 120, 10000.5, 1.0])
+
+    assert bytes(packet) == build_reference_packet(3723, 456789, 120, 10000.5, 1)
+    assert codec.packet_size == len(PREFIX) + 8 + 4 + 8 + 4 + len(SUFFIX)
+
+
+def test_pack_reuses_buffer():
+    """多次编码复用同一个缓冲区"""
+    codec = PacketCodec(COLUMNS, INT_COLUMNS, PREFIX, SUFFIX)
+    first = codec.pack(['00:00:01:0', 1, 1.0, 0])
+    second = codec.pack(['00:00:02:0', 2, 2.0, 1])
+
+    assert first is second
+    assert bytes(second) == build_reference_packet(2, 0, 2, 2.0, 1)
+
+
+def test_pack_invalid_values():
+    """无法转换的值以0代替并回调错误"""
+    codec = PacketCodec(COLUMNS, INT_COLUMNS, PREFIX, SUFFIX)
+    errors = []
+    packet = codec.pack(['bad', 'x', None, 2 ** 40], lambda col, value, e: errors.append(col))
+
+    assert bytes(packet) == build_reference_packet(0, 0, 0, 0.0, 0)
+    assert errors == COLUMNS
+
+
+def test_encode_frame_matches_pack():
+    """整表向量化编码与逐行编码结果一致"""
+    frame = pd.DataFrame({
+        'Timestamp': ['01:02:03:456789', 'bad', ' 1: 2:3:4', '1_0:0:0:0'],
+        'Speed_Ref_Int': [120, '7', 'abc', 2 ** 40],
+        'Altitude_Double': [10000.5, ' 3.5 ', float('nan'), True],
+        'Gear_Status_Int': [1, 0, 1.9, None],
+    })
+    codec = PacketCodec(COLUMNS, INT_COLUMNS, PREFIX, SUFFIX)
+    packets = codec.encode_frame(frame)
+
+    assert len(packets) == len(frame)
+    for i, row in enumerate(frame.itertuples(index=False, name=None)):
+        assert bytes(packets[i]) == bytes(codec.pack(list(row)))
+    assert packets.invalid == {'Timestamp': (1, 1), 'Speed_Ref_Int': (2, 2), 'Altitude_Double': (1, 2),
+                               'Gear_Status_Int': (1, 3)}
+
+
+def test_missing_float_cells():
+    """浮点列中的空单元格（None/NaN）在整表编码和逐行编码中都按0.0发送并记为无效值"""
+    codec = PacketCodec(COLUMNS, INT_COLUMNS, PREFIX, SUFFIX, column_types={'Gear_Status_Int': 'float32'})
+    frames = [
+        pd.DataFrame({'Timestamp': ['01:02:03:4'] * 3, 'Speed_Ref_Int': [1, 2, 3],
+                      'Altitude_Double': [1.5, np.nan, 2.5], 'Gear_Status_Int': [np.nan, 0.5, 1.0]}),
+        pd.DataFrame({'Timestamp': ['01:02:03:4'] * 3, 'Speed_Ref_Int': [1, 2, 3],
+                      'Altitude_Double': [1.5, None, '2.5'], 'Gear_Status_Int': [None, 0.5, 'nan']}),
+    ]
+    for frame in frames:
+        packets = codec.encode_frame(frame)
+        errors = []
+        for i, row in enumerate(frame.itertuples(index=False, name=None)):
+            assert bytes(packets[i]) == bytes(codec.pack(list(row), lambda col, value, e: errors.append((col, i))))
+        assert struct.unpack_from('>d', packets[1], len(PREFIX) + 12)[0] == 0.0
+        assert struct.unpack_from('>f', packets[0], len(PREFIX) + 20)[0] == 0.0
+        assert packets.invalid['Altitude_Double'] == (1, 1)
+        assert packets.invalid['Gear_Status_Int'][1] == 0
+        assert sorted(errors) == sorted((col, row) for col, (rows, _) in packets.invalid_cells.items() for row in rows)
+
+
+def test_sequence_header():
+    """序号头部位于前缀之后，编码时为0，发送前由 PacketStamper 写入"""
+    frame = pd.DataFrame({'Timestamp': ['01:02:03:456789'] * 3, 'Speed_Ref_Int': [1, 2, 3],
+                          'Altitude_Double': [0.5, 1.5, 2.5], 'Gear_Status_Int': [0, 1, 0]})
+    codec = PacketCodec(COLUMNS, INT_COLUMNS, PREFIX, SUFFIX, sequence_header=True)
+    packets = codec.encode_frame(frame)
+
+    assert codec.packet_size == PacketCodec(COLUMNS, INT_COLUMNS, PREFIX, SUFFIX).packet_size + 16
+    assert bytes(packets[0]) == bytes(codec.pack(list(frame.iloc[0])))
+    assert bytes(packets[0])[4:].startswith(b'\x00' * 16 + struct.pack('>ii', 3723, 456789))
+
+    stamper = PacketStamper(codec.header_offset, first_sequence=10)
+    stamper.stamp_batch(packets, 0, 2)
+    stamper.stamp(packets[2])
+    sequences = [struct.unpack_from('>Qq', packets[i], 4) for i in range(3)]
+    assert [sequence for sequence, _ in sequences] == [10, 11, 12]
+    assert all(send_time > 0 for _, send_time in sequences)
+    assert bytes(packets[1])[20:] == bytes(codec.pack(list(frame.iloc[1])))[20:]
+
+
+def test_column_types():
+    """按列类型紧凑编码：整数/无符号/float32/定点数，超出范围的值标记为无效"""
+    column_types = {'Speed_Ref_Int': 'uint8', 'Altitude_Double': 'int16:0.5:-100', 'Gear_Status_Int': 'float32'}
+    codec = PacketCodec(COLUMNS, INT_COLUMNS, PREFIX, SUFFIX, column_types=column_types)
+    frame = pd.DataFrame({'Timestamp': ['01:02:03:456789'] * 3, 'Speed_Ref_Int': [200, 256, -1],
+                          'Altitude_Double': [10000.5, 0.0, -100.0], 'Gear_Status_Int': [0.25, 1.0, 1e39]})
+    packets = codec.encode_frame(frame)
+
+    assert codec.packet_size == len(PREFIX) + 8 + 1 + 2 + 4 + len(SUFFIX)
+    assert bytes(packets[0]) == PREFIX + struct.pack('>iiBhf', 3723, 456789, 200, 20201, 0.25) + SUFFIX
+    assert bytes(packets[0]) == bytes(codec.pack(list(frame.iloc[0])))
+    assert packets.invalid == {'Speed_Ref_Int': (2, 1), 'Gear_Status_Int': (1, 2)}
+    assert str(codec.type_of('Altitude_Double')) == 'int16:0.5:-100'
+    assert ColumnType.parse('uint16:0.01') == ColumnType('uint16', 0.01)
+    for bad in ('int12', 'float32:2', 'int8:0', 'int8:a'):
+        try:
+            ColumnType.parse(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"未检测到无效列类型: {bad}")
+
+
+def test_uint64_precision():
+    """uint64/int64 列在 2**53 以上不经过 double：整数列、整数文本和逐行编码都精确，超出范围的值标记为无效"""
+    values = [2 ** 53 + 1, 2 ** 60 + 1, 2 ** 64 - 1]
+    codec = PacketCodec(['Timestamp', 'Count', 'Signed'], [], b'', b'',
+                        column_types={'Count': 'uint64', 'Signed': 'int64'})
+    for count in (np.array(values, dtype=np.uint64), pd.Series([str(v) for v in values], dtype=object)):
+        frame = pd.DataFrame({'Timestamp': ['01:00:00:0'] * 3, 'Count': count, 'Signed': count})
+        packets = codec.encode_frame(frame)
+        decoded = [struct.unpack_from('>Qq', packets[i], 8) for i in range(3)]
+        assert [count for count, _ in decoded] == values
+        assert [signed for _, signed in decoded] == [2 ** 53 + 1, 2 ** 60 + 1, 0]
+        assert packets.invalid == {'Signed': (1, 2)}
+        for i in range(3):
+            assert bytes(packets[i]) == bytes(codec.pack(list(frame.iloc[i])))
+
+
+def test_byte_order_and_alignment():
+    """小端 + 自然对齐：与C结构体布局一致，整表编码与逐行编码一致，序号按小端写入"""
+    codec = PacketCodec(COLUMNS, INT_COLUMNS, b'\x55\xAA\x00', b'\x0D', sequence_header=True,
+                        column_types={'Speed_Ref_Int': 'uint8'}, byte_order='little', align=True)
+    frame = pd.DataFrame({'Timestamp': ['01:02:03:456789'] * 2, 'Speed_Ref_Int': [200, 7],
+                          'Altitude_Double': [10000.5, -1.0], 'Gear_Status_Int': [1, 0]})
+    packets = codec.encode_frame(frame)
+
+    # 前缀3字节 + 5字节填充 | 序号 | 发送时间 | 秒 | 微秒 | uint8 + 7字节填充 | double | int32 | 后缀 + 3字节填充
+    expected = (b'\x55\xAA\x00' + bytes(5) + struct.pack('<QqiiB7xdi', 0, 0, 3723, 456789, 200, 10000.5, 1)
+                + b'\x0D' + bytes(3))
+    assert codec.packet_size == len(expected) == 56
+    assert (codec.header_offset, codec.suffix_offset) == (8, 52)
+    assert bytes(packets[0]) == expected == bytes(codec.pack(list(frame.iloc[0])))
+
+    PacketStamper(codec.header_offset, first_sequence=5, byte_order='little').stamp_batch(packets, 0, 2)
+    assert struct.unpack_from('<Q', packets[1], 8)[0] == 6
+    assert PacketCodec(COLUMNS, INT_COLUMNS, align=True).packet_size == 8 + 4 + 4 + 8 + 4 + 4
+    try:
+        PacketCodec(COLUMNS, INT_COLUMNS, byte_order='middle')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("未检测到无效的字节序")
+
+
+if __name__ == "__main__":
+    test_pack_matches_reference()
+    test_pack_reuses_buffer()
+    test_pack_invalid_values()
+    test_encode_frame_matches_pack()
+    test_missing_float_cells()
+    test_sequence_header()
+    test_column_types()
+    test_uint64_precision()
+    test_byte_order_and_alignment()
+    print("测试完成！")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证数据包批量解码
+
+将编码结果作为抓包数据解码，检查各列数值、前缀/后缀校验和逐包比对。
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from packet_codec import PacketCodec, PacketStamper
+from packet_decoder import PacketDecoder, find_mismatches, sequence_stats
+
+COLUMNS = ['Timestamp', 'Speed_Ref_Int', 'Altitude_Double']
+
+
+def make_packets():
+    """编码一个小数据表"""
+    frame = pd.DataFrame({
+        'Timestamp': ['01:02:03:1', '01:02:03:250000', '01:02:04:500000'],
+        'Speed_Ref_Int': [120, -5, 122],
+        'Altitude_Double': [1.5, 2.5, -3.25],
+    })
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA', b'\x0D\x0A')
+    return codec, codec.encode_frame(frame)
+
+
+def test_decode_blob():
+    """首尾相接的数据一次性解码"""
+    codec, packets = make_packets()
+    decoded = PacketDecoder(codec).decode(bytes(packets.view))
+    frame = decoded.to_frame()
+
+    assert len(decoded) == 3 and decoded.valid.all()
+    assert frame['seconds'].tolist() == [3723, 3723, 3724]
+    assert frame['microseconds'].tolist() == [1, 250000, 500000]
+    assert frame['Speed_Ref_Int'].tolist() == [120, -5, 122]
+    assert frame['Altitude_Double'].tolist() == [1.5, 2.5, -3.25]
+    assert (decoded.timestamps == packets.timestamps).all()
+    assert len(find_mismatches(decoded, packets)) == 0
+
+
+def test_decode_datagrams():
+    """逐个数据报解码：长度不符的被丢弃，前缀错误的被标记"""
+    codec, packets = make_packets()
+    corrupted = bytearray(packets[1])
+    corrupted[0] = 0x00
+    datagrams = [bytes(packets[0]), bytes(corrupted), b'\x55\xAA', bytes(packets[2])]
+    decoded = PacketDecoder(codec).decode(datagrams)
+
+    assert decoded.bad_size == 1
+    assert decoded.prefix_ok.tolist() == [True, False, True]
+    assert decoded.suffix_ok.all()
+    assert find_mismatches(decoded, packets).tolist() == [1]
+
+
+def test_sequence_header():
+    """解码序号和发送时间，统计丢包、重复和乱序"""
+    frame = pd.DataFrame({'Timestamp': ['01:02:03:1'] * 4, 'Speed_Ref_Int': [1, 2, 3, 4],
+                          'Altitude_Double': [0.5, 1.5, 2.5, 3.5]})
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA', b'\x0D\x0A', sequence_header=True)
+    packets = codec.encode_frame(frame)
+    PacketStamper(codec.header_offset).stamp_batch(packets, 0, len(packets))
+    # 第2个数据包丢失，第4个数据包先于第3个到达并重复一次
+    datagrams = [bytes(packets[i]) for i in (0, 3, 2, 3)]
+    decoded = PacketDecoder(codec).decode(datagrams)
+
+    assert decoded.sequence.tolist() == [0, 3, 2, 3]
+    assert decoded.to_frame()['Speed_Ref_Int'].tolist() == [1, 4, 3, 4]
+    assert (0 <= decoded.latency(time.time_ns())).all() and (decoded.latency(time.time_ns()) < 60).all()
+    assert sequence_stats(decoded.sequence) == {'received': 4, 'unique': 3, 'expected': 4, 'lost': 1,
+                                                'duplicates': 1, 'reordered': 1}
+    assert PacketDecoder(PacketCodec(COLUMNS, [])).decode(b'').sequence is None
+
+
+def test_sequence_stats():
+    """空输入、单个数据包、重复与丢包同时出现、uint64 序号回绕"""
+    empty = {'received': 0, 'unique': 0, 'expected': 0, 'lost': 0, 'duplicates': 0, 'reordered': 0}
+    assert sequence_stats([]) == empty
+    assert sequence_stats([42]) == {'received': 1, 'unique': 1, 'expected': 1, 'lost': 0, 'duplicates': 0,
+                                    'reordered': 0}
+    # 重复不增加 expected，也不抵消丢包
+    assert sequence_stats([5, 5, 5, 8]) == {'received': 4, 'unique': 2, 'expected': 4, 'lost': 2,
+                                            'duplicates': 2, 'reordered': 0}
+
+    top = 2 ** 64 - 1
+    wrapped = np.array([top - 1, top, 1, 0, 2], dtype=np.uint64)
+    assert sequence_stats(wrapped) == {'received': 5, 'unique': 5, 'expected': 5, 'lost': 0, 'duplicates': 0,
+                                       'reordered': 1}
+    assert sequence_stats(np.array([top, 1], dtype=np.uint64))['lost'] == 1
+
+
+def test_column_types():
+    """紧凑类型的列按原类型解码，定点数列还原为物理值"""
+    frame = pd.DataFrame({'Timestamp': ['01:02:03:1'] * 3, 'Speed_Ref_Int': [0, 65535, 7],
+                          'Altitude_Double': [-40.0, 25.37, 85.0]})
+    codec = PacketCodec(COLUMNS, [], column_types={'Speed_Ref_Int': 'uint16', 'Altitude_Double': 'int16:0.01:-40'})
+    decoded = PacketDecoder(codec).decode(bytes(codec.encode_frame(frame).view))
+
+    assert codec.packet_size == 8 + 2 + 2
+    assert decoded.column('Speed_Ref_Int').tolist() == [0, 65535, 7]
+    assert abs(decoded.column('Altitude_Double') - frame['Altitude_Double']).max() < 0.005
+
+
+def test_byte_order_and_alignment():
+    """小端、对齐的数据包按相同布局解码，后缀之后的补齐字节不影响校验"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55', b'\x0D\x0A', byte_order='little', align=True)
+    frame = pd.DataFrame({'Timestamp': ['01:02:03:1', '01:02:04:2'], 'Speed_Ref_Int': [120, -5],
+                          'Altitude_Double': [1.5, -3.25]})
+    decoded = PacketDecoder(codec).decode(bytes(codec.encode_frame(frame).view))
+
+    assert codec.packet_size == 32 and codec.suffix_offset == 24
+    assert decoded.valid.all()
+    assert decoded.to_frame()['Altitude_Double'].tolist() == [1.5, -3.25]
+    assert decoded.column('Speed_Ref_Int').tolist() == [120, -5]
+
+
+if __name__ == "__main__":
+    test_decode_blob()
+    test_decode_datagrams()
+    test_sequence_header()
+    test_sequence_stats()
+    test_column_types()
+    test_byte_order_and_alignment()
+    print("测试完成！")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证多进程并行编码
+
+并行编译的回放文件以及按顺序取回的编码结果必须与单线程编码完全一致。
+"""
+
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+from packet_codec import PacketCodec
+import parallel_encoder
+from parallel_encoder import compile_replay_parallel, create_encode_pool, encode_chunks_shared
+from replay_file import ReplayFile, compile_replay_file
+from sender_engine import merge_invalid
+
+COLUMNS = ['Timestamp', 'Speed_Ref_Int', 'Altitude_Double']
+
+
+def make_chunks(count=6):
+    """构造若干个行数不同的数据块（含无法转换的值）"""
+    chunks = []
+    for i in range(count):
+        rows = 10 + i
+        chunks.append(pd.DataFrame({
+            'Timestamp': [f"01:02:{i:02d}:{j}" for j in range(rows)],
+            'Speed_Ref_Int': list(range(rows - 1)) + ['bad'],
+            'Altitude_Double': [j * 0.5 + i for j in range(rows)],
+        }))
+    return chunks
+
+
+def test_pickle_round_trip():
+    """编码器和编码结果可以在进程间传递"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA', b'\x00')
+    packets = codec.encode_frame(make_chunks(1)[0])
+    restored = pickle.loads(pickle.dumps(packets))
+    assert bytes(restored.view) == bytes(packets.view)
+    assert restored.invalid == packets.invalid
+    assert pickle.loads(pickle.dumps(codec)).format == codec.format
+
+
+def test_parallel_compile_matches_sequential():
+    """并行编译的回放文件与单线程编译的内容一致，各块的无效值报告被传回并合并"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA', b'\x00')
+    sequential_invalid, parallel_invalid = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        sequential = os.path.join(tmp, 'sequential.udpbin')
+        parallel = os.path.join(tmp, 'parallel.udpbin')
+        count = compile_replay_file(make_chunks(), codec, sequential,
+                                    on_encoded=lambda packets: merge_invalid(sequential_invalid, packets))
+        assert compile_replay_parallel(make_chunks(), codec, parallel, workers=2,
+                                       on_encoded=lambda packets: merge_invalid(parallel_invalid, packets)) == count
+        assert parallel_invalid == sequential_invalid
+        assert parallel_invalid['Speed_Ref_Int'][0] == 6
+
+        with ReplayFile(sequential) as a, ReplayFile(parallel) as b:
+            assert bytes(a.packets.view) == bytes(b.packets.view)
+            assert (a.timestamps == b.timestamps).all()
+
+
+def test_encode_chunks_in_process_pool():
+    """进程池编码的结果经映射的内存块按原顺序产出，并带回无效值报告"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA', b'\x00')
+    with create_encode_pool(2) as pool:
+        results = list(encode_chunks_shared(codec, make_chunks(), pool, depth=2))
+    assert len(results) == len(make_chunks())
+    for packets, chunk in zip(results, make_chunks()):
+        expected = codec.encode_frame(chunk)
+        assert not isinstance(packets.data, bytes)
+        assert bytes(packets.view) == bytes(expected.view)
+        assert packets.invalid == expected.invalid
+        assert list(packets.invalid_cells) == list(expected.invalid_cells)
+        assert (packets.timestamps == expected.timestamps).all()
+
+
+def test_block_location():
+    """POSIX 下内存块优先放在 /dev/shm，没有时退回临时目录；文件删除后映射仍然可用"""
+    if os.name == 'nt':
+        return
+    original = parallel_encoder.SHM_DIR
+    try:
+        for shm_dir in (original, os.path.join(tempfile.gettempdir(), 'no_such_shm_dir')):
+            parallel_encoder.SHM_DIR = shm_dir
+            name, block = parallel_encoder._create_block(16)
+            expected_dir = shm_dir if os.path.isdir(shm_dir) else tempfile.gettempdir()
+            assert os.path.dirname(name) == expected_dir
+            parallel_encoder._release_block_name(name)
+            assert not os.path.exists(name)
+            block[:4] = b'\x01\x02\x03\x04'
+            assert bytes(block[:4]) == b'\x01\x02\x03\x04'
+    finally:
+        parallel_encoder.SHM_DIR = original
+
+
+if __name__ == "__main__":
+    test_pickle_round_trip()
+    test_parallel_compile_matches_sequential()
+    test_encode_chunks_in_process_pool()
+    test_block_location()
+    print("测试完成！")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证回放文件的编译与读取
+
+编译一个小数据表为 .udpbin 文件，再通过 mmap 读回并与直接编码的结果对比。
+"""
+
+import os
+import struct
+import tempfile
+
+import pandas as pd
+
+from packet_codec import PacketCodec, PacketStamper
+from replay_file import ReplayFile, compile_replay_file, read_replay_header, replay_codec
+
+COLUMNS = ['Timestamp', 'Speed_Ref_Int', 'Altitude_Double']
+
+
+def make_chunks():
+    """构造两个数据块"""
+    frame = pd.DataFrame({
+        'Timestamp': ['01:02:03:1', '01:02:03:2', '01:02:04:500000'],
+        'Speed_Ref_Int': [120, 121, 122],
+        'Altitude_Double': [1.5, 2.5, 3.5],
+    })
+    return [frame.iloc[:2], frame.iloc[2:]]
+
+
+def test_replay_round_trip():
+    """回放文件中的数据包、时间戳和格式与编码结果一致"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA', b'\x00')
+    chunks = make_chunks()
+    expected = b''.join(bytes(codec.encode_frame(chunk).view) for chunk in chunks)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'scenario.udpbin')
+        assert compile_replay_file(chunks, codec, path, {'sheet_name': 'A'}) == 3
+
+        header = read_replay_header(path)
+        assert header['columns'] == COLUMNS
+        assert header['int_columns'] == ['Speed_Ref_Int']
+        assert header['prefix_hex'] == '55AA'
+        assert header['source'] == {'sheet_name': 'A'}
+
+        with ReplayFile(path) as replay:
+            assert len(replay.packets) == 3
+            assert b''.join(bytes(replay.packets[i]) for i in range(3)) == expected
+            assert replay.offsets.tolist() == [0, codec.packet_size, 2 * codec.packet_size]
+            assert replay.timestamps.tolist() == [3723.000001, 3723.000002, 3724.5]
+
+
+def test_replay_layout():
+    """回放文件记录字节序和对齐方式，按头部重建的编码器格式相同"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA', b'\x00', column_types={'Speed_Ref_Int': 'uint16'},
+                        byte_order='little', align=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'scenario.udpbin')
+        compile_replay_file(make_chunks(), codec, path)
+        restored = replay_codec(read_replay_header(path))
+
+    assert (restored.byte_order, restored.align) == ('little', True)
+    assert restored.format == codec.format and restored.dtype == codec.dtype
+
+
+def test_stamp_read_only_replay():
+    """带序号头部的回放文件只读映射，序号写入暂存区中的副本，映射和文件保持不变"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA', b'\x00', sequence_header=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'scenario.udpbin')
+        compile_replay_file(make_chunks(), codec, path)
+        with open(path, 'rb') as f:
+            original = f.read()
+
+        with ReplayFile(path) as replay:
+            assert replay.packets.view.readonly
+            mapped = bytes(replay.packets.view)
+            stamper = PacketStamper(codec.header_offset, first_sequence=7)
+            stamped, start = stamper.stamp_batch(replay.packets, 1, 2)
+            sequences = [struct.unpack_from('>Q', stamped[start + i], codec.header_offset)[0] for i in range(2)]
+            assert sequences == [7, 8]
+            assert bytes(stamped[start + 1])[-9:] == bytes(replay.packets[2])[-9:]
+            single = stamper.stamp(replay.packets[0])
+            assert struct.unpack_from('>Q', single, codec.header_offset)[0] == 9
+            assert bytes(replay.packets.view) == mapped
+        with open(path, 'rb') as f:
+            assert f.read() == original
+
+
+def test_failed_compile_leaves_no_file():
+    """编译中途出错时不留下不完整的文件，已存在的回放文件保持不变"""
+    codec = PacketCodec(COLUMNS, ['Speed_Ref_Int'], b'\x55\xAA', b'\x00')
+
+    def failing_chunks():
+        yield make_chunks()[0]
+        raise ValueError("读取失败")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'scenario.udpbin')
+        for existing in (False, True):
+            if existing:
+                compile_replay_file(make_chunks(), codec, path)
+                with open(path, 'rb') as f:
+                    original = f.read()
+            try:
+                compile_replay_file(failing_chunks(), codec, path)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("异常未被传递")
+            assert os.listdir(tmp) == (['scenario.udpbin'] if existing else [])
+        with open(path, 'rb') as f:
+            assert f.read() == original
+        with ReplayFile(path) as replay:
+            assert len(replay.packets) == 3
+
+
+if __name__ == "__main__":
+    test_replay_round_trip()
+    test_replay_layout()
+    test_stamp_read_only_replay()
+    test_failed_compile_leaves_no_file()
+    print("测试完成！")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证截止时间调度器
+
+检查连续发送时不会累积漂移，以及延迟统计是否正确。
+"""
+
+import time
+
+import pandas as pd
+
+from packet_codec import PacketCodec
+from scheduler import DeadlineScheduler, LatenessStats, TimestampScheduler, create_scheduler
+
+
+def test_no_cumulative_drift():
+    """每个周期额外耗时时，总时长仍由截止时间决定"""
+    scheduler = DeadlineScheduler(0.002)
+    start = time.perf_counter()
+    for _ in range(51):
+        scheduler.wait()
+        time.sleep(0.0005)  # 模拟编码和发送耗时
+    elapsed = time.perf_counter() - start
+
+    # 51个数据包跨越50个间隔（0.1秒）；逐次 sleep 的实现会超过0.125秒
+    assert 0.099 <= elapsed < 0.12
+
+
+def test_lateness_reported():
+    """错过截止时间时返回延迟"""
+    scheduler = DeadlineScheduler(0.001)
+    scheduler.wait()
+    time.sleep(0.005)
+    assert scheduler.wait() >= 3_000_000
+
+
+def test_timestamp_deadlines():
+    """按时间戳调度的截止时间由速度倍数换算，时间戳回退时不等待"""
+    scheduler = TimestampScheduler(speed=2.0)
+    scheduler.feed([10.0, 10.02, 10.01])
+    scheduler.feed([10.06])
+    assert scheduler._deadlines == [30_000_000]
+
+    start = time.perf_counter()
+    scheduler.feed([10.0, 10.02, 10.01, 10.06])
+    for _ in range(4):
+        scheduler.wait()
+    elapsed = time.perf_counter() - start
+    assert 0.029 <= elapsed < 0.045
+
+
+def test_invalid_first_timestamp():
+    """首行时间戳无效（按0发送）时以第一个有效时间戳为起点，不会等待一个小时"""
+    frame = pd.DataFrame({'Timestamp': ['bad', '01:00:00:0', '01:00:00:20000'], 'Value': [1.0, 2.0, 3.0]})
+    packets = PacketCodec(frame.columns, ()).encode_frame(frame)
+    assert packets.invalid_timestamps.tolist() == [True, False, False]
+
+    scheduler = TimestampScheduler()
+    scheduler.feed(packets.timestamps, packets.invalid_timestamps)
+    assert scheduler.origin == 3600.0
+    assert scheduler._deadlines == [0, 0, 20_000_000]
+
+    # 没有掩码（回放文件）时按0发送的时间戳视为无效，整块无效时立即发送
+    scheduler = TimestampScheduler()
+    scheduler.feed([0.0, 0.0])
+    assert scheduler.origin is None and scheduler._deadlines == [0, 0]
+    scheduler.feed([3600.0, 3600.01])
+    assert scheduler._deadlines == [0, 10_000_000]
+
+
+def test_create_scheduler_validates_speed():
+    """回放速度超出范围时报错"""
+    try:
+        create_scheduler('timestamp', 0.1, speed=1000)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("未检查回放速度")
+
+
+def test_lateness_stats():
+    """延迟统计的平均值、最大值和最近的样本"""
+    stats = LatenessStats()
+    for value in (100, 300, 200):
+        stats.add(value)
+    assert stats.count == 3
+    assert stats.max_ns == 300
+    assert stats.mean_ns == 200
+    assert stats.samples is None
+
+    window = LatenessStats(window=2)
+    for value in (100, 300, 200):
+        window.add(value)
+    assert list(window.samples) == [300, 200] and window.max_ns == 300
+
+
+if __name__ == "__main__":
+    test_no_cumulative_drift()
+    test_lateness_reported()
+    test_timestamp_deadlines()
+    test_invalid_first_timestamp()
+    test_create_scheduler_validates_speed()
+    test_lateness_stats()
+    print("测试完成！")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证列类型推断
+
+分块加入数据，检查推断出的类型、保留的定点数声明以及数据包大小报告。
+"""
+
+import struct
+
+import numpy as np
+import pandas as pd
+
+from packet_codec import ColumnType, PacketCodec
+from schema_inference import SchemaInference, column_types_text, schema_report
+from sender_engine import SenderConfig
+
+COLUMNS = ['Timestamp', 'Flag', 'Count', 'Offset', 'Big', 'Half', 'Ratio', 'Gap', 'Text']
+
+
+def make_inference():
+    """两块数据：整数范围、float32精确值和空单元格跨块累计"""
+    chunks = [
+        pd.DataFrame({'Timestamp': ['00:00:01:0'] * 2, 'Flag': [True, False], 'Count': [0, 255],
+                      'Offset': [-3.0, 100.0], 'Big': [1, 2], 'Half': [0.5, -1.25], 'Ratio': [0.1, 0.2],
+                      'Gap': [1.0, np.nan], 'Text': ['7', ' 8 ']}),
+        pd.DataFrame({'Timestamp': ['00:00:02:0'] * 2, 'Flag': [1, 0], 'Count': [12, 256],
+                      'Offset': [-200.0, 5.0], 'Big': [2 ** 40, 3], 'Half': [2.0, 2.0 ** 100], 'Ratio': [0.3, 0.4],
+                      'Gap': [2.0, 3.0], 'Text': ['9', 'x']}),
+    ]
+    inference = SchemaInference(COLUMNS)
+    for chunk in chunks:
+        inference.update(chunk)
+    return inference
+
+
+def test_infer_types():
+    """每列推断为能无损表示全部数值的最窄类型"""
+    inference = make_inference()
+    inferred = inference.column_types()
+
+    assert inference.rows == 4
+    assert {col: str(column_type) for col, column_type in inferred.items()} == {
+        'Flag': 'uint8', 'Count': 'uint16', 'Offset': 'int16', 'Big': 'uint64', 'Half': 'float32',
+        'Ratio': 'float64', 'Gap': 'float32', 'Text': 'uint8'}
+    assert inference.stats['Gap'].missing == 1 and inference.stats['Text'].unparsed == 1
+
+
+def test_report_and_config_text():
+    """定点数声明被保留；报告给出当前与推断的数据包大小；配置文本只列出与默认不同的列"""
+    inference = make_inference()
+    config = SenderConfig(file_path='', int_columns=('Count', 'Ratio'),
+                          column_types=(('Ratio', ColumnType('int16', 0.1)),))
+    inferred = inference.column_types(config)
+    lines = schema_report(inference, config)
+
+    assert inferred['Ratio'] == ColumnType('int16', 0.1)
+    assert lines[-1] == "数据包大小: 当前 68 字节 -> 推断 38 字节 (减少 30 字节, 44.1%)"
+    assert "* Count: int32 -> uint16 (整数 0 ~ 256)" in lines
+    assert "  Ratio: int16:0.1 -> int16:0.1 (保留定点数声明)" in lines
+    assert column_types_text({'Count': ColumnType('int32'), 'Ratio': ColumnType('float64'),
+                              'Flag': ColumnType('uint8')}, config.int_columns) == "Ratio=float64\nFlag=uint8"
+
+
+def test_large_uint64_lossless():
+    """大于 2**53 的 uint64 列推断为 uint64，按推断的类型编码后数值不变"""
+    values = np.array([2 ** 53 + 1, 2 ** 64 - 1], dtype=np.uint64)
+    frame = pd.DataFrame({'Timestamp': ['00:00:01:0'] * 2, 'Big': values})
+    inference = SchemaInference(frame.columns)
+    inference.update(frame)
+    column_types = inference.column_types()
+    assert str(column_types['Big']) == 'uint64'
+
+    packets = PacketCodec(frame.columns, [], b'', b'', column_types=column_types).encode_frame(frame)
+    assert [struct.unpack_from('>Q', packets[i], 8)[0] for i in range(2)] == values.tolist()
+    assert packets.invalid == {}
+
+
+if __name__ == "__main__":
+    test_infer_types()
+    test_report_and_config_text()
+    test_large_uint64_lossless()
+    print("测试完成！")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证无界面发送引擎
+
+使用仓库中的 udp_example.xlsx 通过本机回环地址发送，并检查配置解析。
+"""
+
+import json
+import os
+import socket
+import tempfile
+
+import pandas as pd
+
+from packet_codec import PacketCodec
+from sender_engine import DetailLog, SenderConfig, SenderEngine
+
+EXAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'udp_example.xlsx')
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config_example.json')
+
+
+def test_config_from_example_json():
+    """config_example.json 可以直接解析，且能还原为相同格式"""
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        config = SenderConfig.from_dict(json.load(f))
+    assert config.target_port == 5005
+    assert config.prefix == b'\x55\xAA\x00\x00'
+    assert config.int_columns == ('Speed_Ref_Int', 'Gross_Weight_Int', 'Gear_Status_Int')
+    assert SenderConfig.from_dict(config.to_dict()) == config
+
+
+def test_config_validation():
+    """无效配置抛出 ValueError"""
+    for bad in ({'prefix_hex': 'ABC'}, {'data_start_row': '0'}, {'send_mode': 'burst'},
+                {'send_mode': 'timestamp', 'replay_speed': '500'}, {'column_types': 'Speed=int12'},
+                {'column_types': 'Speed'}):
+        try:
+            SenderConfig.from_dict(dict({'file_path': EXAMPLE_FILE}, **bad))
+        except ValueError:
+            continue
+        raise AssertionError(f"未检测到无效配置: {bad}")
+
+
+def test_engine_sends_sheet():
+    """引擎发送的数据包与直接编码的结果一致"""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    receiver.settimeout(1)
+    config = SenderConfig(file_path=EXAMPLE_FILE, data_start_row=1, target_port=receiver.getsockname()[1],
+                          send_interval=0.001, int_columns=('Speed_Ref_Int',))
+    events = []
+    try:
+        result = SenderEngine(config, events.append).run()
+        frame = pd.read_excel(EXAMPLE_FILE, sheet_name='A')
+        expected = PacketCodec(frame.columns, config.int_columns, config.prefix, config.suffix).encode_frame(frame)
+
+        assert result['total_sent'] == len(frame)
+        for i in range(len(frame)):
+            assert receiver.recv(65535) == bytes(expected[i])
+        assert events[-1]['type'] == 'complete'
+    finally:
+        receiver.close()
+
+
+def test_log_file_and_error_summary():
+    """相同的发送错误只在界面报告一次，明细写入日志文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = os.path.join(tmp, 'send.log')
+        events = []
+        engine = SenderEngine(SenderConfig(file_path=EXAMPLE_FILE, log_file=log_file), events.append)
+        engine.detail_log = DetailLog(log_file)
+        for _ in range(3):
+            engine.record_send_error(OSError("Network is unreachable"))
+        engine.detail_log.close()
+
+        logs = [event['content'] for event in events]
+        assert len(logs) == 1 and "Network is unreachable" in logs[0]
+        assert engine.send_errors == {"Network is unreachable": 3}
+        with open(log_file, 'r', encoding='utf-8') as f:
+            assert f.read().count("Network is unreachable") == 3
+
+
+if __name__ == "__main__":
+    test_config_from_example_json()
+    test_config_validation()
+    test_engine_sends_sheet()
+    test_log_file_and_error_summary()
+    print("测试完成！")
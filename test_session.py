@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证多路发送会话
+
+两路数据流使用不同的数据包前缀同时发送到两个本机端口，检查每个端口收到的内容。
+"""
+
+import json
+import os
+import socket
+import tempfile
+
+import pandas as pd
+
+from packet_codec import PacketCodec
+from sender_engine import SenderConfig
+from session import SenderSession, load_session
+
+EXAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'udp_example.xlsx')
+
+
+def test_load_session():
+    """会话文件中的 config 字段引用单路配置文件，其余字段覆盖"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'bus.json'), 'w', encoding='utf-8') as f:
+            json.dump({'file_path': EXAMPLE_FILE, 'target_port': '6000', 'send_mode': 'asap'}, f)
+        session_file = os.path.join(tmp, 'session.json')
+        with open(session_file, 'w', encoding='utf-8') as f:
+            json.dump({'encoder_workers': 3, 'streams': [
+                {'name': 'bus1', 'config': 'bus.json'},
+                {'name': 'bus2', 'config': 'bus.json', 'target_port': '6001'},
+            ]}, f)
+        streams, encoder_workers = load_session(session_file)
+    assert encoder_workers == 3
+    assert [(name, config.target_port, config.send_mode) for name, config in streams] == [
+        ('bus1', 6000, 'asap'), ('bus2', 6001, 'asap')]
+
+
+def test_session_sends_all_streams():
+    """每一路按自己的格式发送到自己的端口"""
+    receivers = []
+    streams = []
+    for i in range(2):
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(1)
+        receivers.append(receiver)
+        streams.append((f"bus{i + 1}", SenderConfig(
+            file_path=EXAMPLE_FILE, data_start_row=1, target_port=receiver.getsockname()[1],
+            send_interval=0.001, prefix=bytes([0x55, 0xAA, 0x00, i]))))
+    events = []
+    try:
+        result = SenderSession(streams, events.append).run()
+        frame = pd.read_excel(EXAMPLE_FILE, sheet_name='A')
+
+        assert 'error' not in result
+        assert result['total_sent'] == 2 * len(frame)
+        for receiver, (name, config) in zip(receivers, streams):
+            expected = PacketCodec(frame.columns, (), config.prefix, config.suffix).encode_frame(frame)
+            for i in range(len(frame)):
+                assert receiver.recv(65535) == bytes(expected[i])
+        assert sorted(event['stream'] for event in events if event['type'] == 'stream_complete') == ['bus1', 'bus2']
+        assert events[-1]['type'] == 'complete'
+    finally:
+        for receiver in receivers:
+            receiver.close()
+
+
+if __name__ == "__main__":
+    test_load_session()
+    test_session_sends_all_streams()
+    print("测试完成！")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证流式工作表读取
+
+将 SheetReader 分块读取的结果与 pd.read_excel 整表读取的结果进行对比，
+CSV/Parquet/Feather/NumPy 文件的结果与原始数据表进行对比。
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import sheet_reader
+from sheet_reader import SheetReader, read_header, prefetch
+
+
+def write_example(path):
+    """写入包含中间空行和末尾空行的示例工作表"""
+    df = pd.DataFrame({
+        'Timestamp': ['01:02:03:1', '01:02:03:2', None, '01:02:03:4', '01:02:03:5', None],
+        'Speed_Ref_Int': [1, 2, None, 4, 5, None],
+        'Altitude_Double': [1.5, 2.5, None, None, 5.5, None],
+    })
+    df.to_excel(path, sheet_name='A', index=False)
+
+
+def test_chunks_match_read_excel():
+    """分块结果拼接后与整表读取一致"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'example.xlsx')
+        write_example(path)
+        expected = pd.read_excel(path, sheet_name='A')
+
+        assert read_header(path, 'A') == expected.columns.tolist()
+        for data_start_row in (1, 2, 4):
+            reader = SheetReader(path, 'A', data_start_row, chunk_rows=2)
+            chunks = list(prefetch(iter(reader)))
+            assert all(len(chunk) <= 2 for chunk in chunks)
+            pd.testing.assert_frame_equal(pd.concat(chunks), expected.iloc[data_start_row - 1:],
+                                          check_dtype=False)
+
+
+def test_columnar_formats():
+    """CSV/NumPy（以及安装了 pyarrow 时的 Parquet/Feather）与Excel的数据起始行和行索引含义相同"""
+    expected = pd.DataFrame({
+        'Timestamp': ['01:02:03:1', '01:02:03:2', None, '01:02:03:4', '01:02:03:5'],
+        'Speed_Ref_Int': [1, 2, 3, 4, 5],
+        'Altitude_Double': [1.5, 2.5, np.nan, None, 5.5],
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, name) for name in ('example.csv', 'example.npz', 'example.npy')]
+        expected.to_csv(paths[0], index=False)
+        np.savez(paths[1], Timestamp=expected['Timestamp'].fillna('').to_numpy(dtype='S'),
+                 Speed_Ref_Int=expected['Speed_Ref_Int'].to_numpy(), Altitude_Double=expected['Altitude_Double'])
+        records = np.zeros(len(expected), dtype=[('Timestamp', 'U16'), ('Speed_Ref_Int', 'i4'),
+                                                 ('Altitude_Double', 'f8')])
+        for col in expected:
+            records[col] = expected[col].fillna('') if col == 'Timestamp' else expected[col]
+        np.save(paths[2], records)
+        try:
+            expected.to_parquet(os.path.join(tmp, 'example.parquet'))
+            expected.to_feather(os.path.join(tmp, 'example.feather'))
+            paths += [os.path.join(tmp, 'example.parquet'), os.path.join(tmp, 'example.feather')]
+        except ImportError:
+            pass
+
+        for path in paths:
+            assert read_header(path, 'A') == expected.columns.tolist()
+            for data_start_row in (1, 2, 4):
+                reader = SheetReader(path, 'A', data_start_row, chunk_rows=2)
+                frame = pd.concat(list(reader))
+                assert reader.total_rows == len(expected) - data_start_row + 1
+                # NumPy 文件没有空单元格，时间戳空值保存为空字符串
+                frame['Timestamp'] = frame['Timestamp'].mask(frame['Timestamp'] == '')
+                pd.testing.assert_frame_equal(frame, expected.iloc[data_start_row - 1:], check_dtype=False)
+
+
+def test_csv_streaming():
+    """CSV逐批读取：类型在后面的批中变化时改用pandas读完，列名与数据取自同一解析器，行数按行计数"""
+    rows = 200
+    values = [str(i) for i in range(rows)]
+    values[150] = '2.5'  # 前面的批推断为整数列
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'example.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("Timestamp,Value,Value\n")
+            f.write("".join(f"00:00:{i % 60:02d}:{i},{value},{i}\n" for i, value in enumerate(values)))
+        block_size, sheet_reader.CSV_BLOCK_SIZE = sheet_reader.CSV_BLOCK_SIZE, 256
+        try:
+            reader = SheetReader(path, 'A', 3, chunk_rows=16)
+            chunks = list(reader)
+            assert read_header(path, 'A') == reader.columns
+        finally:
+            sheet_reader.CSV_BLOCK_SIZE = block_size
+
+    frame = pd.concat(chunks)
+    assert reader.total_rows == rows - 2 and len(frame) == rows - 2
+    assert all(len(chunk) <= 16 for chunk in chunks)
+    assert frame.index.tolist() == list(range(2, rows))
+    assert frame.columns.tolist() == reader.columns and len(set(reader.columns)) in (2, 3)
+    assert pd.to_numeric(frame.iloc[:, 1]).tolist() == [float(value) for value in values[2:]]
+    assert frame.iloc[:, 2].tolist() == list(range(2, rows))
+
+
+def test_prefetch_propagates_errors():
+    """后台线程中的异常在消费端重新抛出"""
+    def failing():
+        yield 1
+        raise ValueError("读取失败")
+
+    items = prefetch(failing())
+    assert next(items) == 1
+    try:
+        next(items)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("异常未被传递")
+
+
+def test_prefetch_close_early():
+    """提前关闭时后台线程退出并关闭数据源，不再继续读取"""
+    produced = []
+    closed = threading.Event()
+
+    def endless():
+        try:
+            while True:
+                produced.append(len(produced))
+                yield produced[-1]
+        finally:
+            closed.set()
+
+    before = threading.active_count()
+    items = prefetch(endless(), depth=2)
+    assert next(items) == 0
+    items.close()
+    assert closed.is_set()
+    assert threading.active_count() == before
+    count = len(produced)
+    assert count <= 4
+    time.sleep(0.3)
+    assert len(produced) == count
+
+
+if __name__ == "__main__":
+    test_chunks_match_read_excel()
+    test_columnar_formats()
+    test_csv_streaming()
+    test_prefetch_propagates_errors()
+    test_prefetch_close_early()
+    print("测试完成！")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证界面启动不加载重量级依赖，以及启动耗时测量
+
+在独立进程中导入主程序模块，检查 pandas/numpy 等没有被加载；用一个写出启动报告的
+小脚本代替图形界面，检查 build.py 的测量流程。
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+from build import measure_startup, print_startup_report
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_lazy_imports():
+    """导入界面模块（udp_data_sender 和 gui_demo）不加载任何重量级依赖"""
+    for module in ('udp_data_sender', 'gui_demo'):
+        code = (f"import sys, udp_data_sender, {module}; "
+                "print(','.join(m for m in udp_data_sender.HEAVY_MODULES if m in sys.modules))")
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=HERE, text=True)
+        assert output.strip() == "", (module, output)
+
+
+def test_measure_startup():
+    """测量流程等待启动报告写出，汇总耗时和已加载的模块"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        script = os.path.join(tmpdir, "fake_gui.py")
+        with open(script, 'w', encoding='utf-8') as f:
+            f.write("import json, sys\n"
+                    "with open(sys.argv[2], 'w') as f:\n"
+                    "    json.dump({'window_seconds': 0.05, 'loaded_modules': ['numpy']}, f)\n")
+        result = measure_startup([sys.executable, script], runs=2)
+
+    assert len(result['wall']) == 2 and all(seconds > 0 for seconds in result['wall'])
+    assert result['window'] == [0.05, 0.05]
+    assert result['loaded_modules'] == ['numpy']
+    assert print_startup_report({'wall': [0.3, 0.2, 0.4], 'window': [0.1] * 3, 'loaded_modules': []})
+    assert not print_startup_report({'wall': [1.5], 'window': [1.2], 'loaded_modules': ['pandas']})
+
+
+if __name__ == "__main__":
+    test_lazy_imports()
+    test_measure_startup()
+    print("测试完成！")
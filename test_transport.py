@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+测试脚本 - 验证批量发送
+
+通过本机回环地址发送一批预编码数据包，检查接收端收到的内容和顺序。
+"""
+
+import socket
+import struct
+
+import numpy as np
+
+from packet_codec import PacketBuffer, PacketStamper
+from transport import FanoutTransport, UdpTransport
+
+PACKET_SIZE = 26
+PACKET_COUNT = 100
+
+
+def make_packets():
+    """构造内容互不相同的数据包缓冲区"""
+    data = (np.arange(PACKET_SIZE * PACKET_COUNT) % 251).astype(np.uint8)
+    return PacketBuffer(data, PACKET_SIZE)
+
+
+def check_transport(batch_size):
+    """发送第10到89个数据包并逐个核对"""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    receiver.settimeout(1)
+    transport = UdpTransport('127.0.0.1', receiver.getsockname()[1], batch_size=batch_size)
+    packets = make_packets()
+    try:
+        assert transport.send_batch(packets, 10, 80) == 80
+        for i in range(10, 90):
+            assert receiver.recv(65535) == bytes(packets[i])
+    finally:
+        transport.close()
+        receiver.close()
+
+
+def test_send_batch():
+    """批量发送（Linux 下使用 sendmmsg）"""
+    check_transport(batch_size=32)
+
+
+def test_send_loop():
+    """逐包发送回退路径"""
+    check_transport(batch_size=1)
+
+
+def test_fanout():
+    """同一批数据包发送到多个目标，并分别计数"""
+    receivers = []
+    for _ in range(2):
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(1)
+        receivers.append(receiver)
+    destinations = [('127.0.0.1', receiver.getsockname()[1]) for receiver in receivers]
+    transport = FanoutTransport(destinations, batch_size=32)
+    packets = make_packets()
+    try:
+        assert transport.send_batch(packets, 0, 50) == 50
+        assert transport.send(packets[50])
+        for receiver in receivers:
+            for i in range(51):
+                assert receiver.recv(65535) == bytes(packets[i])
+        assert [(d.sent, d.errors) for d in transport.destinations] == [(51, 0), (51, 0)]
+    finally:
+        transport.close()
+        for receiver in receivers:
+            receiver.close()
+
+
+def test_fanout_stamper():
+    """每个数据包只写入一次序号，所有目标收到相同的序号"""
+    receivers = []
+    for _ in range(2):
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(1)
+        receivers.append(receiver)
+    destinations = [('127.0.0.1', receiver.getsockname()[1]) for receiver in receivers]
+    transport = FanoutTransport(destinations, batch_size=32, stamper=PacketStamper(2))
+    packets = make_packets()
+    try:
+        assert transport.send_batch(packets, 0, 40) == 40
+        assert transport.send(packets[40])
+        for receiver in receivers:
+            sequences = [struct.unpack_from('>Q', receiver.recv(65535), 2)[0] for _ in range(41)]
+            assert sequences == list(range(41))
+    finally:
+        transport.close()
+        for receiver in receivers:
+            receiver.close()
+
+
+if __name__ == "__main__":
+    test_send_batch()
+    test_send_loop()
+    test_fanout()
+    test_fanout_stamper()
+    print("测试完成！")
@@ -0,0 +1,246 @@
+"""
+UDP发送模块
+
+目标地址在创建时解析一次，发送时不再重复构造。Linux 下支持通过 sendmmsg
+一次系统调用提交一批数据包（直接引用预编码缓冲区，不复制数据），其他平台
+自动回退为逐包 sendto。
+
+FanoutTransport 将同一批已编码的数据包依次发送到多个目标（单播或IPv4组播），
+所有目标共用一个socket，并分别统计每个目标的发送/错误次数。设置了 stamper
+（packet_codec.PacketStamper）时，每个数据包在发出前写入一次序号和发送时间，
+所有目标收到相同的序号；只读的数据包（回放文件）从 stamper 的暂存区发出。
+"""
+
+import ctypes
+import ctypes.util
+import ipaddress
+import os
+import socket
+import struct
+import sys
+
+import numpy as np
+
+# 每次 sendmmsg 提交的最大数据包数量
+DEFAULT_BATCH_SIZE = 256
+
+# 组播默认TTL（1 = 不跨越路由器）
+DEFAULT_MULTICAST_TTL = 1
+
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.c_void_p),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _MsgHdr), ('msg_len', ctypes.c_uint)]
+
+
+def _pointer_dtype():
+    return np.uint64 if ctypes.sizeof(ctypes.c_void_p) == 8 else np.uint32
+
+
+# 与C结构体布局一致的 numpy dtype，用于向量化填充一整批消息头
+IOVEC_DTYPE = np.dtype({
+    'names': ['base', 'len'],
+    'formats': [_pointer_dtype(), _pointer_dtype()],
+    'offsets': [_IoVec.iov_base.offset, _IoVec.iov_len.offset],
+    'itemsize': ctypes.sizeof(_IoVec),
+})
+MMSGHDR_DTYPE = np.dtype({
+    'names': ['name', 'namelen', 'iov', 'iovlen'],
+    'formats': [_pointer_dtype(), np.uint32, _pointer_dtype(), _pointer_dtype()],
+    'offsets': [_MsgHdr.msg_name.offset, _MsgHdr.msg_namelen.offset,
+                _MsgHdr.msg_iov.offset, _MsgHdr.msg_iovlen.offset],
+    'itemsize': ctypes.sizeof(_MMsgHdr),
+})
+
+
+def _load_sendmmsg():
+    """加载 libc 中的 sendmmsg，不可用时返回 None"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        sendmmsg = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    sendmmsg.restype = ctypes.c_int
+    return sendmmsg
+
+
+_sendmmsg = _load_sendmmsg()
+
+
+def sendmmsg_available():
+    """当前平台是否支持 sendmmsg 批量发送"""
+    return _sendmmsg is not None
+
+
+class UdpTransport:
+    """绑定到单个目标地址的UDP发送器"""
+
+    def __init__(self, target_ip, target_port, batch_size=DEFAULT_BATCH_SIZE, sock=None):
+        self.address = (socket.gethostbyname(target_ip), int(target_port))
+        self.sock = sock or socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.batch_size = max(int(batch_size), 1)
+        self.batched = _sendmmsg is not None and self.batch_size > 1
+
+        if self.batched:
+            # sockaddr_in：协议族（本机字节序）+ 端口 + IPv4地址（网络字节序）+ 填充
+            sockaddr = (struct.pack('=H', socket.AF_INET) + struct.pack('!H', self.address[1])
+                        + socket.inet_aton(self.address[0]) + b'\x00' * 8)
+            self._sockaddr = ctypes.create_string_buffer(sockaddr, len(sockaddr))
+            self._iovecs = np.zeros(self.batch_size, dtype=IOVEC_DTYPE)
+            self._headers = np.zeros(self.batch_size, dtype=MMSGHDR_DTYPE)
+            self._headers['name'] = ctypes.addressof(self._sockaddr)
+            self._headers['namelen'] = len(sockaddr)
+            self._headers['iov'] = self._iovecs.ctypes.data + np.arange(self.batch_size) * IOVEC_DTYPE.itemsize
+            self._headers['iovlen'] = 1
+
+    def send(self, packet):
+        """发送单个数据包"""
+        self.sock.sendto(packet, self.address)
+
+    def send_batch(self, packets, start, count):
+        """
+        发送 packets[start:start+count]（packets 为 PacketBuffer），返回成功发送的数量
+
+        只有第一个数据包就发送失败时才抛出 OSError；之后的失败会提前返回，
+        由调用方在下一批中重试或跳过该数据包。
+        """
+        if not self.batched:
+            return self._send_loop(packets, start, count)
+
+        buffer = np.frombuffer(packets.view, dtype=np.uint8)
+        base = buffer.ctypes.data + start * packets.packet_size
+        fd = self.sock.fileno()
+        sent = 0
+        while sent < count:
+            n = min(count - sent, self.batch_size)
+            self._iovecs['base'][:n] = base + (sent + np.arange(n)) * packets.packet_size
+            self._iovecs['len'][:n] = packets.packet_size
+            result = _sendmmsg(fd, self._headers.ctypes.data, n, 0)
+            if result < 0:
+                if sent == 0:
+                    errno = ctypes.get_errno()
+                    raise OSError(errno, os.strerror(errno))
+                break
+            sent += result
+            if result < n:
+                break
+        return sent
+
+    def _send_loop(self, packets, start, count):
+        """不支持 sendmmsg 时逐包发送"""
+        sock, address = self.sock, self.address
+        for i in range(start, start + count):
+            try:
+                sock.sendto(packets[i], address)
+            except OSError:
+                if i == start:
+                    raise
+                return i - start
+        return count
+
+    def close(self):
+        self.sock.close()
+
+
+class Destination:
+    """单个发送目标及其计数"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.name = f"{transport.address[0]}:{transport.address[1]}"
+        self.multicast = ipaddress.ip_address(transport.address[0]).is_multicast
+        self.sent = 0     # 成功发送到该目标的数据包
+        self.errors = 0   # 发送到该目标的错误次数
+
+
+class FanoutTransport:
+    """
+    多目标UDP发送器
+
+    每个数据包只编码一次，依次发送到所有目标。单个目标发送失败不影响其他目标，
+    失败通过 on_error(目标, 异常) 回调报告；只有全部目标都失败的数据包才算作跳过。
+    """
+
+    def __init__(self, destinations, batch_size=DEFAULT_BATCH_SIZE, multicast_ttl=DEFAULT_MULTICAST_TTL,
+                 multicast_interface='', on_error=None, stamper=None):
+        if not destinations:
+            raise ValueError("至少需要一个发送目标")
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.on_error = on_error or (lambda destination, error: None)
+        self.stamper = stamper
+        try:
+            self.destinations = [Destination(UdpTransport(ip, port, batch_size, sock=self.sock))
+                                 for ip, port in destinations]
+            if any(destination.multicast for destination in self.destinations):
+                self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, int(multicast_ttl))
+                if multicast_interface:
+                    self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
+                                         socket.inet_aton(socket.gethostbyname(multicast_interface)))
+        except Exception:
+            self.sock.close()
+            raise
+        self.batch_size = self.destinations[0].transport.batch_size
+
+    def _error(self, destination, error):
+        destination.errors += 1
+        self.on_error(destination, error)
+
+    def send(self, packet):
+        """发送单个数据包到所有目标，返回是否至少有一个目标发送成功"""
+        if self.stamper is not None:
+            packet = self.stamper.stamp(packet)
+        delivered = False
+        for destination in self.destinations:
+            try:
+                destination.transport.send(packet)
+                destination.sent += 1
+                delivered = True
+            except OSError as e:
+                self._error(destination, e)
+        return delivered
+
+    def send_batch(self, packets, start, count):
+        """
+        发送 packets[start:start+count] 到所有目标，返回至少有一个目标发送成功的数据包数量
+
+        某个目标发送失败的数据包会被跳过，该目标继续发送后面的数据包。
+        """
+        if self.stamper is not None:
+            packets, start = self.stamper.stamp_batch(packets, start, count)
+        end = start + count
+        failed = None  # 所有目标都发送失败的数据包位置
+        for destination in self.destinations:
+            transport = destination.transport
+            destination_failed = set()
+            position = start
+            while position < end:
+                try:
+                    position += transport.send_batch(packets, position, end - position)
+                except OSError as e:
+                    self._error(destination, e)
+                    destination_failed.add(position)
+                    position += 1
+            destination.sent += count - len(destination_failed)
+            failed = destination_failed if failed is None else failed & destination_failed
+        return count - len(failed)
+
+    def close(self):
+        self.sock.close()
@@ -11,15 +11,33 @@ UDP Data Sender - 通用UDP数据发送工具
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import socket
-import struct
 import time
 import threading
 import os
-import pandas as pd
-from tqdm import tqdm
+import sys
 import queue
 import json
+import multiprocessing
+import ipaddress
+import socket
+import argparse
+from collections import deque
+from scheduler import SEND_MODES
+from matlab_parser import (PARSER_TYPES, column_layout, expected_rate, fixed_point_suffix, function_name_for,
+                           generate_batch_parser, generate_receiver_script)
+
+# 启动计时的起点（启动报告中的窗口显示耗时从这里算起）
+START_TIME = time.perf_counter()
+
+# 日志框最多保留的行数，更早的日志从界面上移除（完整日志可写入日志文件）
+MAX_LOG_LINES = 1000
+
+# 字节序: 配置值 -> 界面显示名称
+BYTE_ORDER_NAMES = {'big': '大端', 'little': '小端'}
+
+# 启动报告中检查是否已加载的重量级依赖。pandas/numpy 等在选择数据文件或开始发送时
+# 才导入（各方法内的局部导入），窗口不必等待它们加载完成
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'pyarrow')
 
 class MessageSenderGUI:
     """
@@ -46,14 +64,23 @@ class MessageSenderGUI:
         self.target_ip = tk.StringVar(value="127.0.0.1")
         self.target_port = tk.StringVar(value="5005")
         self.send_interval = tk.StringVar(value="0.1")
+        self.send_mode = tk.StringVar(value=SEND_MODES['interval'])
+        self.replay_speed = tk.StringVar(value="1.0")
+        self.log_file = tk.StringVar()  # 详细日志文件（为空时不写入）
+        self.metrics_file = tk.StringVar()  # 发送指标文件（为空时不写入）
+        self.metrics_interval = tk.StringVar(value="1.0")
+        self.multicast_ttl = tk.StringVar(value="1")
+        self.multicast_interface = tk.StringVar()  # 组播出口网卡IP（为空时由系统选择）
+        self.encode_workers = tk.StringVar(value="0")  # 并行编码进程数（0 = 不使用进程池）
+        self.sequence_header = tk.BooleanVar(value=False)  # 数据包中加入序号和发送时间
+        self.byte_order = tk.StringVar(value=BYTE_ORDER_NAMES['big'])
+        self.align = tk.BooleanVar(value=False)  # 按C结构体规则自然对齐各字段
+        self.parser_type = tk.StringVar(value=PARSER_TYPES['single'])
         
         # 控制变量
         self.is_running = False
         self.is_paused = False
-        self.pause_flag = threading.Event()
-        self.pause_flag.clear()
-        self.stop_flag = threading.Event()
-        self.stop_flag.clear()
+        self.engine = None
         
         # 消息队列用于线程间通信
         self.message_queue = queue.Queue()
@@ -71,6 +98,11 @@ class MessageSenderGUI:
             'Gross_Weight_Int',
             'Gear_Status_Int'
         ]
+        self.column_types = {}  # 列名 -> ColumnType（未列出的列按整数列/float64编码）
+        
+        # 待写入日志框的消息（每次刷新界面时批量写入）
+        self.pending_logs = deque(maxlen=MAX_LOG_LINES)
+        self.dropped_logs = 0
         
         self.setup_ui()
         self.check_queue()
@@ -94,7 +126,7 @@ class MessageSenderGUI:
         file_frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
         file_frame.columnconfigure(1, weight=1)
         
-        ttk.Label(file_frame, text="Excel文件:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
+        ttk.Label(file_frame, text="数据文件:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
         ttk.Entry(file_frame, textvariable=self.file_path, width=50).grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 10))
         ttk.Button(file_frame, text="浏览", command=self.browse_file).grid(row=0, column=2)
         ttk.Button(file_frame, text="生成示例Excel", command=self.generate_example_excel).grid(row=0, column=3, padx=(10,0))
@@ -105,6 +137,16 @@ class MessageSenderGUI:
         ttk.Label(file_frame, text="数据起始行:").grid(row=1, column=2, sticky=tk.W, padx=(20, 10), pady=(10, 0))
         ttk.Entry(file_frame, textvariable=self.data_start_row, width=10).grid(row=1, column=3, sticky=tk.W, pady=(10, 0))
         
+        ttk.Label(file_frame, text="日志文件:").grid(row=2, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Entry(file_frame, textvariable=self.log_file, width=50).grid(row=2, column=1, sticky=(tk.W, tk.E), padx=(0, 10), pady=(10, 0))
+        ttk.Button(file_frame, text="浏览", command=self.browse_log_file).grid(row=2, column=2, pady=(10, 0))
+        
+        ttk.Label(file_frame, text="指标文件:").grid(row=3, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Entry(file_frame, textvariable=self.metrics_file, width=50).grid(row=3, column=1, sticky=(tk.W, tk.E), padx=(0, 10), pady=(10, 0))
+        ttk.Button(file_frame, text="浏览", command=self.browse_metrics_file).grid(row=3, column=2, pady=(10, 0))
+        ttk.Label(file_frame, text="间隔(秒):").grid(row=3, column=3, sticky=tk.W, padx=(10, 5), pady=(10, 0))
+        ttk.Entry(file_frame, textvariable=self.metrics_interval, width=6).grid(row=3, column=4, sticky=tk.W, pady=(10, 0))
+        
         # 网络配置区域
         network_frame = ttk.LabelFrame(main_frame, text="网络配置", padding="10")
         network_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
@@ -119,6 +161,23 @@ class MessageSenderGUI:
         ttk.Label(network_frame, text="发送间隔(秒):").grid(row=1, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
         ttk.Entry(network_frame, textvariable=self.send_interval, width=10).grid(row=1, column=1, sticky=tk.W, pady=(10, 0))
         
+        ttk.Label(network_frame, text="发送模式:").grid(row=1, column=2, sticky=tk.W, padx=(20, 10), pady=(10, 0))
+        ttk.Combobox(network_frame, textvariable=self.send_mode, values=list(SEND_MODES.values()),
+                     state="readonly", width=10).grid(row=1, column=3, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Label(network_frame, text="组播TTL:").grid(row=2, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Entry(network_frame, textvariable=self.multicast_ttl, width=10).grid(row=2, column=1, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Label(network_frame, text="回放速度(倍):").grid(row=2, column=2, sticky=tk.W, padx=(20, 10), pady=(10, 0))
+        ttk.Entry(network_frame, textvariable=self.replay_speed, width=10).grid(row=2, column=3, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Label(network_frame, text="组播接口IP:").grid(row=3, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Entry(network_frame, textvariable=self.multicast_interface, width=20).grid(row=3, column=1, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Label(network_frame, text="附加目标(IP:端口，每行一个):").grid(row=4, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        self.destinations_widget = scrolledtext.ScrolledText(network_frame, height=3, width=60)
+        self.destinations_widget.grid(row=4, column=1, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        
         # 数据包配置区域
         packet_frame = ttk.LabelFrame(main_frame, text="数据包配置", padding="10")
         packet_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
@@ -136,6 +195,22 @@ class MessageSenderGUI:
         int_columns_text.insert(tk.END, self.int_columns_text.get())
         self.int_columns_widget = int_columns_text
         
+        ttk.Label(packet_frame, text="列类型(每行 列名=类型):").grid(row=3, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        column_types_text = scrolledtext.ScrolledText(packet_frame, height=3, width=60)
+        column_types_text.grid(row=3, column=1, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        self.column_types_widget = column_types_text
+        
+        ttk.Label(packet_frame, text="字节序:").grid(row=4, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Combobox(packet_frame, textvariable=self.byte_order, values=list(BYTE_ORDER_NAMES.values()),
+                     state="readonly", width=8).grid(row=4, column=1, sticky=tk.W, pady=(10, 0))
+        ttk.Checkbutton(packet_frame, text="自然对齐(C结构体)", variable=self.align).grid(
+            row=4, column=2, columnspan=2, sticky=tk.W, padx=(20, 0), pady=(10, 0))
+        
+        ttk.Label(packet_frame, text="编码进程数:").grid(row=2, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Entry(packet_frame, textvariable=self.encode_workers, width=10).grid(row=2, column=1, sticky=tk.W, pady=(10, 0))
+        ttk.Checkbutton(packet_frame, text="序号和发送时间头部", variable=self.sequence_header).grid(
+            row=2, column=2, columnspan=2, sticky=tk.W, padx=(20, 0), pady=(10, 0))
+        
         # 控制按钮区域
         control_frame = ttk.Frame(main_frame)
         control_frame.grid(row=4, column=0, columnspan=3, pady=(0, 10))
@@ -152,7 +227,11 @@ class MessageSenderGUI:
         # 配置管理按钮
         ttk.Button(control_frame, text="保存配置", command=self.save_config).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(control_frame, text="加载配置", command=self.load_config).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Button(control_frame, text="生成解析脚本", command=self.generate_parser).pack(side=tk.LEFT)
+        ttk.Button(control_frame, text="生成解析脚本", command=self.generate_parser).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Combobox(control_frame, textvariable=self.parser_type, values=list(PARSER_TYPES.values()),
+                     state="readonly", width=10).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(control_frame, text="编译回放文件", command=self.compile_replay).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(control_frame, text="推断列类型", command=self.infer_column_types).pack(side=tk.LEFT)
         
         # 进度显示区域
         progress_frame = ttk.LabelFrame(main_frame, text="发送进度", padding="10")
@@ -184,18 +263,65 @@ class MessageSenderGUI:
         self.log_message("支持的操作：开始发送、暂停、继续、停止")
         
     def browse_file(self):
-        """浏览选择Excel文件"""
+        """浏览选择数据文件（Excel、CSV/Parquet/Feather/NumPy 或回放文件）"""
         filename = filedialog.askopenfilename(
-            title="选择Excel文件",
-            filetypes=[("Excel文件", "*.xlsx *.xls"), ("所有文件", "*.*")]
+            title="选择数据文件",
+            filetypes=[("数据文件", "*.xlsx *.xls *.csv *.parquet *.feather *.npy *.npz *.udpbin"),
+                       ("Excel文件", "*.xlsx *.xls"), ("CSV文件", "*.csv"),
+                       ("Parquet/Feather文件", "*.parquet *.feather"), ("NumPy文件", "*.npy *.npz"),
+                       ("回放文件", "*.udpbin"), ("所有文件", "*.*")]
         )
         if filename:
+            from replay_file import is_replay_file
             self.file_path.set(filename)
             self.log_message(f"已选择文件: {filename}")
+            if is_replay_file(filename):
+                self.apply_replay_schema(filename)
+    
+    def browse_log_file(self):
+        """选择详细日志文件（记录每个无效单元格和每次发送错误）"""
+        filename = filedialog.asksaveasfilename(
+            title="选择日志文件",
+            defaultextension=".log",
+            filetypes=[("日志文件", "*.log"), ("所有文件", "*.*")]
+        )
+        if filename:
+            self.log_file.set(filename)
+    
+    def browse_metrics_file(self):
+        """选择发送指标文件（.prom 为Prometheus文本格式，其他为CSV）"""
+        filename = filedialog.asksaveasfilename(
+            title="选择指标文件",
+            defaultextension=".csv",
+            filetypes=[("CSV文件", "*.csv"), ("Prometheus文本格式", "*.prom"), ("所有文件", "*.*")]
+        )
+        if filename:
+            self.metrics_file.set(filename)
+    
+    def apply_replay_schema(self, filename):
+        """将回放文件中记录的数据包格式同步到界面"""
+        from replay_file import read_replay_header
+        try:
+            header = read_replay_header(filename)
+        except Exception as e:
+            messagebox.showerror("错误", f"读取回放文件失败: {e}")
+            return
+        self.prefix_hex.set(header['prefix_hex'])
+        self.suffix_hex.set(header['suffix_hex'])
+        self.int_columns_widget.delete("1.0", tk.END)
+        self.int_columns_widget.insert("1.0", "\n".join(header['int_columns']))
+        self.sequence_header.set(header.get('sequence_header', False))
+        self.column_types_widget.delete("1.0", tk.END)
+        self.column_types_widget.insert("1.0", "\n".join(f"{col}={spec}" for col, spec in header.get('column_types', {}).items()))
+        self.byte_order.set(BYTE_ORDER_NAMES[header.get('byte_order', 'big')])
+        self.align.set(header.get('align', False))
+        self.log_message(f"回放文件: {header['packet_count']} 个数据包, 每包 {header['packet_size']} 字节, 生成于 {header['created']}")
     
     def generate_example_excel(self):
         """生成包含通用表头和示例数据的Excel模板"""
         try:
+            import pandas as pd
+            
             # 通用列名：第一列是时间戳，其余列包含整数与浮点示例
             columns = [
                 'Timestamp',
@@ -208,10 +334,8 @@ class MessageSenderGUI:
             
             # 构造示例数据（5 行）
             data = []
-            base_seconds = 1 * 3600 + 2 * 60 + 3  # 01:02:03
             for i in range(5):
-                seconds = base_seconds + i
-                timestamp = f"01:02:{3+i:02d}:{123456 + i*100}"  # 简单示例
+                timestamp = f"01:02:{3+i:02d}:{123456 + i*100}"  # 简单示例，从 01:02:03 开始
                 row = [
                     timestamp,
                     120 + i,          # Speed_Ref_Int
@@ -249,22 +373,17 @@ class MessageSenderGUI:
     
     def parse_config(self):
         """解析用户配置"""
+        from sender_engine import parse_column_types, parse_hex, parse_int_columns
         try:
-            # 解析前缀
-            prefix_hex = self.prefix_hex.get().replace(" ", "").replace("0x", "").replace("0X", "")
-            if len(prefix_hex) % 2 != 0:
-                raise ValueError("前缀十六进制长度必须是偶数")
-            self.prefix = bytes.fromhex(prefix_hex)
-            
-            # 解析后缀
-            suffix_hex = self.suffix_hex.get().replace(" ", "").replace("0x", "").replace("0X", "")
-            if len(suffix_hex) % 2 != 0:
-                raise ValueError("后缀十六进制长度必须是偶数")
-            self.suffix = bytes.fromhex(suffix_hex)
+            # 解析前缀和后缀
+            self.prefix = parse_hex(self.prefix_hex.get(), "前缀")
+            self.suffix = parse_hex(self.suffix_hex.get(), "后缀")
             
             # 解析整数列名
-            int_columns_text = self.int_columns_widget.get("1.0", tk.END).strip()
-            self.int_columns = [line.strip() for line in int_columns_text.split('\n') if line.strip()]
+            self.int_columns = list(parse_int_columns(self.int_columns_widget.get("1.0", tk.END)))
+            
+            # 解析列类型
+            self.column_types = dict(parse_column_types(self.column_types_widget.get("1.0", tk.END)))
             
             return True
         except Exception as e:
@@ -272,12 +391,28 @@ class MessageSenderGUI:
             return False
     
     def log_message(self, message):
-        """添加日志消息"""
+        """添加日志消息（先缓存，由 flush_logs 批量写入界面）"""
         timestamp = time.strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
-        self.log_text.insert(tk.END, log_entry)
+        if len(self.pending_logs) == self.pending_logs.maxlen:
+            self.dropped_logs += 1
+        self.pending_logs.append(f"[{timestamp}] {message}\n")
+    
+    def flush_logs(self):
+        """将缓存的日志一次性写入日志框，并只保留最近 MAX_LOG_LINES 行"""
+        if not self.pending_logs:
+            return
+        text = "".join(self.pending_logs)
+        if self.dropped_logs:
+            text = f"... 省略 {self.dropped_logs} 条日志 ...\n" + text
+        self.pending_logs.clear()
+        self.dropped_logs = 0
+        
+        self.log_text.insert(tk.END, text)
+        # 每条日志以换行结尾，最后一个换行之后的空行不计入行数
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - MAX_LOG_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
     
     def check_queue(self):
         """检查消息队列并更新UI"""
@@ -286,70 +421,47 @@ class MessageSenderGUI:
                 message = self.message_queue.get_nowait()
                 if message['type'] == 'log':
                     self.log_message(message['content'])
-                elif message['type'] == 'progress':
-                    self.progress_var.set(message['value'])
                 elif message['type'] == 'status':
                     self.status_label.config(text=message['content'])
-                elif message['type'] == 'stats':
-                    self.stats_label.config(text=message['content'])
                 elif message['type'] == 'complete':
                     self.on_sending_complete(message['data'])
+                elif message['type'] == 'column_types':
+                    self.column_types_widget.delete("1.0", tk.END)
+                    self.column_types_widget.insert("1.0", message['content'])
         except queue.Empty:
             pass
+        self.flush_logs()
+        if self.is_running:
+            self.update_progress()
         self.root.after(100, self.check_queue)
     
-    def pack_row(self, row, columns):
-        """打包行数据为二进制格式"""
-        binary_data = self.prefix
-        try:
-            h, m, s, us = map(int, str(row[0]).split(':'))
-            total_seconds = h * 3600 + m * 60 + s
-            binary_data += struct.pack('>i', total_seconds)
-            binary_data += struct.pack('>i', us)
-        except Exception as e:
-            self.message_queue.put({'type': 'log', 'content': f"[行: {row.name}] 解析时间戳 {row[0]} 时出错: {e}"})
-            binary_data += struct.pack('>i', 0) * 2
-
-        for i, value in enumerate(row[1:]):
-            col = columns[i+1]
-            try:
-                if col in self.int_columns:
-                    binary_data += struct.pack('>i', int(float(value)))
-                else:
-                    binary_data += struct.pack('>d', float(value))
-            except Exception as e:
-                self.message_queue.put({'type': 'log', 'content': f"[行: {row.name}] 处理值 {value} (列: {col}) 时出错: {e}"})
-                binary_data += struct.pack('>i', 0) if col in self.int_columns else struct.pack('>d', 0.0)
-        return binary_data + self.suffix
+    def update_progress(self):
+        """采样发送计数器并更新进度显示"""
+        from metrics import format_stats
+        stats = self.engine.sample()
+        self.progress_var.set(stats['progress'])
+        self.stats_label.config(text=format_stats(stats))
     
     def start_sending(self):
         """开始发送数据"""
+        from sender_engine import SenderConfig, SenderEngine
         if not self.file_path.get():
-            messagebox.showerror("错误", "请先选择Excel文件")
+            messagebox.showerror("错误", "请先选择数据文件")
             return
         
         if not os.path.exists(self.file_path.get()):
             messagebox.showerror("错误", "选择的文件不存在")
             return
         
+        # 解析配置为不可变快照，发送线程不再读取界面变量
         try:
-            target_port = int(self.target_port.get())
-            send_interval = float(self.send_interval.get())
-            data_start_row = int(self.data_start_row.get())
-            if data_start_row < 1:
-                raise ValueError("数据起始行必须大于0")
+            config = SenderConfig.from_dict(self.get_config())
         except ValueError as e:
             messagebox.showerror("错误", f"参数错误: {e}")
             return
         
-        # 解析配置
-        if not self.parse_config():
-            return
-        
         self.is_running = True
         self.is_paused = False
-        self.pause_flag.clear()
-        self.stop_flag.clear()
         
         # 更新按钮状态
         self.start_button.config(state=tk.DISABLED)
@@ -357,27 +469,60 @@ class MessageSenderGUI:
         self.stop_button.config(state=tk.NORMAL)
         
         # 启动发送线程
-        self.send_thread = threading.Thread(target=self.send_data_thread, daemon=True)
-        self.send_thread.start()
+        self.engine = SenderEngine(config, self.message_queue.put)
+        self.engine.start()
         
         self.log_message("开始发送数据...")
         self.log_message(f"前缀: {self.prefix_hex.get()}")
         self.log_message(f"后缀: {self.suffix_hex.get()}")
-        self.log_message(f"整数列: {len(self.int_columns)} 个")
+        self.log_message(f"整数列: {len(config.int_columns)} 个")
+        if config.column_types:
+            self.log_message("列类型: " + ", ".join(f"{col}={column_type}" for col, column_type in config.column_types))
     
-    def save_config(self):
-        """保存当前配置到文件"""
-        config = {
+    def get_send_mode(self):
+        """当前发送模式的配置值"""
+        for mode, name in SEND_MODES.items():
+            if name == self.send_mode.get():
+                return mode
+        return 'interval'
+    
+    def get_byte_order(self):
+        """当前字节序的配置值"""
+        for byte_order, name in BYTE_ORDER_NAMES.items():
+            if name == self.byte_order.get():
+                return byte_order
+        return 'big'
+    
+    def get_config(self):
+        """收集界面上的配置（与配置文件格式相同）"""
+        return {
             'file_path': self.file_path.get(),
             'sheet_name': self.sheet_name.get(),
             'data_start_row': self.data_start_row.get(),
             'target_ip': self.target_ip.get(),
             'target_port': self.target_port.get(),
             'send_interval': self.send_interval.get(),
+            'send_mode': self.get_send_mode(),
+            'replay_speed': self.replay_speed.get(),
             'prefix_hex': self.prefix_hex.get(),
             'suffix_hex': self.suffix_hex.get(),
-            'int_columns': self.int_columns_widget.get("1.0", tk.END).strip()
+            'int_columns': self.int_columns_widget.get("1.0", tk.END).strip(),
+            'column_types': self.column_types_widget.get("1.0", tk.END).strip(),
+            'log_file': self.log_file.get(),
+            'destinations': self.destinations_widget.get("1.0", tk.END).strip(),
+            'multicast_ttl': self.multicast_ttl.get(),
+            'multicast_interface': self.multicast_interface.get(),
+            'encode_workers': self.encode_workers.get(),
+            'sequence_header': '1' if self.sequence_header.get() else '0',
+            'byte_order': self.get_byte_order(),
+            'align': '1' if self.align.get() else '0',
+            'metrics_file': self.metrics_file.get(),
+            'metrics_interval': self.metrics_interval.get()
         }
+    
+    def save_config(self):
+        """保存当前配置到文件"""
+        config = self.get_config()
         
         filename = filedialog.asksaveasfilename(
             title="保存配置",
@@ -402,6 +547,7 @@ class MessageSenderGUI:
         )
         
         if filename:
+            from sender_engine import parse_bool
             try:
                 with open(filename, 'r', encoding='utf-8') as f:
                     config = json.load(f)
@@ -413,44 +559,156 @@ class MessageSenderGUI:
                 self.target_ip.set(config.get('target_ip', '127.0.0.1'))
                 self.target_port.set(config.get('target_port', '5005'))
                 self.send_interval.set(config.get('send_interval', '0.1'))
+                self.send_mode.set(SEND_MODES.get(config.get('send_mode', 'interval'), SEND_MODES['interval']))
+                self.replay_speed.set(config.get('replay_speed', '1.0'))
                 self.prefix_hex.set(config.get('prefix_hex', '55AA0000'))
                 self.suffix_hex.set(config.get('suffix_hex', '0000'))
+                self.log_file.set(config.get('log_file', ''))
+                self.metrics_file.set(config.get('metrics_file', ''))
+                self.metrics_interval.set(config.get('metrics_interval', '1.0'))
+                self.multicast_ttl.set(config.get('multicast_ttl', '1'))
+                self.multicast_interface.set(config.get('multicast_interface', ''))
+                self.encode_workers.set(config.get('encode_workers', '0'))
+                self.sequence_header.set(parse_bool(config.get('sequence_header', False)))
+                self.byte_order.set(BYTE_ORDER_NAMES.get(config.get('byte_order', 'big'), BYTE_ORDER_NAMES['big']))
+                self.align.set(parse_bool(config.get('align', False)))
+                self.destinations_widget.delete("1.0", tk.END)
+                self.destinations_widget.insert("1.0", config.get('destinations', ''))
                 
                 # 更新整数列文本框
                 self.int_columns_widget.delete("1.0", tk.END)
                 self.int_columns_widget.insert("1.0", config.get('int_columns', ''))
+                self.column_types_widget.delete("1.0", tk.END)
+                self.column_types_widget.insert("1.0", config.get('column_types', ''))
                 
                 self.log_message(f"配置已从文件加载: {filename}")
                 messagebox.showinfo("成功", "配置加载成功！")
             except Exception as e:
                 messagebox.showerror("错误", f"加载配置失败: {e}")
     
+    def compile_replay(self):
+        """将当前数据文件编译为回放文件(.udpbin)"""
+        from replay_file import REPLAY_EXTENSION, is_replay_file
+        from sender_engine import SenderConfig
+        if not self.file_path.get() or not os.path.exists(self.file_path.get()):
+            messagebox.showerror("错误", "请先选择数据文件")
+            return
+        if is_replay_file(self.file_path.get()):
+            messagebox.showerror("错误", "当前文件已经是回放文件")
+            return
+        try:
+            config = SenderConfig.from_dict(self.get_config())
+        except ValueError as e:
+            messagebox.showerror("错误", f"参数错误: {e}")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            title="保存回放文件",
+            defaultextension=REPLAY_EXTENSION,
+            filetypes=[("回放文件", "*.udpbin"), ("所有文件", "*.*")]
+        )
+        if filename:
+            threading.Thread(target=self.compile_replay_thread, args=(config, filename), daemon=True).start()
+    
+    def compile_replay_thread(self, config, filename):
+        """编译回放文件的工作线程"""
+        from sender_engine import compile_replay
+        try:
+            self.message_queue.put({'type': 'status', 'content': '正在编译回放文件...'})
+            compile_replay(config, filename, self.message_queue.put)
+            self.message_queue.put({'type': 'status', 'content': '就绪'})
+        except Exception as e:
+            self.message_queue.put({'type': 'log', 'content': f"编译回放文件失败: {e}"})
+            self.message_queue.put({'type': 'status', 'content': '编译失败'})
+    
+    def infer_column_types(self):
+        """扫描当前数据文件，为每列推断最紧凑的无损类型，填入列类型文本框"""
+        from replay_file import is_replay_file
+        from sender_engine import SenderConfig
+        if not self.file_path.get() or not os.path.exists(self.file_path.get()):
+            messagebox.showerror("错误", "请先选择数据文件")
+            return
+        if is_replay_file(self.file_path.get()):
+            messagebox.showerror("错误", "回放文件中的数据已经编码，无法推断列类型")
+            return
+        try:
+            config = SenderConfig.from_dict(self.get_config())
+        except ValueError as e:
+            messagebox.showerror("错误", f"参数错误: {e}")
+            return
+        threading.Thread(target=self.infer_column_types_thread, args=(config,), daemon=True).start()
+    
+    def infer_column_types_thread(self, config):
+        """推断列类型的工作线程"""
+        from schema_inference import column_types_text, infer_schema, schema_report
+        try:
+            self.message_queue.put({'type': 'status', 'content': '正在推断列类型...'})
+            inference = infer_schema(config)
+            for line in schema_report(inference, config):
+                self.message_queue.put({'type': 'log', 'content': line})
+            self.message_queue.put({'type': 'column_types',
+                                    'content': column_types_text(inference.column_types(config), config.int_columns)})
+            self.message_queue.put({'type': 'status', 'content': '就绪'})
+        except Exception as e:
+            self.message_queue.put({'type': 'log', 'content': f"推断列类型失败: {e}"})
+            self.message_queue.put({'type': 'status', 'content': '推断失败'})
+    
     def generate_parser(self):
         """生成数据包解析脚本"""
+        from packet_codec import PacketCodec
+        from replay_file import is_replay_file, read_replay_header
+        from sender_engine import SenderConfig
+        from sheet_reader import read_header
         if not self.file_path.get():
-            messagebox.showerror("错误", "请先选择Excel文件以获取列信息")
+            messagebox.showerror("错误", "请先选择数据文件以获取列信息")
             return
         
         try:
-            # 读取Excel文件获取列信息
-            df = pd.read_excel(self.file_path.get(), sheet_name=self.sheet_name.get())
-            columns = df.columns.tolist()
+            # 只读取表头获取列信息（回放文件以其中记录的数据包格式为准）
+            sequence_header = self.sequence_header.get()
+            byte_order, align = self.get_byte_order(), self.align.get()
+            if is_replay_file(self.file_path.get()):
+                header = read_replay_header(self.file_path.get())
+                columns = header['columns']
+                sequence_header = header.get('sequence_header', False)
+                byte_order, align = header.get('byte_order', 'big'), header.get('align', False)
+            else:
+                columns = read_header(self.file_path.get(), self.sheet_name.get())
             
             # 解析当前配置
             if not self.parse_config():
                 return
             
-            # 生成MATLAB解析脚本
-            matlab_script = self.generate_matlab_parser(columns)
-            
-            # 保存脚本
+            # 保存脚本（批量解析函数以文件名作为函数名）
+            parser_type = next((key for key, name in PARSER_TYPES.items() if name == self.parser_type.get()), 'single')
+            default_names = {'single': "parse_udp_packet.m", 'batch': "parse_udp_batch.m", 'receiver': "receive_udp.m"}
             filename = filedialog.asksaveasfilename(
                 title="保存解析脚本",
                 defaultextension=".m",
+                initialfile=default_names[parser_type],
                 filetypes=[("MATLAB脚本", "*.m"), ("所有文件", "*.*")]
             )
             
             if filename:
+                # 生成MATLAB解析脚本
+                codec = PacketCodec(columns, self.int_columns, self.prefix, self.suffix, sequence_header,
+                                    self.column_types, byte_order, align)
+                if parser_type == 'batch':
+                    matlab_script = generate_batch_parser(codec, function_name_for(filename, 'parse_udp_batch'))
+                elif parser_type == 'receiver':
+                    # 接收脚本与其调用的批量解析函数保存在同一目录
+                    config = SenderConfig.from_dict(self.get_config())
+                    parser_name = function_name_for(filename, 'receive_udp') + "_decode"
+                    parser_file = os.path.join(os.path.dirname(filename), parser_name + ".m")
+                    with open(parser_file, 'w', encoding='utf-8') as f:
+                        f.write(generate_batch_parser(codec, parser_name))
+                    self.log_message(f"批量解析函数已生成: {parser_file}")
+                    multicast_group = config.target_ip if ipaddress.ip_address(
+                        socket.gethostbyname(config.target_ip)).is_multicast else ''
+                    matlab_script = generate_receiver_script(codec, config.target_port, parser_name,
+                                                             expected_rate(config), multicast_group=multicast_group)
+                else:
+                    matlab_script = self.generate_matlab_parser(codec)
                 with open(filename, 'w', encoding='utf-8') as f:
                     f.write(matlab_script)
                 
@@ -460,48 +718,53 @@ class MessageSenderGUI:
         except Exception as e:
             messagebox.showerror("错误", f"生成解析脚本失败: {e}")
     
-    def generate_matlab_parser(self, columns):
+    def generate_matlab_parser(self, codec):
         """生成MATLAB数据包解析脚本"""
-        prefix_hex = self.prefix_hex.get()
-        suffix_hex = self.suffix_hex.get()
-        int_columns = self.int_columns
-        
-        # 计算数据包结构
-        prefix_bytes = len(prefix_hex) // 2
-        suffix_bytes = len(suffix_hex) // 2
-        timestamp_bytes = 8  # 4字节秒数 + 4字节微秒
-        data_columns = len(columns) - 1  # 减去时间戳列
+        columns = codec.columns
+        prefix_hex = codec.prefix.hex().upper()
+        suffix_hex = codec.suffix.hex().upper()
+        
+        # 计算数据包结构（各字段的起始字节取自编码器，包含对齐填充）
+        prefix_bytes = len(codec.prefix)
+        suffix_bytes = len(codec.suffix)
+        header_bytes = 16 if codec.sequence_header else 0  # 8字节序号 + 8字节发送时间
+        layout = column_layout(codec)
+        if codec.sequence_header:
+            (_, sequence_start, _), (_, send_time_start, _), layout = layout[0], layout[1], layout[2:]
+        else:
+            sequence_start = send_time_start = 0
+        timestamp_start = layout[0][1]
         
-        # 计算每列的数据类型和字节数
+        # 计算每列的MATLAB类型和字节数
         column_info = []
-        for i, col in enumerate(columns[1:], 1):  # 跳过第一列（时间戳）
-            if col in int_columns:
-                column_info.append(f"    % 列{i}: {col} (int32, 4字节)")
-            else:
-                column_info.append(f"    % 列{i}: {col} (double, 8字节)")
+        for i, ((col, offset, _), column_type) in enumerate(zip(layout[2:], codec.types), 1):
+            column_info.append(f"    % 列{i}: {col} ({column_type}, {column_type.size}字节, 第{offset}字节起)")
         
         # 生成MATLAB脚本
-        script = f"""function [timestamp, data] = parse_udp_packet(packet_data)
+        script = f"""function [timestamp, data, sequence, send_time] = parse_udp_packet(packet_data)
 % UDP数据包解析函数
 % 自动生成于: {time.strftime('%Y-%m-%d %H:%M:%S')}
 % 
 % 输入: packet_data - 接收到的UDP数据包（字节数组）
 % 输出: timestamp - 时间戳 [小时, 分钟, 秒, 微秒]
 %       data - 解析后的数据 [列1, 列2, ...]
+%       sequence - 发送序号（uint64，数据包不带序号头部时为空）
+%       send_time - 发送时间（int64，Unix纪元起的纳秒，不带序号头部时为空）
 
 % 数据包结构配置
 PREFIX_HEX = '{prefix_hex}';  % 前缀
 SUFFIX_HEX = '{suffix_hex}';  % 后缀
 PREFIX_BYTES = {prefix_bytes};  % 前缀字节数
 SUFFIX_BYTES = {suffix_bytes};  % 后缀字节数
-TIMESTAMP_BYTES = {timestamp_bytes};  % 时间戳字节数
+SUFFIX_START = {codec.suffix_offset + 1};  % 后缀起始字节
+HEADER_BYTES = {header_bytes};  % 序号头部字节数
+PACKET_ENDIAN = '{'B' if codec.byte_order == 'big' else 'L'}';  % 数据包字节序（B = 大端, L = 小端）
 
 % 列信息:
 {chr(10).join(column_info)}
 
-% 计算总数据包大小
-total_data_bytes = {sum(4 if col in int_columns else 8 for col in columns[1:])};
-expected_packet_size = PREFIX_BYTES + TIMESTAMP_BYTES + total_data_bytes + SUFFIX_BYTES;
+% 数据包大小（含对齐填充）
+expected_packet_size = {codec.packet_size};
 
 % 检查数据包大小
 if length(packet_data) ~= expected_packet_size
@@ -515,14 +778,21 @@ if ~isequal(prefix, expected_prefix)
     warning('前缀不匹配');
 end
 
+% 解析序号和发送时间
+sequence = [];
+send_time = [];
+if HEADER_BYTES > 0
+    sequence = from_packet_bytes(packet_data({sequence_start}:{sequence_start + 7}), 'uint64', PACKET_ENDIAN);
+    send_time = from_packet_bytes(packet_data({send_time_start}:{send_time_start + 7}), 'int64', PACKET_ENDIAN);
+end
+
 % 解析时间戳
-timestamp_start = PREFIX_BYTES + 1;
-timestamp_end = PREFIX_BYTES + TIMESTAMP_BYTES;
-timestamp_bytes = packet_data(timestamp_start:timestamp_end);
+timestamp_start = {timestamp_start};
+timestamp_bytes = packet_data(timestamp_start:timestamp_start + 7);
 
-% 转换时间戳（大端序）
-seconds = typecast(timestamp_bytes(1:4), 'uint32');
-microseconds = typecast(timestamp_bytes(5:8), 'uint32');
+% 转换时间戳
+seconds = double(from_packet_bytes(timestamp_bytes(1:4), 'int32', PACKET_ENDIAN));
+microseconds = double(from_packet_bytes(timestamp_bytes(5:8), 'int32', PACKET_ENDIAN));
 
 % 转换为时分秒格式
 hours = floor(seconds / 3600);
@@ -531,36 +801,22 @@ secs = mod(seconds, 60);
 timestamp = [hours, minutes, secs, microseconds];
 
 % 解析数据列
-data_start = PREFIX_BYTES + TIMESTAMP_BYTES + 1;
 data = zeros(1, {len(columns)-1});
-byte_offset = 0;
 
 """
         
         # 添加每列的解析代码
-        for i, col in enumerate(columns[1:], 1):
-            if col in int_columns:
-                script += f"""
-% 解析列{i}: {col} (int32)
-col_start = data_start + byte_offset;
-col_end = col_start + 3;
-data({i}) = typecast(packet_data(col_start:col_end), 'int32');
-byte_offset = byte_offset + 4;
-"""
-            else:
-                script += f"""
-% 解析列{i}: {col} (double)
-col_start = data_start + byte_offset;
-col_end = col_start + 7;
-data({i}) = typecast(packet_data(col_start:col_end), 'double');
-byte_offset = byte_offset + 8;
+        for i, ((col, offset, matlab_type), column_type) in enumerate(zip(layout[2:], codec.types), 1):
+            script += f"""
+% 解析列{i}: {col} ({column_type})
+col_start = {offset};
+col_end = col_start + {column_type.size - 1};
+data({i}) = double(from_packet_bytes(packet_data(col_start:col_end), '{matlab_type}', PACKET_ENDIAN)){fixed_point_suffix(column_type)};
 """
         
         script += f"""
 % 检查后缀
-suffix_start = data_start + byte_offset;
-suffix_end = suffix_start + SUFFIX_BYTES - 1;
-suffix = packet_data(suffix_start:suffix_end);
+suffix = packet_data(SUFFIX_START:SUFFIX_START + SUFFIX_BYTES - 1);
 expected_suffix = hex2dec(reshape(SUFFIX_HEX, 2, [])')';
 if ~isequal(suffix, expected_suffix)
     warning('后缀不匹配');
@@ -576,6 +832,15 @@ fprintf('\\n');
 
 end
 
+function value = from_packet_bytes(bytes, type, packet_endian)
+% 将数据包字节序的字节转换为本机字节序的数值
+value = typecast(uint8(bytes(:))', type);
+[~, ~, endian] = computer;
+if endian ~= packet_endian
+    value = swapbytes(value);
+end
+end
+
 % 使用示例:
 % [timestamp, data] = parse_udp_packet(received_packet);
 % 
@@ -590,25 +855,28 @@ end
     
     def pause_sending(self):
         """暂停/继续发送"""
+        if self.engine is None:
+            return
         if self.is_paused:
-            self.pause_flag.clear()
+            self.engine.resume()
             self.is_paused = False
             self.pause_button.config(text="暂停")
             self.log_message("已继续发送")
         else:
-            self.pause_flag.set()
+            self.engine.pause()
             self.is_paused = True
             self.pause_button.config(text="继续")
             self.log_message("已暂停发送")
     
     def stop_sending(self):
         """停止发送"""
-        self.stop_flag.set()
-        self.pause_flag.set()  # 确保暂停
+        if self.engine is not None:
+            self.engine.stop()
         self.log_message("正在停止发送...")
     
     def on_sending_complete(self, data):
         """发送完成后的处理"""
+        self.update_progress()
         self.is_running = False
         self.is_paused = False
         
@@ -625,84 +893,32 @@ end
         self.log_message(f"总耗时: {data['elapsed']:.2f} 秒")
         if data['total_sent'] > 0:
             self.log_message(f"平均发送间隔: {data['elapsed']/data['total_sent']:.4f} 秒/条")
-    
-    def send_data_thread(self):
-        """发送数据的工作线程"""
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        try:
-            # 读取Excel文件
-            self.message_queue.put({'type': 'status', 'content': '正在读取文件...'})
-            df = pd.read_excel(self.file_path.get(), sheet_name=self.sheet_name.get())
-            self.message_queue.put({'type': 'log', 'content': f"成功读取文件，共 {len(df)} 行数据"})
-            
-            columns = df.columns.tolist()
-            data_start_row = int(self.data_start_row.get())
-            data_rows = df.iloc[data_start_row-1:]  # 转换为0基索引
-            total_records = len(data_rows)
-            self.message_queue.put({'type': 'log', 'content': f"开始发送数据，总共 {total_records} 条记录..."})
-            
-            sent_idx_set = set()
-            last_binary_data = None
-            last_idx = None
-            total_sent = skipped = 0
-            start_time = time.time()
-            
-            data_iter = data_rows.iterrows()
-            
-            while len(sent_idx_set) < total_records and not self.stop_flag.is_set():
-                if not self.pause_flag.is_set():
-                    try:
-                        idx, row = next(data_iter)
-                    except StopIteration:
-                        break
-                    binary_data = self.pack_row(row, columns)
-                    last_binary_data = binary_data
-                    last_idx = idx
-                    sent_idx_set.add(idx)
-                else:
-                    if last_binary_data is not None and last_idx is not None:
-                        binary_data = last_binary_data
-                        idx = last_idx
-                    else:
-                        time.sleep(float(self.send_interval.get()))
-                        continue
+        if 'lateness_max' in data:
+            self.log_message(f"发送延迟: 平均 {data['lateness_mean']:.3f} 毫秒, 最大 {data['lateness_max']:.3f} 毫秒")
 
-                try:
-                    sock.sendto(binary_data, (self.target_ip.get(), int(self.target_port.get())))
-                    if not self.pause_flag.is_set():
-                        total_sent += 1
-                        progress = (len(sent_idx_set) / total_records) * 100
-                        self.message_queue.put({'type': 'progress', 'value': progress})
-                        self.message_queue.put({'type': 'stats', 'content': f"已发送: {total_sent}/{total_records}"})
-                except Exception as e:
-                    skipped += 1
-                    self.message_queue.put({'type': 'log', 'content': f"发送错误: {e}"})
-                
-                time.sleep(float(self.send_interval.get()))
+def write_startup_report(root, filename):
+    """
+    窗口显示后写入启动报告（JSON）并关闭窗口，供 build.py 测量启动时间
 
-            elapsed = time.time() - start_time
-            
-            # 发送完成消息
-            self.message_queue.put({
-                'type': 'complete',
-                'data': {
-                    'total_sent': total_sent,
-                    'skipped': skipped,
-                    'total_records': total_records,
-                    'elapsed': elapsed
-                }
-            })
-            
-        except Exception as e:
-            self.message_queue.put({'type': 'log', 'content': f"发生错误: {e}"})
-            self.message_queue.put({'type': 'complete', 'data': {'total_sent': 0, 'skipped': 0, 'total_records': 0, 'elapsed': 0}})
-        finally:
-            sock.close()
-            self.message_queue.put({'type': 'log', 'content': "Socket连接已关闭"})
+    报告内容: window_seconds 为导入本模块到窗口显示的耗时（秒），loaded_modules 为
+    此时已经加载的重量级依赖（正常情况下为空）。
+    """
+    root.update()
+    report = {
+        'window_seconds': round(time.perf_counter() - START_TIME, 4),
+        'loaded_modules': [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(report, f)
+    root.destroy()
 
-def main():
+def main(startup_report=None):
+    """启动图形界面；startup_report 为文件名时窗口显示后写入启动报告并退出"""
     root = tk.Tk()
     app = MessageSenderGUI(root)
+    if startup_report:
+        write_startup_report(root, startup_report)
+        return
     
     # 设置窗口关闭事件
     def on_closing():
@@ -717,4 +933,7 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
+    multiprocessing.freeze_support()  # 打包后的程序启动编码子进程时需要
+    parser = argparse.ArgumentParser(description="UDP Data Sender 图形界面")
+    parser.add_argument('--startup-report', metavar='FILE', help="窗口显示后写入启动耗时报告(JSON)并退出")
+    main(parser.parse_args().startup_report)